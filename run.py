@@ -1,6 +1,4 @@
-from distutils.log import debug
-from tabnanny import verbose
-from waitress import serve
-from src.service.api import app
+from src.service import server
 
-serve(app, host='0.0.0.0', port=8080, threads=1)
+# Serves the API with TTT_WORKERS processes of TTT_THREADS threads each, see server
+server.run()
@@ -0,0 +1,115 @@
+"""
+Benchmarks data_service.calculate_adjacent_symbols against the previous
+implementation, which made one masked assignment per pair of squares.
+
+Usage:
+    python -m src.benchmark.adjacent_symbols_benchmark [--sizes 20000 200000 ...]
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.service import data_service, generators
+
+DEFAULT_SIZES = [20_000, 200_000, 2_000_000, 10_000_000]
+
+
+def calculate_adjacent_symbols_reference(dataset):
+    """The previous implementation of data_service.calculate_adjacent_symbols"""
+
+    v_positions = ["top", "middle", "bottom"]
+    h_positions = ["left", "middle", "right"]
+
+    for player in ["x", "o"]:
+        dataset[f"{player}_adj_horizontal"] = 0
+        for v_position in v_positions:
+            for h_index in [0, 1]:
+                adjacent_rows = (
+                    dataset[f"{v_position}-{h_positions[h_index]}-square"] == player
+                ) & (dataset[f"{v_position}-{h_positions[h_index+1]}-square"] == player)
+                dataset.loc[adjacent_rows, f"{player}_adj_horizontal"] += 1
+
+        dataset[f"{player}_adj_vertical"] = 0
+        for v_index in [0, 1]:
+            for h_position in h_positions:
+                adjacent_rows = (
+                    dataset[f"{v_positions[v_index]}-{h_position}-square"] == player
+                ) & (dataset[f"{v_positions[v_index+1]}-{h_position}-square"] == player)
+                dataset.loc[adjacent_rows, f"{player}_adj_vertical"] += 1
+
+        dataset[f"{player}_adj_diagonal_pos"] = 0
+        for v_index in [0, 1]:
+            for h_index in [0, 1]:
+                adjacent_rows = (
+                    dataset[f"{v_positions[v_index+1]}-{h_positions[h_index]}-square"]
+                    == player
+                ) & (
+                    dataset[f"{v_positions[v_index]}-{h_positions[h_index+1]}-square"]
+                    == player
+                )
+                dataset.loc[adjacent_rows, f"{player}_adj_diagonal_pos"] += 1
+
+        dataset[f"{player}_adj_diagonal_neg"] = 0
+        for v_index in [0, 1]:
+            for h_index in [0, 1]:
+                adjacent_rows = (
+                    dataset[f"{v_positions[v_index]}-{h_positions[h_index]}-square"]
+                    == player
+                ) & (
+                    dataset[f"{v_positions[v_index+1]}-{h_positions[h_index+1]}-square"]
+                    == player
+                )
+                dataset.loc[adjacent_rows, f"{player}_adj_diagonal_neg"] += 1
+
+    return dataset
+
+
+def generate_dataset(row_count, seed=0):
+    """Generates a DataFrame of random board states"""
+
+    random_generator = np.random.default_rng(seed)
+    symbols = np.array(["x", "o", "b"], dtype=object)
+    squares = symbols[random_generator.integers(0, 3, size=(row_count, 9))]
+
+    return pd.DataFrame(squares, columns=generators.get_board_state_column_names())
+
+
+def time_function(function, dataset):
+    """Returns the wall time of one call and its result"""
+
+    start_time = time.perf_counter()
+    result = function(dataset)
+
+    return time.perf_counter() - start_time, result
+
+
+def run_benchmark(sizes):
+    """Times both implementations for each dataset size and checks that their
+    outputs are identical"""
+
+    print(f"{'rows':>12} {'reference (s)':>15} {'vectorized (s)':>15} {'speedup':>9}")
+
+    for row_count in sizes:
+        dataset = generate_dataset(row_count)
+
+        reference_time, reference = time_function(
+            calculate_adjacent_symbols_reference, dataset.copy()
+        )
+        vectorized_time, vectorized = time_function(
+            data_service.calculate_adjacent_symbols, dataset.copy()
+        )
+        pd.testing.assert_frame_equal(reference, vectorized)
+
+        print(
+            f"{row_count:>12} {reference_time:>15.3f} {vectorized_time:>15.3f}"
+            f" {reference_time / vectorized_time:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    run_benchmark(parser.parse_args().sizes)
@@ -0,0 +1,124 @@
+"""
+Compares the ways of balancing the training set of each model in
+training_service.BALANCING: resampling its rows, or weighting them. Reports the
+size of the training set, the time taken to encode it and to fit a forest, the
+peak memory allocated by both, and the accuracy and balanced accuracy of the
+forest on the test set, averaged over several random seeds. The board is set
+by TTT_BOARD_SIZE and TTT_WIN_LENGTH, and sampled by TTT_DATASET_SAMPLE_RATE.
+
+Usage:
+    python -m src.benchmark.balancing_benchmark [--models 3 4 7] [--seeds 5]
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+from sklearn import ensemble, metrics
+
+from src.service import board, training_service
+
+DEFAULT_MODELS = ["3", "4", "7"]
+
+# A setting of the parameter grid of generators.get_param_grid
+FOREST_PARAMS = {
+    "n_estimators": 10,
+    "max_features": "sqrt",
+    "max_depth": 16,
+    "criterion": "gini",
+}
+
+
+def fit_forests(model_number, balancing, data_split, seeds):
+    """Encodes a model's training set and fits a forest to it for each seed.
+
+    Returns:
+        [Dictionary]: The training arrays
+        [Float]: Encoding time in seconds
+        [Float]: Median fit time in seconds
+        [Float]: Peak traced memory in MB
+        [RandomForestClassifier[]]: The forest of each seed
+    """
+
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    arrays = training_service.encode_data_set(
+        model_number, data_split=data_split, balancing=balancing
+    )
+    encode_seconds = time.perf_counter() - start_time
+
+    fit_timings = []
+    forests = []
+    for seed in range(seeds):
+        forest = ensemble.RandomForestClassifier(random_state=seed, **FOREST_PARAMS)
+        start_time = time.perf_counter()
+        forest.fit(
+            arrays["features"],
+            arrays["target"],
+            sample_weight=arrays.get("sample_weight"),
+        )
+        fit_timings.append(time.perf_counter() - start_time)
+        forests.append(forest)
+
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return (
+        arrays,
+        encode_seconds,
+        float(np.median(fit_timings)),
+        peak_bytes / 2**20,
+        forests,
+    )
+
+
+def run_benchmark(model_numbers, seeds):
+    """Measures both balancing options of each model"""
+
+    # Boards other than 3x3 are encoded from chunks of the generated dataset
+    data_split = None if board.GEOMETRY_SUFFIX else training_service.load_data_split()
+
+    print(
+        f"{'model':>5} {'balancing':>9} {'rows':>7} {'encode (s)':>11}"
+        f" {'fit (s)':>8} {'peak (MB)':>10} {'accuracy':>9} {'balanced':>9}"
+    )
+    for model_number in model_numbers:
+        test_arrays = training_service.encode_data_set(
+            model_number, test=True, data_split=data_split
+        )
+
+        for balancing in training_service.BALANCING_OPTIONS:
+            arrays, encode_seconds, fit_seconds, peak_mb, forests = fit_forests(
+                model_number, balancing, data_split, seeds
+            )
+
+            predictions = [
+                forest.predict(test_arrays["features"]) for forest in forests
+            ]
+            accuracy = np.mean(
+                [
+                    metrics.accuracy_score(test_arrays["target"], prediction)
+                    for prediction in predictions
+                ]
+            )
+            balanced_accuracy = np.mean(
+                [
+                    metrics.balanced_accuracy_score(test_arrays["target"], prediction)
+                    for prediction in predictions
+                ]
+            )
+
+            print(
+                f"{model_number:>5} {balancing:>9} {len(arrays['target']):>7}"
+                f" {encode_seconds:>11.3f} {fit_seconds:>8.3f} {peak_mb:>10.1f}"
+                f" {accuracy:>9.4f} {balanced_accuracy:>9.4f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--models", nargs="+", default=DEFAULT_MODELS)
+    parser.add_argument("--seeds", type=int, default=5)
+    arguments = parser.parse_args()
+    run_benchmark(arguments.models, arguments.seeds)
@@ -0,0 +1,123 @@
+"""
+Benchmarks the chunked data path on boards of different sizes: building the
+lookup tables, enumerating and labelling every board state, and encoding a
+sample of the generated training set. Each board runs in a separate process,
+since the board's geometry is read from the configuration when it is imported,
+and reports the peak memory of that process.
+
+Usage:
+    python -m src.benchmark.board_size_benchmark [--boards 3:3 4:3 4:4] [--sample-rate 0.01]
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+DEFAULT_BOARDS = ["3:3", "4:3", "4:4"]
+
+
+def measure_board(model_number):
+    """Runs each stage on the configured board and returns its measurements. The
+    import includes building the lookup tables of the board and its symmetries."""
+
+    start_time = time.perf_counter()
+    # pylint: disable=import-outside-toplevel
+    import numpy as np
+
+    from src.service import board, dataset_generator, symmetry, training_service
+
+    import_seconds = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    outcome_counts = np.zeros(len(dataset_generator.OUTCOMES), dtype=np.int64)
+    for _, _, _, outcome_codes in dataset_generator.iter_dataset_chunks():
+        outcome_counts += np.bincount(outcome_codes, minlength=len(outcome_counts))
+    enumerate_seconds = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    arrays = training_service.encode_generated_set(model_number)
+    encode_seconds = time.perf_counter() - start_time
+
+    return {
+        "board_states": board.BOARD_STATE_COUNT,
+        "symmetries": symmetry.SYMMETRY_COUNT,
+        "outcomes": dict(
+            zip(dataset_generator.OUTCOMES.tolist(), outcome_counts.tolist())
+        ),
+        "import_seconds": import_seconds,
+        "enumerate_seconds": enumerate_seconds,
+        "training_rows": len(arrays["target"]),
+        "features": arrays["features"].shape[1],
+        "encode_seconds": encode_seconds,
+        "peak_memory_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def run_board(board_spec, sample_rate, chunk_size, model_number):
+    """Measures a board, given as "size:win length", in a new process"""
+
+    size, win_length = board_spec.split(":")
+    environment = dict(
+        os.environ,
+        TTT_BOARD_SIZE=size,
+        TTT_WIN_LENGTH=win_length,
+        TTT_DATASET_SAMPLE_RATE=str(sample_rate),
+        TTT_CHUNK_SIZE=str(chunk_size),
+    )
+    output = subprocess.run(  # nosec B603
+        [
+            sys.executable,
+            "-m",
+            "src.benchmark.board_size_benchmark",
+            "--measure",
+            "--model",
+            model_number,
+        ],
+        env=environment,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+
+    return json.loads(output.splitlines()[-1])
+
+
+def run_benchmark(board_specs, sample_rate, chunk_size, model_number):
+    """Measures each board and prints a summary"""
+
+    print(
+        f"{'board':>8} {'states':>11} {'import (s)':>11} {'enumerate (s)':>14}"
+        f" {'states/s':>11} {'rows':>9} {'encode (s)':>11} {'peak (MB)':>10}"
+    )
+
+    for board_spec in board_specs:
+        result = run_board(board_spec, sample_rate, chunk_size, model_number)
+        size, win_length = board_spec.split(":")
+
+        print(
+            f"{size}x{size} k{win_length:<2} {result['board_states']:>10}"
+            f" {result['import_seconds']:>11.3f} {result['enumerate_seconds']:>14.3f}"
+            f" {result['board_states'] / result['enumerate_seconds']:>11.0f}"
+            f" {result['training_rows']:>9} {result['encode_seconds']:>11.3f}"
+            f" {result['peak_memory_mb']:>10.1f}"
+        )
+        print(f"{'':>8} outcomes: {result['outcomes']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--boards", nargs="+", default=DEFAULT_BOARDS)
+    parser.add_argument("--sample-rate", type=float, default=0.01)
+    parser.add_argument("--chunk-size", type=int, default=65536)
+    parser.add_argument("--model", default="7")
+    parser.add_argument("--measure", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure_board(args.model)))
+    else:
+        run_benchmark(args.boards, args.sample_rate, args.chunk_size, args.model)
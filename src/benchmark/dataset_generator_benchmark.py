@@ -0,0 +1,66 @@
+"""
+Compares reading the dataset csv file with generating the dataset, both as the
+arrays of dataset_generator and as the DataFrame used by the training pipeline,
+and checks that the generated DataFrame is identical to the csv file.
+
+Usage:
+    python -m src.benchmark.dataset_generator_benchmark [--repeats 20]
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.service import dataset_generator
+
+CSV_FILE_NAME = "ml-ttt-data.csv"
+
+
+def read_csv():
+    """Reads the dataset as the training pipeline previously did"""
+
+    with open(CSV_FILE_NAME) as csv_string:
+        return pd.read_csv(csv_string, index_col=0)
+
+
+def generate_data_frame():
+    """Generates the dataset in the layout of the csv file"""
+
+    return dataset_generator.get_data_frame(dataset_generator.generate_dataset())
+
+
+def time_function(function, repeats):
+    """Returns the median wall time of repeated calls and the result of the last"""
+
+    timings = []
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start_time)
+
+    return float(np.median(timings)), result
+
+
+def run_benchmark(repeats):
+    """Times each way of producing the dataset"""
+
+    csv_time, csv_dataset = time_function(read_csv, repeats)
+    arrays_time, _ = time_function(dataset_generator.generate_dataset, repeats)
+    data_frame_time, data_frame = time_function(generate_data_frame, repeats)
+    pd.testing.assert_frame_equal(data_frame, csv_dataset)
+
+    print(f"{'source':>22} {'time (ms)':>10} {'speedup':>8}")
+    for name, seconds in [
+        ("csv file", csv_time),
+        ("generated arrays", arrays_time),
+        ("generated DataFrame", data_frame_time),
+    ]:
+        print(f"{name:>22} {seconds * 1000:>10.2f} {csv_time / seconds:>7.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeats", type=int, default=20)
+    run_benchmark(parser.parse_args().repeats)
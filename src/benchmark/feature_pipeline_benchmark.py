@@ -0,0 +1,131 @@
+"""
+Benchmarks the fused feature pipeline (data_service.encode_features) against the
+previous one, which chained the DataFrame functions of data_service, for each
+model. Reports the wall time and the peak memory allocated by each, and checks
+that their features are identical.
+
+Usage:
+    python -m src.benchmark.feature_pipeline_benchmark [--sizes 20000 200000 ...] [--models 1 7]
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from src.service import board, data_service, dataset_generator, generators
+
+DEFAULT_SIZES = [20_000, 200_000, 1_000_000]
+DEFAULT_MODELS = ["1", "2", "3", "4", "5", "6", "7"]
+
+
+def engineer_features_reference(data_set, model_number, resample=True):
+    """The previous implementation of training_service.engineer_features"""
+
+    if model_number == "1":
+        data_set = data_service.onehot_encode(data_set)
+    elif model_number == "2":
+        data_set = data_service.ordinal_encode(data_set)
+    elif model_number == "3":
+        if resample:
+            data_set = data_service.downsample_dataset(data_set)
+        data_set = data_service.ordinal_encode(data_set)
+    elif model_number == "4":
+        if resample:
+            data_set = data_service.upsample_dataset(data_set)
+        data_set = data_service.ordinal_encode(data_set)
+    elif model_number == "5":
+        data_set = data_service.ordinal_encode(
+            data_service.calculate_move_counts(data_set)
+        )
+    elif model_number == "6":
+        data_set = data_service.calculate_adjacent_symbols(data_set).iloc[
+            :, board.SQUARE_COUNT :
+        ]
+    else:
+        if resample:
+            data_set = data_service.upsample_dataset(data_set)
+        data_set = data_service.ordinal_encode(
+            data_service.calculate_adjacent_symbols(data_set)
+        )
+
+    # As training_service.encode_data_set converted the result
+    return data_set.values.astype(np.float32), data_set.index.values.astype(str)
+
+
+def encode_features_fused(data_set, model_number, resample=True):
+    """The fused implementation, converted as training_service.encode_data_set does"""
+
+    features, target = data_service.encode_features(
+        data_set, model_number, resample=resample
+    )
+
+    return features, target.astype(str)
+
+
+def generate_dataset(row_count, seed=0):
+    """Generates a DataFrame of random board states, labelled with their winners"""
+
+    random_generator = np.random.default_rng(seed)
+    indices = random_generator.integers(0, board.BOARD_STATE_COUNT, size=row_count)
+
+    return dataset_generator.get_data_frame(
+        np.rec.fromarrays(
+            [
+                indices,
+                dataset_generator.get_outcome_codes(*board.masks_from_indices(indices)),
+            ],
+            dtype=dataset_generator.DATASET_DTYPE,
+        )
+    )
+
+
+def measure(function, dataset, model_number):
+    """Returns the wall time and peak traced memory of one call, and its result"""
+
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    result = function(dataset, model_number)
+    seconds = time.perf_counter() - start_time
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return seconds, peak_bytes / 2**20, result
+
+
+def run_benchmark(sizes, model_numbers):
+    """Times both implementations for each dataset size and model"""
+
+    print(
+        f"{'rows':>9} {'model':>5} {'reference (s)':>14} {'fused (s)':>10}"
+        f" {'speedup':>8} {'reference (MB)':>15} {'fused (MB)':>11}"
+    )
+
+    for row_count in sizes:
+        dataset = generate_dataset(row_count)
+        assert list(dataset.columns) == generators.get_board_state_column_names()
+
+        for model_number in model_numbers:
+            reference_time, reference_mb, reference = measure(
+                engineer_features_reference, dataset.copy(), model_number
+            )
+            fused_time, fused_mb, fused = measure(
+                encode_features_fused, dataset, model_number
+            )
+            np.testing.assert_array_equal(reference[0], fused[0])
+            np.testing.assert_array_equal(reference[1], fused[1])
+
+            print(
+                f"{row_count:>9} {model_number:>5} {reference_time:>14.3f}"
+                f" {fused_time:>10.3f} {reference_time / fused_time:>7.1f}x"
+                f" {reference_mb:>15.1f} {fused_mb:>11.1f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--models", nargs="+", default=DEFAULT_MODELS)
+    arguments = parser.parse_args()
+    run_benchmark(arguments.sizes, arguments.models)
@@ -0,0 +1,81 @@
+"""
+Benchmarks the latency of the compiled forest engine against the predict method
+of each saved model, and checks that their predictions are identical.
+
+Usage:
+    python -m src.benchmark.forest_engine_benchmark [--sizes 1 10 10000] [--models 1 7]
+"""
+
+import argparse
+import pickle
+import time
+import warnings
+
+import numpy as np
+
+from src.service import board, encoding_service, file_service, forest_engine
+
+DEFAULT_SIZES = [1, 10, 10_000]
+DEFAULT_MODELS = ["1", "2", "3", "4", "5", "6", "7"]
+
+
+def generate_user_inputs(row_count, model_number, seed=0):
+    """Encodes random board states for a model"""
+
+    random_generator = np.random.default_rng(seed)
+    indices = random_generator.integers(0, board.BOARD_STATE_COUNT, size=row_count)
+    x_masks, o_masks = board.masks_from_indices(indices)
+
+    return encoding_service.encode_masks(x_masks, o_masks, model_number)
+
+
+def time_function(function, user_inputs, min_seconds=0.2):
+    """Returns the median wall time of repeated calls and the result of the last"""
+
+    timings = []
+    while sum(timings) < min_seconds or len(timings) < 3:
+        start_time = time.perf_counter()
+        result = function(user_inputs)
+        timings.append(time.perf_counter() - start_time)
+
+    return float(np.median(timings)), result
+
+
+def run_benchmark(sizes, model_numbers):
+    """Times both predictors for each model and batch size"""
+
+    print(
+        f"{'model':>5} {'rows':>7} {'sklearn (ms)':>13} {'engine (ms)':>12}"
+        f" {'speedup':>8} {'compile (ms)':>13}"
+    )
+
+    for model_number in model_numbers:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")  # Pickles saved by another sklearn
+            with open(file_service.get_pickle_file_name(model_number), "rb") as file:
+                model = pickle.load(file)
+
+        start_time = time.perf_counter()
+        engine = forest_engine.compile_forest(model)
+        compile_time = time.perf_counter() - start_time
+
+        for row_count in sizes:
+            user_inputs = generate_user_inputs(row_count, model_number)
+
+            sklearn_time, expected = time_function(model.predict, user_inputs)
+            engine_time, predictions = time_function(engine.predict, user_inputs)
+            np.testing.assert_array_equal(predictions, expected)
+
+            print(
+                f"{model_number:>5} {row_count:>7} {sklearn_time * 1000:>13.3f}"
+                f" {engine_time * 1000:>12.3f} {sklearn_time / engine_time:>7.1f}x"
+                f" {compile_time * 1000:>13.1f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--models", nargs="+", default=DEFAULT_MODELS)
+    arguments = parser.parse_args()
+    run_benchmark(arguments.sizes, arguments.models)
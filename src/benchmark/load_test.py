@@ -0,0 +1,519 @@
+"""
+Load tests the prediction endpoints, either in-process through the Flask test
+client or over HTTP against a server, and reports the throughput and latency
+percentiles of each route and model.
+
+The requests are either replayed from a JSONL request log, with one request per
+line of the form {"method": "GET", "path": "/get-prediction/xobboxobx/1"} (POST
+requests may also give a "json" body), or generated as a random mix of single
+and batch predictions for the chosen models. A generated workload can be saved
+as a request log, so that the same requests are replayed by later runs.
+
+Results are written as JSON with --output. Passing the results of a previous run
+with --compare reports the routes and models whose throughput or latency have
+regressed by more than --tolerance, and exits with status 1 if any have.
+
+Usage:
+    python -m src.benchmark.load_test [--requests 2000] [--models 1 7]
+        [--batch-fraction 0.1] [--batch-size 100] [--log requests.jsonl]
+        [--save-log workload.jsonl] [--target in-process|server|URL]
+        [--workers 1] [--threads 1] [--concurrency 1] [--warmup 100]
+        [--output results.json] [--compare baseline.json] [--tolerance 0.25]
+"""
+
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+
+import numpy as np
+
+from src.service import board
+from src.service.api import app
+
+DEFAULT_MODELS = ["1", "2", "3", "4", "5", "6", "7"]
+DEFAULT_PORT = 8099
+
+# Latency statistics compared between runs, and whether higher is better
+COMPARED_METRICS = {
+    "throughput": True,
+    "p50_ms": False,
+    "p95_ms": False,
+    "p99_ms": False,
+}
+
+
+def generate_workload(request_count, model_numbers, batch_fraction, batch_size, seed=0):
+    """Generates a random mix of single and batch prediction requests.
+
+    Args:
+        request_count [Integer]: Number of requests
+        model_numbers [String[]]: Models which are requested uniformly
+        batch_fraction [Float]: Fraction of the requests which are batch predictions
+        batch_size [Integer]: Number of board states in each batch prediction
+        seed [Integer]: Seed of the random number generator
+
+    Returns:
+        [Dictionary[]]: Requests, see read_request_log
+    """
+
+    random_generator = np.random.default_rng(seed)
+
+    def random_board_states(count):
+        indices = random_generator.integers(0, board.BOARD_STATE_COUNT, size=count)
+        return [str(board.Board.from_index(int(index))) for index in indices]
+
+    workload = []
+    for _ in range(request_count):
+        model_number = str(random_generator.choice(model_numbers))
+        if random_generator.random() < batch_fraction:
+            workload.append(
+                {
+                    "method": "POST",
+                    "path": "/get-predictions",
+                    "json": {
+                        "model_number": model_number,
+                        "board_states": random_board_states(batch_size),
+                    },
+                }
+            )
+        else:
+            board_state = random_board_states(1)[0]
+            workload.append(
+                {
+                    "method": "GET",
+                    "path": f"/get-prediction/{board_state}/{model_number}",
+                }
+            )
+
+    return workload
+
+
+def read_request_log(file_name):
+    """Reads the requests of a JSONL request log.
+
+    Args:
+        file_name [String]: File to read
+
+    Returns:
+        [Dictionary[]]: Requests, see read_request_log
+    """
+
+    workload = []
+    with open(file_name) as file:
+        for line_number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+
+            request = json.loads(line)
+            if not isinstance(request, dict) or not isinstance(
+                request.get("path"), str
+            ):
+                raise ValueError(f"Line {line_number} of {file_name} is not a request")
+
+            request.setdefault("method", "POST" if "json" in request else "GET")
+            workload.append(request)
+
+    return workload
+
+
+def write_request_log(workload, file_name):
+    """Writes requests as a JSONL request log"""
+
+    with open(file_name, "w") as file:
+        for request in workload:
+            file.write(json.dumps(request) + "\n")
+
+
+def get_route(path):
+    """Returns the route of a request path, without its parameters"""
+
+    return "/" + path.lstrip("/").split("/")[0].split("?")[0]
+
+
+def get_model_number(request):
+    """Returns the model requested, or None if the request is not for a model"""
+
+    if "json" in request:
+        return str(request["json"].get("model_number"))
+
+    parts = request["path"].split("?")[0].strip("/").split("/")
+    if parts[0] == "get-prediction" and len(parts) == 3:
+        return parts[2]
+
+    return None
+
+
+class InProcessClient:
+    """Sends requests to the Flask app through its test client"""
+
+    def __init__(self):
+        self._client = app.test_client()
+
+    def send(self, request):
+        """Sends a request, returning its HTTP status and response body"""
+
+        response = self._client.open(
+            request["path"], method=request["method"], json=request.get("json")
+        )
+
+        return response.status_code, response.get_data()
+
+    def close(self):
+        """Releases the client"""
+
+
+class HttpClient:
+    """Sends requests to a server over a persistent HTTP connection"""
+
+    def __init__(self, url):
+        parsed_url = urllib.parse.urlsplit(url)
+        self._connection = http.client.HTTPConnection(
+            parsed_url.hostname, parsed_url.port or 80, timeout=30
+        )
+
+    def send(self, request):
+        """Sends a request, returning its HTTP status and response body"""
+
+        body = None
+        headers = {}
+        if "json" in request:
+            body = json.dumps(request["json"])
+            headers["Content-Type"] = "application/json"
+
+        self._connection.request(request["method"], request["path"], body, headers)
+        response = self._connection.getresponse()
+
+        return response.status, response.read()
+
+    def close(self):
+        """Closes the connection"""
+
+        self._connection.close()
+
+
+def is_error(http_status, body):
+    """Returns True if a response reports an error, in its HTTP status or in the
+    status field of its JSON body"""
+
+    if http_status >= 400:
+        return True
+
+    try:
+        return json.loads(body).get("status", 200) >= 400
+    except (ValueError, AttributeError, TypeError):
+        return True
+
+
+def run_workload(workload, create_client, concurrency=1):
+    """Sends every request of a workload, split between concurrent clients.
+
+    Args:
+        workload [Dictionary[]]: Requests to send
+        create_client [Function]: Returns a new client
+        concurrency [Integer]: Number of clients sending requests at the same time
+
+    Returns:
+        [Dictionary]: Latency in seconds and error flag of each request, in the
+                      order of the workload, and the total wall time in seconds
+    """
+
+    latencies = np.zeros(len(workload))
+    errors = np.zeros(len(workload), dtype=bool)
+    next_request = iter(range(len(workload)))
+    next_request_lock = threading.Lock()
+
+    def send_requests():
+        client = create_client()
+        try:
+            while True:
+                with next_request_lock:
+                    index = next(next_request, None)
+                if index is None:
+                    return
+
+                start_time = time.perf_counter()
+                try:
+                    http_status, body = client.send(workload[index])
+                except (OSError, http.client.HTTPException):
+                    http_status, body = 599, b""
+                    client.close()
+                    client = create_client()
+                latencies[index] = time.perf_counter() - start_time
+                errors[index] = is_error(http_status, body)
+        finally:
+            client.close()
+
+    threads = [threading.Thread(target=send_requests) for _ in range(concurrency)]
+    start_time = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall_seconds = time.perf_counter() - start_time
+
+    return {"latencies": latencies, "errors": errors, "wall_seconds": wall_seconds}
+
+
+def summarise(latencies, errors, wall_seconds):
+    """Calculates the throughput and latency percentiles of a group of requests.
+
+    Args:
+        latencies [ndarray]: Latency of each request in seconds
+        errors [ndarray]: True for each request which failed
+        wall_seconds [Float]: Wall time of the run in seconds. The throughput of a
+                              group is its share of the run's requests per second.
+
+    Returns:
+        [Dictionary]: Statistics of the requests
+    """
+
+    latencies_ms = latencies * 1000
+    p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99])
+
+    return {
+        "requests": int(len(latencies)),
+        "errors": int(errors.sum()),
+        "throughput": len(latencies) / wall_seconds,
+        "mean_ms": float(latencies_ms.mean()),
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "max_ms": float(latencies_ms.max()),
+    }
+
+
+def summarise_run(workload, run):
+    """Summarises a run overall, and for each route and model"""
+
+    latencies = run["latencies"]
+    errors = run["errors"]
+    wall_seconds = run["wall_seconds"]
+
+    groups = {"routes": {}, "models": {}}
+    for index, request in enumerate(workload):
+        groups["routes"].setdefault(get_route(request["path"]), []).append(index)
+        model_number = get_model_number(request)
+        if model_number is not None:
+            groups["models"].setdefault(model_number, []).append(index)
+
+    summary = {"overall": summarise(latencies, errors, wall_seconds)}
+    for group_name, group in groups.items():
+        summary[group_name] = {
+            key: summarise(latencies[indices], errors[indices], wall_seconds)
+            for key, indices in sorted(group.items())
+        }
+
+    return summary
+
+
+def start_server(port, workers, threads, timeout=120):
+    """Starts run.py in a subprocess, and waits until it reports that it is ready.
+
+    Returns:
+        [Popen]: The server process
+    """
+
+    environment = dict(
+        os.environ,
+        TTT_HOST="127.0.0.1",
+        TTT_PORT=str(port),
+        TTT_WORKERS=str(workers),
+        TTT_THREADS=str(threads),
+    )
+    process = subprocess.Popen(  # nosec B603 - runs this repository's server
+        [sys.executable, "run.py"], env=environment
+    )
+
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("The server exited before it was ready")
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            connection.request("GET", "/ready")
+            if connection.getresponse().status == 200:
+                return process
+        except OSError:
+            pass
+        time.sleep(0.2)
+
+    stop_server(process)
+    raise RuntimeError("The server was not ready before the timeout")
+
+
+def stop_server(process):
+    """Stops a server started by start_server"""
+
+    process.terminate()
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def compare_results(baseline, results, tolerance):
+    """Finds the statistics which have regressed since a previous run.
+
+    Args:
+        baseline [Dictionary]: Results of the previous run
+        results [Dictionary]: Results of this run
+        tolerance [Float]: Relative change which is not reported, e.g. 0.2 for 20%
+
+    Returns:
+        [String[]]: Description of each regression
+    """
+
+    pairs = [("overall", baseline["overall"], results["overall"])]
+    for group_name in ["routes", "models"]:
+        for key, statistics in results[group_name].items():
+            if key in baseline[group_name]:
+                pairs.append(
+                    (f"{group_name} {key}", baseline[group_name][key], statistics)
+                )
+
+    regressions = []
+    for name, previous, current in pairs:
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            change = (current[metric] - previous[metric]) / previous[metric]
+            if (-change if higher_is_better else change) > tolerance:
+                regressions.append(
+                    f"{name} {metric}: {previous[metric]:.3f} -> {current[metric]:.3f}"
+                    f" ({change:+.0%})"
+                )
+
+    return regressions
+
+
+def print_summary(summary):
+    """Prints the statistics of a run as a table"""
+
+    print(
+        f"{'group':<22} {'requests':>8} {'errors':>6} {'req/s':>9}"
+        f" {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9}"
+    )
+
+    rows = [("overall", summary["overall"])]
+    for group_name in ["routes", "models"]:
+        rows += [
+            (f"{group_name[:-1]} {key}", statistics)
+            for key, statistics in summary[group_name].items()
+        ]
+
+    for name, statistics in rows:
+        print(
+            f"{name:<22} {statistics['requests']:>8} {statistics['errors']:>6}"
+            f" {statistics['throughput']:>9.1f} {statistics['p50_ms']:>9.3f}"
+            f" {statistics['p95_ms']:>9.3f} {statistics['p99_ms']:>9.3f}"
+        )
+
+
+def run_load_test(arguments):
+    """Runs the load test described by the command line arguments, returning
+    its results"""
+
+    if arguments.log:
+        workload = read_request_log(arguments.log)
+    else:
+        workload = generate_workload(
+            arguments.requests,
+            arguments.models,
+            arguments.batch_fraction,
+            arguments.batch_size,
+            arguments.seed,
+        )
+    if arguments.save_log:
+        write_request_log(workload, arguments.save_log)
+
+    server_process = None
+    if arguments.target == "in-process":
+        create_client = InProcessClient
+    else:
+        url = arguments.target
+        if arguments.target == "server":
+            url = f"http://127.0.0.1:{arguments.port}"
+            server_process = start_server(
+                arguments.port, arguments.workers, arguments.threads
+            )
+
+        def create_client():
+            return HttpClient(url)
+
+    try:
+        # Warm-up requests are not measured
+        run_workload(workload[: arguments.warmup], create_client, arguments.concurrency)
+        run = run_workload(workload, create_client, arguments.concurrency)
+    finally:
+        if server_process is not None:
+            stop_server(server_process)
+
+    return {
+        "created_at": time.time(),
+        "configuration": {
+            "target": arguments.target,
+            "log": arguments.log,
+            "requests": len(workload),
+            "models": arguments.models,
+            "batch_fraction": arguments.batch_fraction,
+            "batch_size": arguments.batch_size,
+            "seed": arguments.seed,
+            "workers": arguments.workers,
+            "threads": arguments.threads,
+            "concurrency": arguments.concurrency,
+        },
+        "wall_seconds": run["wall_seconds"],
+        **summarise_run(workload, run),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--models", nargs="+", default=DEFAULT_MODELS)
+    parser.add_argument("--batch-fraction", type=float, default=0.1)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--log", help="JSONL request log to replay")
+    parser.add_argument("--save-log", help="Write the workload as a request log")
+    parser.add_argument(
+        "--target",
+        default="in-process",
+        help="in-process, server (starts run.py) or the URL of a running server",
+    )
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--output", help="Write the results to a JSON file")
+    parser.add_argument("--compare", help="Results of a previous run to compare")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parsed_arguments = parser.parse_args()
+
+    load_test_results = run_load_test(parsed_arguments)
+    print_summary(load_test_results)
+
+    if parsed_arguments.output:
+        os.makedirs(os.path.dirname(parsed_arguments.output) or ".", exist_ok=True)
+        with open(parsed_arguments.output, "w") as output_file:
+            json.dump(load_test_results, output_file, indent=2)
+
+    if parsed_arguments.compare:
+        with open(parsed_arguments.compare) as baseline_file:
+            found_regressions = compare_results(
+                json.load(baseline_file),
+                load_test_results,
+                parsed_arguments.tolerance,
+            )
+        for regression in found_regressions:
+            print(f"[REGRESSION] {regression}")
+        if found_regressions:
+            sys.exit(1)
+        print("[INFO] No regressions beyond the tolerance")
@@ -0,0 +1,85 @@
+"""
+Compares the size and load time of the pickled models against their model
+artifacts, and checks that both give identical predictions for every board state.
+
+Usage:
+    python -m src.benchmark.model_artifact_benchmark [--models 1 7]
+"""
+
+import argparse
+import os
+import pickle
+import time
+import warnings
+
+import numpy as np
+
+from src.service import board, encoding_service, file_service, model_artifact
+
+DEFAULT_MODELS = ["1", "2", "3", "4", "5", "6", "7"]
+
+
+def load_pickle(model_number):
+    """Loads the pickled model"""
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")  # Pickles saved by another sklearn
+        with open(file_service.get_pickle_file_name(model_number), "rb") as file:
+            return pickle.load(file)
+
+
+def load_artifact(model_number):
+    """Loads the model artifact"""
+
+    return model_artifact.load_model(
+        file_service.get_artifact_file_name(model_number), model_number
+    )
+
+
+def time_function(function, model_number, repeats=20):
+    """Returns the median wall time of repeated calls and the result of the last"""
+
+    timings = []
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        result = function(model_number)
+        timings.append(time.perf_counter() - start_time)
+
+    return float(np.median(timings)), result
+
+
+def run_benchmark(model_numbers):
+    """Times loading each model in both formats"""
+
+    print(
+        f"{'model':>5} {'pickle (KB)':>12} {'artifact (KB)':>14}"
+        f" {'pickle load (ms)':>17} {'artifact load (ms)':>19} {'speedup':>8}"
+    )
+
+    x_masks, o_masks = board.masks_from_indices(np.arange(board.BOARD_STATE_COUNT))
+
+    for model_number in model_numbers:
+        pickle_size = os.path.getsize(file_service.get_pickle_file_name(model_number))
+        artifact_size = os.path.getsize(
+            file_service.get_artifact_file_name(model_number)
+        )
+
+        pickle_time, model = time_function(load_pickle, model_number)
+        artifact_time, artifact = time_function(load_artifact, model_number)
+
+        user_inputs = encoding_service.encode_masks(x_masks, o_masks, model_number)
+        np.testing.assert_array_equal(
+            artifact.predict(user_inputs), model.predict(user_inputs)
+        )
+
+        print(
+            f"{model_number:>5} {pickle_size / 1024:>12.0f} {artifact_size / 1024:>14.0f}"
+            f" {pickle_time * 1000:>17.2f} {artifact_time * 1000:>19.2f}"
+            f" {pickle_time / artifact_time:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--models", nargs="+", default=DEFAULT_MODELS)
+    run_benchmark(parser.parse_args().models)
@@ -0,0 +1,89 @@
+"""
+Measures the prediction endpoint through the Flask test client with the response
+cache disabled, with every response cached, and with clients revalidating their
+copies with If-None-Match (304 Not Modified). Each request is for a board state
+drawn at random from a fixed set, so that requests repeat as they do for popular
+positions.
+
+Usage:
+    python -m src.benchmark.response_cache_benchmark [--requests 5000] [--boards 500] [--model 1]
+"""
+
+import argparse
+import time
+from unittest import mock
+
+import numpy as np
+
+from src.service import board, response_cache
+from src.service.api import app
+
+
+def get_paths(request_count, board_count, model_number):
+    """Generates the paths of the requests"""
+
+    random_generator = np.random.default_rng(0)
+    boards = [
+        str(board.Board.from_index(int(index)))
+        for index in random_generator.integers(
+            0, board.BOARD_STATE_COUNT, size=board_count
+        )
+    ]
+
+    return [
+        f"/get-prediction/{boards[board_number]}/{model_number}"
+        for board_number in random_generator.integers(0, board_count, request_count)
+    ]
+
+
+def time_requests(client, paths, etags=None):
+    """Sends each request, revalidating with the given ETag of its path if there
+    is one. Returns the median latency in microseconds, the requests per second,
+    and the ETag returned for each path."""
+
+    etags = etags or {}
+    response_etags = {}
+    latencies = []
+    start_time = time.perf_counter()
+    for path in paths:
+        headers = {"If-None-Match": etags[path]} if path in etags else {}
+        request_start_time = time.perf_counter()
+        response = client.get(path, headers=headers)
+        latencies.append(time.perf_counter() - request_start_time)
+        response_etags[path] = response.headers.get("ETag")
+
+    seconds = time.perf_counter() - start_time
+
+    return np.median(latencies) * 1e6, len(paths) / seconds, response_etags
+
+
+def run_benchmark(request_count, board_count, model_number):
+    """Times the same requests with each caching setting"""
+
+    client = app.test_client()
+    paths = get_paths(request_count, board_count, model_number)
+    client.get(paths[0])
+
+    print(f"{'setting':>24} {'median (us)':>12} {'requests/s':>11}")
+    response_cache.clear()
+    with mock.patch.object(response_cache.cache, "max_entries", 0):
+        median, throughput, _ = time_requests(client, paths)
+    print(f"{'cache disabled':>24} {median:>12.1f} {throughput:>11.0f}")
+
+    response_cache.clear()
+    time_requests(client, paths)
+    median, throughput, etags = time_requests(client, paths)
+    print(f"{'cached':>24} {median:>12.1f} {throughput:>11.0f}")
+
+    median, throughput, _ = time_requests(client, paths, etags)
+    print(f"{'If-None-Match (304)':>24} {median:>12.1f} {throughput:>11.0f}")
+    print(f"{'':>24} {response_cache.get_stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--boards", type=int, default=500)
+    parser.add_argument("--model", default="1")
+    arguments = parser.parse_args()
+    run_benchmark(arguments.requests, arguments.boards, arguments.model)
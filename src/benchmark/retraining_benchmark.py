@@ -0,0 +1,106 @@
+"""
+Compares incremental retraining (see training_service.retrain_model) with full
+retraining when the dataset grows. A model is first trained on part of the
+training set, and the rest of the training set is then added as new rows, either
+by growing or refreshing the model's forest, or by training a new model from
+scratch with the grid search of training_service.fit_model. Reports the time
+taken by each and the accuracy of the resulting model on the test set, averaged
+over several repeats.
+
+Usage:
+    python -m src.benchmark.retraining_benchmark [--models 2 7] [--old-fraction 0.5]
+"""
+
+import argparse
+import time
+from unittest import mock
+
+import numpy as np
+
+from src.service import training_service
+
+DEFAULT_MODELS = ["2", "7"]
+
+
+def get_accuracy(model, test_arrays):
+    """Scores a model on the test set"""
+
+    return model.score(test_arrays["features"], test_arrays["target"])
+
+
+def run_repeat(model_number, old_set, training_set, test_set, test_arrays):
+    """Trains a model on the old rows, then retrains it in each way on all rows.
+
+    Returns:
+        [Dictionary]: Method => (seconds, test accuracy)
+    """
+
+    old_arrays = training_service.encode_data_set(
+        model_number, data_split=(old_set, test_set)
+    )
+    model = training_service.fit_model(old_arrays["features"], old_arrays["target"])
+    results = {"old model": (0.0, get_accuracy(model, test_arrays))}
+
+    start_time = time.perf_counter()
+    arrays = training_service.encode_data_set(
+        model_number, data_split=(training_set, test_set)
+    )
+    full_model = training_service.fit_model(arrays["features"], arrays["target"])
+    results["full retraining"] = (
+        time.perf_counter() - start_time,
+        get_accuracy(full_model, test_arrays),
+    )
+
+    # The old rows stand in for the model's stored training set
+    data_delta = training_set.iloc[len(old_set) :]
+    with mock.patch(
+        "src.service.training_service.import_data_as_pandas",
+        return_value=(old_arrays["features"], old_arrays["target"]),
+    ):
+        for mode in training_service.RETRAINING_MODES:
+            start_time = time.perf_counter()
+            retrained_model, report = training_service.retrain_model(
+                model, model_number, data_delta, mode=mode
+            )
+            results[f"{mode} ({report['trees_fitted']} trees)"] = (
+                time.perf_counter() - start_time,
+                get_accuracy(retrained_model, test_arrays),
+            )
+
+    return results
+
+
+def run_benchmark(model_numbers, old_fraction, repeats):
+    """Measures each way of retraining each model"""
+
+    training_set, test_set = training_service.load_data_split()
+    old_set = training_set.iloc[: int(len(training_set) * old_fraction)]
+    print(
+        f"{len(old_set)} old rows, {len(training_set) - len(old_set)} new rows,"
+        f" {repeats} repeats"
+    )
+
+    print(f"{'model':>5} {'method':>22} {'time (s)':>9} {'accuracy':>9}")
+    for model_number in model_numbers:
+        test_arrays = training_service.encode_data_set(
+            model_number, test=True, data_split=(training_set, test_set)
+        )
+
+        repeat_results = [
+            run_repeat(model_number, old_set, training_set, test_set, test_arrays)
+            for _ in range(repeats)
+        ]
+        for method in repeat_results[0]:
+            seconds, accuracy = np.mean(
+                [results[method] for results in repeat_results], axis=0
+            )
+            print(f"{model_number:>5} {method:>22} {seconds:>9.3f} {accuracy:>9.4f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--models", nargs="+", default=DEFAULT_MODELS)
+    parser.add_argument("--old-fraction", type=float, default=0.5)
+    parser.add_argument("--repeats", type=int, default=5)
+    arguments = parser.parse_args()
+    run_benchmark(arguments.models, arguments.old_fraction, arguments.repeats)
@@ -0,0 +1,147 @@
+"""
+Compares the exhaustive grid search of training_service.fit_model with successive
+halving searches (see search_service) on a model's training set. A wider grid
+than generators.get_param_grid is used, as the default grid only has four
+candidates. Reports the wall time, the number of forests fitted for cross
+validation, the chosen parameters, their cross validation score and the accuracy
+of the refitted model on the test set.
+
+The halving search is run with a cold cache, then repeated with the cache filled,
+then widened with more candidates, and finally with a time budget. The cache is
+written to a temporary directory.
+
+Usage:
+    python -m src.benchmark.search_benchmark [--model 2] [--budget 5]
+"""
+
+import argparse
+import contextlib
+import os
+import tempfile
+import time
+from unittest import mock
+
+from sklearn import model_selection
+
+from src.service import search_service, training_service
+
+PARAM_GRID = {
+    "n_estimators": [10, 30, 90],
+    "max_features": ["sqrt", "log2", None],
+    "max_depth": [8, 16, 32],
+    "criterion": ["gini", "entropy"],
+}
+
+WIDENED_PARAM_GRID = dict(PARAM_GRID, max_depth=[4, 8, 16, 32, 64])
+
+
+@contextlib.contextmanager
+def temporary_cache():
+    """Runs in a temporary working directory, in which the search cache is written"""
+
+    working_directory = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            yield
+        finally:
+            os.chdir(working_directory)
+
+
+def run_search(name, arrays, test_arrays, param_grid, **settings):
+    """Fits a model with the given search settings of the config module, and
+    prints its results"""
+
+    fold_fits = 0
+    score_candidate = search_service.score_candidate
+
+    def count_fits(*args, **kwargs):
+        nonlocal fold_fits
+        fold_fits += search_service.SPLITS
+        return score_candidate(*args, **kwargs)
+
+    with mock.patch(
+        "src.service.training_service.generators.get_param_grid",
+        return_value=param_grid,
+    ), mock.patch.multiple(
+        "src.service.training_service.config", **settings
+    ), mock.patch(
+        "src.service.search_service.score_candidate", side_effect=count_fits
+    ):
+        start_time = time.perf_counter()
+        model = training_service.fit_model(
+            arrays["features"], arrays["target"], cache=("benchmark", "features")
+        )
+        seconds = time.perf_counter() - start_time
+
+    if settings["SEARCH"] == "grid":
+        fold_fits = len(model.cv_results_["params"]) * search_service.SPLITS
+
+    accuracy = model.score(test_arrays["features"], test_arrays["target"])
+    print(
+        f"{name:>30} {seconds:>9.2f} {fold_fits:>6} {model.best_score_:>9.4f}"
+        f" {accuracy:>9.4f}  {model.best_params_}"
+    )
+
+
+def run_benchmark(model_number, budget):
+    """Runs each search on the training set of a model"""
+
+    data_split = training_service.load_data_split()
+    arrays = training_service.encode_data_set(model_number, data_split=data_split)
+    test_arrays = training_service.encode_data_set(
+        model_number, test=True, data_split=data_split
+    )
+    candidates = len(model_selection.ParameterGrid(PARAM_GRID))
+    widened_candidates = len(model_selection.ParameterGrid(WIDENED_PARAM_GRID))
+    print(f"model {model_number}: {len(arrays['target'])} rows")
+
+    print(
+        f"{'search':>30} {'time (s)':>9} {'fits':>6} {'cv score':>9}"
+        f" {'accuracy':>9}  best params"
+    )
+    run_search(f"grid ({candidates})", arrays, test_arrays, PARAM_GRID, SEARCH="grid")
+
+    for resource in search_service.RESOURCES:
+        settings = {
+            "SEARCH": "halving",
+            "SEARCH_RESOURCE": resource,
+            "SEARCH_TIME_BUDGET": 0.0,
+        }
+        with temporary_cache():
+            run_search(
+                f"halving {resource} cold", arrays, test_arrays, PARAM_GRID, **settings
+            )
+            run_search(
+                f"halving {resource} cached",
+                arrays,
+                test_arrays,
+                PARAM_GRID,
+                **settings,
+            )
+            run_search(
+                f"halving {resource} wider ({widened_candidates})",
+                arrays,
+                test_arrays,
+                WIDENED_PARAM_GRID,
+                **settings,
+            )
+
+    with temporary_cache():
+        run_search(
+            f"halving n_samples {budget:g}s budget",
+            arrays,
+            test_arrays,
+            PARAM_GRID,
+            SEARCH="halving",
+            SEARCH_RESOURCE="n_samples",
+            SEARCH_TIME_BUDGET=budget,
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default="2")
+    parser.add_argument("--budget", type=float, default=5.0)
+    arguments = parser.parse_args()
+    run_benchmark(arguments.model, arguments.budget)
@@ -0,0 +1,246 @@
+"""
+The answer tables module precomputes a model's prediction for every possible board
+state, so that a prediction can be answered with a single array lookup.
+
+A table holds one outcome code per board state, indexed by the board's base-3
+index (see the board module).
+
+Canonical tables (enabled with TTT_CANONICAL_ANSWER_TABLES=1) instead hold one
+outcome code per set of symmetric board states, keyed by the canonical board
+state, which makes them about 7 times smaller. Every board state is then answered
+with the model's prediction for its canonical form. The models are not trained
+to be symmetric, so this changes the answer for some board states.
+"""
+
+import glob
+import os
+import threading
+from typing import Dict, Tuple
+
+import numpy as np
+
+from src.service import board, config, encoding_service, file_service, symmetry
+
+OUTCOMES = ["x", "o", "nobody", "everyone"]  # Outcome codes 0, 1, 2, 3
+
+# (model_number, version) => memory-mapped table
+_tables: Dict[Tuple[str, str], np.ndarray] = {}
+_tables_lock = threading.Lock()
+
+
+def build_table(model, model_number, canonical=False):
+    """Evaluates a model over every possible board state.
+
+    Args:
+        model: SKLearn model
+        model_number [String]: Integer value corresponding to a ML model
+        canonical [Boolean]: Set as True to only evaluate canonical board states
+
+    Returns:
+        [ndarray]: Outcome code for each board state
+    """
+
+    if canonical:
+        indices = symmetry.CANONICAL_BOARD_STATES
+        table = np.empty(len(indices), dtype=np.uint8)
+    else:
+        indices = None
+        table = np.empty(board.BOARD_STATE_COUNT, dtype=np.uint8)
+
+    # Evaluate the board states in chunks, so that the features of a 4x4 board's
+    # 43 million board states are never held at once
+    for start, stop in board.get_chunks(len(table)):
+        if indices is None:
+            chunk_indices = np.arange(start, stop)
+        else:
+            chunk_indices = indices[start:stop]
+
+        x_masks, o_masks = board.masks_from_indices(chunk_indices)
+        user_inputs = encoding_service.encode_masks(x_masks, o_masks, str(model_number))
+        predictions = model.predict(user_inputs)
+
+        if not set(predictions) <= set(OUTCOMES):
+            raise ValueError("Model produced an unexpected outcome")
+
+        for code, outcome in enumerate(OUTCOMES):
+            table[start:stop][predictions == outcome] = code
+
+    return table
+
+
+def compile_table(model, model_number):
+    """Builds the answer table for the current version of a model and saves it
+    to a file. Tables belonging to previous versions of the model are removed.
+
+    Args:
+        model: SKLearn model
+        model_number [String]: Integer value corresponding to a ML model
+
+    Returns:
+        [String]: File name of the table
+    """
+
+    model_number = str(model_number)
+    version = get_table_version(model_number)
+    file_name = file_service.get_table_file_name(model_number, version)
+    table = build_table(
+        model, model_number, canonical=bool(config.CANONICAL_ANSWER_TABLES)
+    )
+
+    os.makedirs(os.path.dirname(file_name), exist_ok=True)
+    # Each process writes its own temporary file, since the supervisor's warm-up
+    # and a worker may compile the same table at the same time
+    temp_file_name = f"{file_name}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_file_name, "wb") as file:
+        np.save(file, table)
+    try:
+        os.replace(temp_file_name, file_name)
+    except OSError:
+        # Lost the race to another process, whose table is just as valid
+        if not os.path.exists(file_name):
+            raise
+        try:
+            os.remove(temp_file_name)
+        except FileNotFoundError:
+            pass
+
+    remove_stale_tables(model_number, version)
+
+    return file_name
+
+
+def get_table_version(model_number):
+    """Generates the version identifier of the answer table for the current
+    version of a model.
+
+    Args:
+        model_number [String]: Integer value corresponding to a ML model
+
+    Returns:
+        [String]: Version identifier of the table
+    """
+
+    version = file_service.get_model_version(model_number)
+    if config.CANONICAL_ANSWER_TABLES:
+        version = f"{version}-canonical"
+
+    return version
+
+
+def remove_stale_tables(model_number, version):
+    """Deletes the tables of a model which do not belong to the given version.
+
+    Args:
+        model_number [String]: Integer value corresponding to a ML model
+        version [String]: Version of the table to keep"""
+
+    current_file_name = file_service.get_table_file_name(model_number, version)
+    pattern = file_service.get_table_file_name(model_number, "*")
+
+    for file_name in glob.glob(pattern):
+        if file_name != current_file_name:
+            try:
+                os.remove(file_name)
+            except FileNotFoundError:
+                # Already removed by another process
+                pass
+
+    with _tables_lock:
+        for key in [key for key in _tables if key[0] == model_number]:
+            if key[1] != version:
+                del _tables[key]
+
+
+def get_table(model_number):
+    """Returns the memory-mapped answer table for the current version of a model.
+
+    Args:
+        model_number [String]: Integer value corresponding to a ML model
+
+    Returns:
+        [ndarray]: Outcome code for each board state, or None if the table has
+                   not been compiled
+    """
+
+    model_number = str(model_number)
+    key = (model_number, get_table_version(model_number))
+
+    with _tables_lock:
+        if key in _tables:
+            return _tables[key]
+
+    file_name = file_service.get_table_file_name(*key)
+    if not os.path.exists(file_name):
+        return None
+
+    table = np.load(file_name, mmap_mode="r")
+    if (
+        len(table) != board.BOARD_STATE_COUNT
+        and len(table) != symmetry.CANONICAL_BOARD_STATE_COUNT
+    ):
+        return None
+
+    with _tables_lock:
+        _tables[key] = table
+
+    return table
+
+
+def get_table_count():
+    """Returns the number of answer tables mapped into memory"""
+
+    with _tables_lock:
+        return len(_tables)
+
+
+def lookup(table, board_state):
+    """Returns the outcome stored in a table for a board state.
+
+    Args:
+        table [ndarray]: Answer table of a model
+        board_state [Board]: Validated board state
+
+    Returns:
+        [String]: Predicted outcome
+    """
+
+    if len(table) != board.BOARD_STATE_COUNT:
+        return OUTCOMES[table[symmetry.ORBIT_NUMBERS[board_state.index]]]
+
+    return OUTCOMES[table[board_state.index]]
+
+
+def lookup_many(table, board_states):
+    """Returns the outcomes stored in a table for a batch of board states.
+
+    Args:
+        table [ndarray]: Answer table of a model
+        board_states [Board[]]: List of validated board states
+
+    Returns:
+        [String[]]: Predicted outcome for each board state, in input order
+    """
+
+    indices = np.fromiter(
+        (board_state.index for board_state in board_states),
+        dtype=np.intp,
+        count=len(board_states),
+    )
+    if len(table) != board.BOARD_STATE_COUNT:
+        indices = symmetry.ORBIT_NUMBERS[indices]
+
+    return [OUTCOMES[code] for code in table[indices]]
+
+
+def compile_all_tables():
+    """Compiles the answer tables of every model which has been saved to a file"""
+
+    for model_number in ["1", "2", "3", "4", "5", "6", "7"]:
+        if os.path.exists(file_service.get_file_name(model_number)):
+            model = file_service.load_model_from_file(model_number)
+            file_name = compile_table(model, model_number)
+            print(f"[INFO] Compiled {file_name}")
+
+
+if __name__ == "__main__":
+    compile_all_tables()
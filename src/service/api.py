@@ -2,15 +2,166 @@
 The API module defines the Flask app and handles the direct inputs and outputs
 """
 
-from flask import Flask, jsonify
-from flask_cors import CORS, cross_origin
-from src.service import controller
+import time
 
+from flask import Flask, Response, g, jsonify, request
+from flask_cors import CORS, cross_origin
+from src.service import (
+    config,
+    controller,
+    metrics_service,
+    profiler_service,
+    response_cache,
+    warmup_service,
+)
 
 app = Flask(__name__)
 CORS(app, support_credentials=True)
 
 
+@app.before_request
+def start_request_timer():
+    """Starts timing the request, labelled by the route which handles it"""
+
+    route = request.url_rule.rule if request.url_rule else metrics_service.NO_LABEL
+    metrics_service.start_request(route)
+
+    if profiler_service.should_profile(
+        request.headers.get(profiler_service.PROFILE_HEADER)
+    ):
+        g.profile_start_time = time.perf_counter()
+        g.profiler = profiler_service.start_profile()
+
+
+@app.before_request
+def serve_cached_prediction():
+    """Answers a prediction request whose response is cached, without calling the
+    view. A client whose copy of the response is current (per If-None-Match) is
+    answered with 304 Not Modified. The ETag of any other prediction request is
+    kept, so that cache_prediction can cache its response."""
+
+    if request.endpoint != "get_prediction":
+        return None
+
+    try:
+        etag = controller.get_prediction_etag(**request.view_args)
+    except Exception:
+        # Invalid requests are reported by the view
+        return None
+
+    if request.if_none_match.contains_weak(etag):
+        response_cache.record_not_modified()
+        response = Response(status=304)
+    else:
+        body = response_cache.get(etag)
+        if body is None:
+            g.prediction_etag = etag
+            return None
+        response = Response(body, content_type="application/json")
+
+    return _with_prediction_cors(set_cache_headers(response, etag))
+
+
+@cross_origin(supports_credentials=True)
+def _with_prediction_cors(response):
+    """Adds the CORS headers of the get_prediction view to a response which is
+    returned without calling the view"""
+
+    return response
+
+
+@app.after_request
+def cache_prediction(response):
+    """Caches the serialized response of a successful prediction, and tags it with
+    its ETag. The response is not cached if the model changed while it was being
+    predicted."""
+
+    etag = g.pop("prediction_etag", None)
+    if etag is None or response.status_code != 200:
+        return response
+
+    message = response.get_json(silent=True)
+    if not isinstance(message, dict) or message.get("status") != 200:
+        return response
+
+    try:
+        unchanged = etag == controller.get_prediction_etag(**request.view_args)
+    except Exception:
+        unchanged = False
+
+    if unchanged:
+        response_cache.put(etag, response.get_data())
+        set_cache_headers(response, etag)
+
+    return response
+
+
+def set_cache_headers(response, etag):
+    """Adds the ETag and Cache-Control headers of a prediction response.
+
+    Args:
+        response [Response]: Response to a prediction request
+        etag [String]: ETag of the response
+
+    Returns:
+        [Response]: The response
+    """
+
+    response.set_etag(etag)
+    if config.PREDICTION_MAX_AGE > 0:
+        response.cache_control.public = True
+        response.cache_control.max_age = config.PREDICTION_MAX_AGE
+    else:
+        response.cache_control.no_cache = True
+
+    return response
+
+
+@app.after_request
+def stop_request_timer(response):
+    """Records the duration of the request, and saves its profile if it was
+    profiled"""
+
+    profiler = g.pop("profiler", None)
+    if profiler is not None:
+        profiler_service.save_profile(
+            profiler,
+            request.endpoint or metrics_service.NO_LABEL,
+            metrics_service.get_request_model_number(),
+            time.perf_counter() - g.pop("profile_start_time"),
+        )
+
+    metrics_service.end_request()
+    return response
+
+
+@app.route("/metrics")
+def metrics():
+    """
+    Returns the latency histograms and cache and job counters of this process in
+    the Prometheus text format.
+    """
+
+    return Response(metrics_service.render(), content_type=metrics_service.CONTENT_TYPE)
+
+
+@app.route("/ready")
+@cross_origin(supports_credentials=True)
+def ready():
+    """
+    Reports whether the models have been warmed up. Unlike the other endpoints, the
+    HTTP status code is also set (503 until ready), so that it may be used as a
+    load balancer health check.
+    """
+
+    status = warmup_service.get_status()
+
+    if warmup_service.is_ready():
+        return jsonify(status=200, message=status)
+
+    return jsonify(status=503, message=status), 503
+
+
 @app.route("/get-prediction/<board_state>/<model_number>")
 @cross_origin(supports_credentials=True)
 def get_prediction(board_state, model_number):
@@ -33,17 +184,64 @@ def get_prediction(board_state, model_number):
         return jsonify(status=500, message="Server was unable to process the request")
 
 
+@app.route("/get-predictions", methods=["POST"])
+@cross_origin(supports_credentials=True)
+def get_predictions():
+    """
+    Returns the model's predictions for a batch of board states.
+
+    Request body:
+        JSON object of the form {"model_number": "1", "board_states": ["xobboxobx", ...]}
+    """
+
+    try:
+        request_body = request.get_json(force=True, silent=True)
+        if not isinstance(request_body, dict):
+            raise ValueError("Validation Error: Invalid request body")
+
+        results = controller.get_predictions(
+            request_body.get("board_states"), request_body.get("model_number")
+        )
+        return jsonify(status=200, message=results)
+
+    except ValueError:
+        return jsonify(status=400, message="Invalid request")
+
+    except Exception:
+        return jsonify(status=500, message="Server was unable to process the request")
+
+
 @app.route("/train-model/<model_number>")
 @cross_origin(supports_credentials=True)
 def train_model(model_number):
-    """Trains the model from scratch.
+    """Starts training the model from scratch in the background, and returns the
+    id of the training job.
 
     Args:
         model_number: Integer value corresponding to a ML model."""
 
     try:
-        controller.train_model(model_number)
-        return jsonify(status=200, message="Model successfully trained")
+        job_id = controller.submit_training_job(model_number)
+        return jsonify(status=202, message={"job_id": job_id})
+
+    except ValueError:
+        return jsonify(status=400, message="Invalid request")
+
+    except Exception:
+        return jsonify(status=500, message="Server was unable to process the request")
+
+
+@app.route("/training-jobs/<job_id>")
+@cross_origin(supports_credentials=True)
+def get_training_job(job_id):
+    """Returns the status of a training job.
+
+    Args:
+        job_id: String identifying the training job."""
+
+    try:
+        status = controller.get_training_job(job_id)
+        return jsonify(status=200, message=status)
 
     except ValueError:
         return jsonify(status=400, message="Invalid request")
@@ -52,6 +250,20 @@ def train_model(model_number):
         return jsonify(status=500, message="Server was unable to process the request")
 
 
+@app.route("/train-all-models")
+@cross_origin(supports_credentials=True)
+def train_all_models():
+    """Starts training every model from scratch in parallel in the background, and
+    returns the id of the training job."""
+
+    try:
+        job_id = controller.submit_train_all_models_job()
+        return jsonify(status=202, message={"job_id": job_id})
+
+    except Exception:
+        return jsonify(status=500, message="Server was unable to process the request")
+
+
 @app.route("/test-model/<model_number>")
 @cross_origin(supports_credentials=True)
 def test_model(model_number):
@@ -0,0 +1,350 @@
+"""
+The board module defines the board state representation shared by the service layers.
+
+A board is stored as two bitmasks, one for the squares occupied by x and one for
+the squares occupied by o, where bit i corresponds to square i counted from top-left
+to bottom-right. Its base-3 index (x => 0, o => 1, b => 2, top-left square most
+significant) numbers the board states in the same order as the dataset csv file.
+
+The size of the board and the number of pieces in a row which win the game are
+set by TTT_BOARD_SIZE and TTT_WIN_LENGTH (3 and 3 by default). The per-mask
+lookup tables have 2**(size**2) rows, which limits the board to 4x4.
+"""
+
+import numpy as np
+
+from src.service import config
+
+MAX_BOARD_SIZE = 4
+
+SIZE = config.BOARD_SIZE
+WIN_LENGTH = config.WIN_LENGTH
+
+if not 2 <= SIZE <= MAX_BOARD_SIZE:
+    raise ValueError(
+        f"Configuration Error: TTT_BOARD_SIZE must be between 2 and {MAX_BOARD_SIZE}"
+    )
+if not 2 <= WIN_LENGTH <= SIZE:
+    raise ValueError(
+        "Configuration Error: TTT_WIN_LENGTH must be between 2 and TTT_BOARD_SIZE"
+    )
+
+SQUARE_COUNT = SIZE**2
+MASK_COUNT = 2**SQUARE_COUNT
+BOARD_STATE_COUNT = 3**SQUARE_COUNT
+
+# Added to the names of the files of models for any board other than the 3x3 board
+# of the saved models, e.g. "_4x4_k3"
+GEOMETRY_SUFFIX = (
+    "" if (SIZE, WIN_LENGTH) == (3, 3) else f"_{SIZE}x{SIZE}_k{WIN_LENGTH}"
+)
+
+_SYMBOL_DIGITS = {"x": 0, "o": 1, "b": 2}
+
+# Value of each square's base-3 digit within the index of a board
+PLACE_VALUES = 3 ** np.arange(SQUARE_COUNT - 1, -1, -1)
+
+
+def get_adjacent_pairs(size):
+    """Lists the pairs of adjacent squares of a board along each axis: horizontal,
+    vertical, diagonal (positive gradient), diagonal (negative gradient).
+
+    Args:
+        size [Integer]: Width of the board
+
+    Returns:
+        [List[]]: (first square, second square) pairs for each axis
+    """
+
+    return [
+        [
+            (size * y + x, size * y + x + 1)
+            for y in range(size)
+            for x in range(size - 1)
+        ],
+        [
+            (size * y + x, size * y + x + size)
+            for y in range(size - 1)
+            for x in range(size)
+        ],
+        [
+            (size * y + x + size, size * y + x + 1)
+            for y in range(size - 1)
+            for x in range(size - 1)
+        ],
+        [
+            (size * y + x, size * y + x + size + 1)
+            for y in range(size - 1)
+            for x in range(size - 1)
+        ],
+    ]
+
+
+def get_lines(size, win_length):
+    """Lists the runs of squares which win the game when held by one player:
+    every horizontal, vertical and diagonal run of win_length squares.
+
+    Args:
+        size [Integer]: Width of the board
+        win_length [Integer]: Number of pieces in a row which win the game
+
+    Returns:
+        [List[]]: Squares of each run
+    """
+
+    lines = []
+    for y in range(size):
+        for x in range(size):
+            # Directions: right, down, down-right, down-left
+            for step_x, step_y in [(1, 0), (0, 1), (1, 1), (-1, 1)]:
+                end_x = x + step_x * (win_length - 1)
+                end_y = y + step_y * (win_length - 1)
+                if 0 <= end_x < size and end_y < size:
+                    lines.append(
+                        [
+                            size * (y + step_y * i) + x + step_x * i
+                            for i in range(win_length)
+                        ]
+                    )
+
+    return lines
+
+
+ADJACENT_PAIRS = get_adjacent_pairs(SIZE)
+LINES = get_lines(SIZE, WIN_LENGTH)
+
+
+def build_tables(size, win_length):
+    """Precomputes per-mask lookup tables for a board.
+
+    Args:
+        size [Integer]: Width of the board
+        win_length [Integer]: Number of pieces in a row which win the game
+
+    Returns:
+        [ndarray]: Occupancy of each square, for each mask
+        [ndarray]: Number of pieces in each mask
+        [ndarray]: Number of adjacent pairs along each axis, for each mask
+        [ndarray]: Number of complete lines in each mask
+        [ndarray]: Contribution of each mask to the base-3 index of a board
+    """
+
+    square_count = size**2
+    masks = np.arange(2**square_count)
+    square_bits = ((masks[:, np.newaxis] >> np.arange(square_count)) & 1).astype(
+        np.int8
+    )
+
+    adjacent_pairs = get_adjacent_pairs(size)
+    adjacent_counts = np.zeros((len(masks), len(adjacent_pairs)), dtype=np.int8)
+    for axis, pairs in enumerate(adjacent_pairs):
+        for first_square, second_square in pairs:
+            adjacent_counts[:, axis] += (
+                square_bits[:, first_square] & square_bits[:, second_square]
+            )
+
+    line_counts = np.zeros(len(masks), dtype=np.int8)
+    for line in get_lines(size, win_length):
+        line_counts += square_bits[:, line].all(axis=1)
+
+    index_weights = square_bits.astype(np.int64) @ (
+        3 ** np.arange(square_count - 1, -1, -1)
+    )
+
+    return (
+        square_bits,
+        square_bits.sum(axis=1),
+        adjacent_counts,
+        line_counts,
+        index_weights,
+    )
+
+
+SQUARE_BITS, PIECE_COUNTS, ADJACENT_COUNTS, LINE_COUNTS, INDEX_WEIGHTS = build_tables(
+    SIZE, WIN_LENGTH
+)
+
+
+def get_chunks(count, chunk_size=None):
+    """Splits a range of items into consecutive chunks.
+
+    Args:
+        count [Integer]: Number of items
+        chunk_size [Integer]: Number of items per chunk, TTT_CHUNK_SIZE by default
+
+    Returns:
+        [Generator]: (start, stop) of each chunk
+    """
+
+    chunk_size = chunk_size or config.CHUNK_SIZE
+    for start in range(0, count, chunk_size):
+        yield start, min(start + chunk_size, count)
+
+
+class Board:
+    """A validated board state.
+
+    Args:
+        x_mask [Integer]: Squares occupied by x
+        o_mask [Integer]: Squares occupied by o
+        index [Integer]: Base-3 index of the board state
+    """
+
+    __slots__ = ("x_mask", "o_mask", "index")
+
+    def __init__(self, x_mask, o_mask, index):
+        self.x_mask = x_mask
+        self.o_mask = o_mask
+        self.index = index
+
+    @classmethod
+    def from_string(cls, board_state):
+        """Validates and converts a board state string in a single pass.
+
+        Args:
+            board_state [String]: string containing the board state from top-left to bottom-right.
+                                  where 'x' == cross, 'o' == nought, 'b' == blank
+
+        Returns:
+            [Board]: The board state
+        """
+
+        if not isinstance(board_state, str):
+            raise ValueError("Validation Error: Invalid input")
+
+        if len(board_state) != SQUARE_COUNT:
+            raise ValueError("Validation Error: Incorrect length")
+
+        x_mask = o_mask = index = 0
+        for square, char in enumerate(board_state):
+            digit = _SYMBOL_DIGITS.get(char)
+            if digit is None:
+                raise ValueError("Validation Error: Invalid character")
+
+            index = 3 * index + digit
+            if digit == 0:
+                x_mask |= 1 << square
+            elif digit == 1:
+                o_mask |= 1 << square
+
+        return cls(x_mask, o_mask, index)
+
+    @classmethod
+    def from_masks(cls, x_mask, o_mask):
+        """Creates a board state from the squares occupied by each player.
+
+        Args:
+            x_mask [Integer]: Squares occupied by x
+            o_mask [Integer]: Squares occupied by o
+
+        Returns:
+            [Board]: The board state
+        """
+
+        if x_mask & o_mask or (x_mask | o_mask) >= MASK_COUNT:
+            raise ValueError("Validation Error: Invalid input")
+
+        index = (
+            BOARD_STATE_COUNT - 1 - 2 * INDEX_WEIGHTS[x_mask] - INDEX_WEIGHTS[o_mask]
+        )
+
+        return cls(x_mask, o_mask, int(index))
+
+    @classmethod
+    def from_index(cls, index):
+        """Creates a board state from its base-3 index.
+
+        Args:
+            index [Integer]: Base-3 index of the board state
+
+        Returns:
+            [Board]: The board state
+        """
+
+        x_masks, o_masks = masks_from_indices(np.array([index]))
+
+        return cls(int(x_masks[0]), int(o_masks[0]), index)
+
+    @property
+    def x_count(self):
+        """Number of squares occupied by x"""
+        return int(PIECE_COUNTS[self.x_mask])
+
+    @property
+    def o_count(self):
+        """Number of squares occupied by o"""
+        return int(PIECE_COUNTS[self.o_mask])
+
+    def adjacent_counts(self, player):
+        """Returns the number of adjacent pairs of a player's pieces along each axis
+        (horizontal, vertical, diagonal (positive), diagonal (negative))."""
+        return ADJACENT_COUNTS[self._get_mask(player)].tolist()
+
+    def line_count(self, player):
+        """Returns the number of complete lines held by a player."""
+        return int(LINE_COUNTS[self._get_mask(player)])
+
+    def _get_mask(self, player):
+        if player == "x":
+            return self.x_mask
+        if player == "o":
+            return self.o_mask
+        raise ValueError("Invalid player")
+
+    def __str__(self):
+        symbols = []
+        for square in range(SQUARE_COUNT):
+            if self.x_mask >> square & 1:
+                symbols.append("x")
+            elif self.o_mask >> square & 1:
+                symbols.append("o")
+            else:
+                symbols.append("b")
+
+        return "".join(symbols)
+
+    def __repr__(self):
+        return f"Board('{self}')"
+
+    def __eq__(self, other):
+        return isinstance(other, Board) and self.index == other.index
+
+    def __hash__(self):
+        return self.index
+
+
+def masks_from_indices(indices):
+    """Converts an array of base-3 indices into the masks of each player.
+
+    Args:
+        indices [ndarray]: Base-3 indices of board states
+
+    Returns:
+        [ndarray]: Squares occupied by x for each board state
+        [ndarray]: Squares occupied by o for each board state
+    """
+
+    digits = (np.asarray(indices)[:, np.newaxis] // PLACE_VALUES) % 3
+    square_values = 1 << np.arange(SQUARE_COUNT)
+
+    x_masks = (digits == 0) @ square_values
+    o_masks = (digits == 1) @ square_values
+
+    return x_masks, o_masks
+
+
+def get_masks(boards):
+    """Collects the masks of a list of boards into arrays.
+
+    Args:
+        boards [Board[]]: List of board states
+
+    Returns:
+        [ndarray]: Squares occupied by x for each board state
+        [ndarray]: Squares occupied by o for each board state
+    """
+
+    x_masks = np.fromiter((board.x_mask for board in boards), np.intp, len(boards))
+    o_masks = np.fromiter((board.o_mask for board in boards), np.intp, len(boards))
+
+    return x_masks, o_masks
@@ -0,0 +1,165 @@
+"""
+The config module reads deployment settings from environment variables
+"""
+
+import os
+
+
+def get_int(name, default):
+    """Reads an integer setting from the environment.
+
+    Args:
+        name [String]: Name of the environment variable
+        default [Integer]: Value used when the variable is not set
+
+    Returns:
+        [Integer]: Value of the setting
+    """
+
+    value = os.environ.get(name)
+
+    if value is None or value == "":
+        return default
+
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"Configuration Error: {name} must be an integer") from None
+
+
+def get_float(name, default):
+    """Reads a decimal setting from the environment.
+
+    Args:
+        name [String]: Name of the environment variable
+        default [Float]: Value used when the variable is not set
+
+    Returns:
+        [Float]: Value of the setting
+    """
+
+    value = os.environ.get(name)
+
+    if value is None or value == "":
+        return default
+
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"Configuration Error: {name} must be a number") from None
+
+
+def get_str(name, default):
+    """Reads a string setting from the environment.
+
+    Args:
+        name [String]: Name of the environment variable
+        default [String]: Value used when the variable is not set
+
+    Returns:
+        [String]: Value of the setting
+    """
+
+    value = os.environ.get(name)
+
+    if value is None or value == "":
+        return default
+
+    return value
+
+
+# Maximum number of models held in memory by the model registry
+MODEL_CACHE_MAX_MODELS = get_int("TTT_MODEL_CACHE_MAX_MODELS", 7)
+
+# Maximum combined size (in bytes) of the models held in memory by the model registry
+MODEL_CACHE_MEMORY_BUDGET = get_int("TTT_MODEL_CACHE_MEMORY_BUDGET", 64 * 1024 * 1024)
+
+# Maximum number of board states accepted by a single batch prediction request
+MAX_BATCH_SIZE = get_int("TTT_MAX_BATCH_SIZE", 10000)
+
+# Set as 1 to key the answer tables on canonical (symmetry reduced) board states
+CANONICAL_ANSWER_TABLES = get_int("TTT_CANONICAL_ANSWER_TABLES", 0)
+
+# Maximum number of serialized prediction responses held in memory by the response
+# cache, or 0 to disable it
+RESPONSE_CACHE_MAX_ENTRIES = get_int("TTT_RESPONSE_CACHE_MAX_ENTRIES", 20000)
+
+# Seconds for which clients and CDNs may reuse a prediction response before
+# revalidating it with its ETag, or 0 to always revalidate
+PREDICTION_MAX_AGE = get_int("TTT_PREDICTION_MAX_AGE", 60)
+
+# Number of background jobs (e.g. training a model) which may run at the same time
+JOB_WORKERS = get_int("TTT_JOB_WORKERS", 1)
+
+# Number of finished background jobs whose status is kept for polling
+JOB_HISTORY = get_int("TTT_JOB_HISTORY", 100)
+
+# Largest batch of predictions evaluated with the compiled forest engine rather than
+# the model's predict method
+FOREST_ENGINE_MAX_BATCH = get_int("TTT_FOREST_ENGINE_MAX_BATCH", 500)
+
+# Format in which models are saved: "forest" (compact model_artifact files, loaded
+# without unpickling) or "pickle"
+MODEL_FORMAT = get_str("TTT_MODEL_FORMAT", "forest")
+
+# Comma separated list of the models which are loaded and warmed up at startup
+PRELOAD_MODELS = [
+    model_number.strip()
+    for model_number in get_str("TTT_PRELOAD_MODELS", "1,2,3,4,5,6,7").split(",")
+    if model_number.strip()
+]
+
+# Address and port on which the server listens. It listens on all interfaces by
+# default, as it always has, to be reachable from outside a container
+HOST = get_str("TTT_HOST", "0.0.0.0")  # nosec B104
+PORT = get_int("TTT_PORT", 8080)
+
+# Number of server processes, which share the models loaded before they are forked,
+# and the number of threads handling requests in each of them
+WORKERS = get_int("TTT_WORKERS", 1)
+THREADS = get_int("TTT_THREADS", 1)
+
+# Seconds between checks for retrained models, which restart the server processes
+RELOAD_INTERVAL = get_int("TTT_RELOAD_INTERVAL", 5)
+
+# Seconds for which the model files must be unchanged before the server processes
+# are restarted, so that models saved one after another (e.g. by /train-all-models)
+# cause a single restart
+RELOAD_DELAY = get_int("TTT_RELOAD_DELAY", 10)
+
+# Fraction of requests which are profiled, from 0 (none) to 1 (all)
+PROFILE_SAMPLE_RATE = get_float("TTT_PROFILE_SAMPLE_RATE", 0.0)
+
+# Set as 1 to also profile any request sent with an "X-Profile: 1" header
+PROFILE_HEADER = get_int("TTT_PROFILE_HEADER", 0)
+
+# Number of the most recent profiles which are kept
+PROFILE_MAX_FILES = get_int("TTT_PROFILE_MAX_FILES", 100)
+
+# Width (and height) of the board, and the number of pieces in a row which win the
+# game. The saved models are for a 3x3 board with 3 in a row. Models for any other
+# board are trained on chunks of the dataset held as arrays (see
+# data_service.iter_generated_chunks), and are saved in separate files.
+BOARD_SIZE = get_int("TTT_BOARD_SIZE", 3)
+WIN_LENGTH = get_int("TTT_WIN_LENGTH", 3)
+
+# Number of board states processed at a time when every board state is enumerated,
+# which bounds the memory used by the intermediate arrays
+CHUNK_SIZE = get_int("TTT_CHUNK_SIZE", 65536)
+
+# Fraction of the board states in the dataset which are used, for boards other
+# than 3x3. A 4x4 board has 43,046,721 states.
+DATASET_SAMPLE_RATE = get_float("TTT_DATASET_SAMPLE_RATE", 1.0)
+
+# Dataset file written by dataset_generator, e.g. of a filtered dataset. When not
+# set, the dataset is generated from every board state of the board.
+DATASET_FILE = get_str("TTT_DATASET_FILE", "")
+
+# Hyper-parameter search used to train the models: "grid" (exhaustive) or "halving"
+# (successive halving, see search_service), and the resource grown by each
+# iteration of a halving search: "n_samples" or "n_estimators"
+SEARCH = get_str("TTT_SEARCH", "grid")
+SEARCH_RESOURCE = get_str("TTT_SEARCH_RESOURCE", "n_samples")
+
+# Seconds after which a halving search stops fitting candidates, or 0 for no limit
+SEARCH_TIME_BUDGET = get_float("TTT_SEARCH_TIME_BUDGET", 0.0)
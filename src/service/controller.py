@@ -2,11 +2,20 @@
 The controller module acts as an interface between the user inputs and the service layers
 """
 
+import time
+
+import pandas as pd
+
 from src.service import (
+    answer_tables,
     prediction_service,
     training_service,
     testing_service,
     file_service,
+    job_service,
+    metrics_service,
+    model_registry,
+    response_cache,
     validator,
 )
 
@@ -22,38 +31,269 @@ def get_prediction(board_state, model_number):
     Returns:
          prediction: String containing the model's prediction for the given inputs."""
 
-    validator.validate_board_state(board_state)
+    timer = metrics_service.StageTimer(model_number)
+    board = validator.validate_board_state(board_state)
     validator.validate_model_number(model_number)
+    timer.stage("validate")
+
+    # Use the precomputed answer for this board state if one is available
+    table = answer_tables.get_table(model_number)
+    if table is not None:
+        prediction = answer_tables.lookup(table, board)
+        timer.stage("answer_table")
+        return prediction
 
-    user_input = prediction_service.handle_user_input(board_state, model_number)
-    model = file_service.load_model_from_file(model_number)
+    user_input = prediction_service.handle_user_input(board, model_number)
+    timer.stage("encode")
+    model = model_registry.get_model(model_number)
+    timer.stage("load_model")
     prediction = prediction_service.evaluate_prediction(model, user_input)
+    timer.stage("predict")
 
     return prediction
 
 
-def train_model(model_number):
+def get_prediction_etag(board_state, model_number):
+    """Identify the response to a prediction request, see response_cache
+
+    Args:
+        board_state: string containing the board state from top-left to bottom-right.
+        model_number: Integer value corresponding to a ML model.
+
+    Returns:
+         etag: String identifying the prediction of the current version of the model"""
+
+    board = validator.validate_board_state(board_state)
+    validator.validate_model_number(model_number)
+    model_number = str(model_number)
+
+    return response_cache.get_etag(
+        model_number, file_service.get_model_version(model_number), board
+    )
+
+
+def get_predictions(board_states, model_number):
+    """Predict the outcomes of a batch of games given their board states
+
+    Args:
+        board_states: list of strings containing board states from top-left to bottom-right.
+        model_number: Integer value corresponding to a ML model.
+
+    Returns:
+         results: List containing a prediction or validation error for each board
+                  state, in input order."""
+
+    model_number = str(model_number)
+    timer = metrics_service.StageTimer(model_number)
+    validator.validate_model_number(model_number)
+    boards, errors = validator.validate_board_states(board_states)
+    timer.stage("validate")
+
+    valid_boards = [board for board in boards if board is not None]
+
+    predictions = []
+    if valid_boards:
+        table = answer_tables.get_table(model_number)
+        if table is not None:
+            predictions = answer_tables.lookup_many(table, valid_boards)
+            timer.stage("answer_table")
+        else:
+            user_inputs = prediction_service.handle_user_inputs(
+                valid_boards, model_number
+            )
+            timer.stage("encode")
+            model = model_registry.get_model(model_number)
+            timer.stage("load_model")
+            predictions = prediction_service.evaluate_predictions(model, user_inputs)
+            timer.stage("predict")
+
+    results = []
+    prediction_iterator = iter(predictions)
+    for board_state, error in zip(board_states, errors):
+        if error is None:
+            results.append(
+                {"board_state": board_state, "prediction": next(prediction_iterator)}
+            )
+        else:
+            results.append({"board_state": board_state, "error": error})
+    timer.stage("format")
+
+    return results
+
+
+def train_model(model_number, progress=None):
     """Train a ML model and save it to a file
 
     Args:
-        model_number: Integer value corresponding to a ML model"""
+        model_number: Integer value corresponding to a ML model
+        progress: Optional callback, called as progress(stage, **details)
+
+    Returns:
+        model: The trained SKLearn model"""
+
+    validator.validate_model_number(model_number)
+    model = training_service.train_model(model_number, progress=progress)
+
+    if progress is not None:
+        progress("saving")
+    file_service.save_model_files(model, model_number)
+    model_registry.evict(model_number)
+    answer_tables.compile_table(model, model_number)
+
+    return model
+
+
+def retrain_model(model_number, data_file_name, mode="grow", trees=None):
+    """Retrain a ML model incrementally on new labelled board states, and save it
+    as a new version of the model
+
+    Args:
+        model_number: Integer value corresponding to a ML model
+        data_file_name: csv file of the new board states, in the layout of
+                        ml-ttt-data.csv
+        mode: "grow" or "refresh", see training_service.retrain_model
+        trees: Number of trees fitted, see training_service.retrain_model
+
+    Returns:
+        report: Dictionary containing the report of the retraining and the
+                version of the saved model"""
+
+    validator.validate_model_number(model_number)
+    with open(data_file_name) as csv_string:
+        data_delta = pd.read_csv(csv_string, index_col=0)
+
+    model = file_service.load_estimator_from_file(model_number)
+    model, report = training_service.retrain_model(
+        model, model_number, data_delta, mode=mode, trees=trees
+    )
+
+    file_service.save_model_files(model, model_number)
+    model_registry.evict(model_number)
+    answer_tables.compile_table(model, model_number)
+    report["version"] = file_service.get_model_version(model_number)
+
+    return report
+
+
+def submit_training_job(model_number):
+    """Start training a ML model in the background. If the model is already
+    being trained, the existing job is returned instead of starting another.
+
+    Args:
+        model_number: Integer value corresponding to a ML model
+
+    Returns:
+        job_id: String identifying the training job"""
 
     validator.validate_model_number(model_number)
-    model = training_service.train_model(model_number)
-    file_service.save_model_to_file(model, model_number)
+
+    def run_training_job(progress):
+        start_time = time.perf_counter()
+        model = train_model(model_number, progress=progress)
+
+        return {
+            "model_number": model_number,
+            "best_score": float(model.best_score_),
+            "best_params": model.best_params_,
+            "training_seconds": time.perf_counter() - start_time,
+        }
+
+    return job_service.submit_job(model_number, run_training_job)
+
+
+def get_training_job(job_id):
+    """Get the status of a training job
+
+    Args:
+        job_id: String identifying the training job
+
+    Returns:
+        status: Dictionary containing the status, stage, elapsed time and, once
+                finished, the metrics or error of the job"""
+
+    status = job_service.get_job(job_id)
+    if status is None:
+        raise ValueError("Invalid job_id")
+
+    return status
+
+
+def submit_train_all_models_job():
+    """Start training every ML model in the background. If they are already being
+    trained, the existing job is returned instead of starting another.
+
+    Returns:
+        job_id: String identifying the training job"""
+
+    def run_training_job(progress):
+        start_time = time.perf_counter()
+        report = train_all_models(progress=progress)
+
+        return {
+            "models": report,
+            "training_seconds": time.perf_counter() - start_time,
+        }
+
+    return job_service.submit_job(
+        "all-models", run_training_job, resources=training_service.MODEL_NUMBERS
+    )
+
+
+def train_all_models(progress=None):
+    """Train every ML model in parallel and save them to files
+
+    Args:
+        progress: Optional callback, called as progress(stage, **details)
+
+    Returns:
+        report: Dictionary containing the timings of each model"""
+
+    if progress is not None:
+        progress("training")
+    models, report = training_service.train_all_models()
+
+    if progress is not None:
+        progress("saving")
+    for model_number, model in models.items():
+        file_service.save_model_files(model, model_number)
+        model_registry.evict(model_number)
+        answer_tables.compile_table(model, model_number)
+
+    return report
 
 
 def test_model(model_number):
-    """Evaluate the f1 score, precision, recall, and confusion matrix of a model
+    """Evaluate the f1 score, precision, recall, and confusion matrix of a model.
+    The evaluation is stored, and only repeated once the model or test set changes.
 
     Args:
-        model_number: Integer value corresponding to a ML model"""
+        model_number: Integer value corresponding to a ML model
+
+    Returns:
+        evaluation: Dictionary containing the metrics, see testing_service"""
 
+    timer = metrics_service.StageTimer(model_number)
     validator.validate_model_number(model_number)
-    model = file_service.load_model_from_file(model_number)
+    timer.stage("validate")
+
+    version = testing_service.get_evaluation_version(model_number)
+    evaluation = testing_service.load_evaluation(model_number, version)
+    timer.stage("load_evaluation")
+    if evaluation is not None:
+        return evaluation
+
+    model = model_registry.get_model(model_number)
+    timer.stage("load_model")
     predictive_features, target_feature = training_service.import_data_as_pandas(
         model_number, test=True
     )
-    metrics = testing_service.test_model(model, predictive_features, target_feature)
+    timer.stage("load_data")
+    evaluation = testing_service.test_model(model, predictive_features, target_feature)
+    testing_service.save_evaluation(model_number, version, evaluation)
+    timer.stage("evaluate")
+
+    return evaluation
+
 
-    return metrics
+if __name__ == "__main__":
+    print(training_service.format_training_report(train_all_models()))
@@ -1,12 +1,34 @@
 """
 The data service module contains the logic for feature engineering and data manipulation
+
+The dataset of a board other than 3x3 is processed in chunks of board states held
+as arrays instead, since a DataFrame cannot hold the 43 million board states of a
+4x4 board, see iter_generated_chunks.
 """
 
 import numpy as np
 import pandas as pd
 from sklearn.utils import resample
 
-from src.service import generators
+from src.service import (
+    board,
+    config,
+    dataset_generator,
+    encoding_service,
+    generators,
+    symmetry,
+)
+
+# Symbols in the order of their codes in get_code_matrix, minus one
+CODE_SYMBOLS = ["o", "b", "x"]
+
+# Models whose training set is balanced, by upsampling (True) or downsampling (False)
+# when it is resampled
+RESAMPLED_MODELS = {"3": False, "4": True, "7": True}
+
+# Fraction of the dataset used as the training set, as for a 3x3 board
+# (see training_service.load_data_split)
+TRAINING_FRACTION = 0.25
 
 
 def onehot_encode(dataset):
@@ -29,17 +51,7 @@ def onehot_encode(dataset):
 
     # Append additional entries to ensure that all posibilities are one-hot encoded
     temp_rows = pd.DataFrame(
-        {
-            "top-left-square": ["x", "o", "b"],
-            "top-middle-square": ["x", "o", "b"],
-            "top-right-square": ["x", "o", "b"],
-            "middle-left-square": ["x", "o", "b"],
-            "middle-middle-square": ["x", "o", "b"],
-            "middle-right-square": ["x", "o", "b"],
-            "bottom-left-square": ["x", "o", "b"],
-            "bottom-middle-square": ["x", "o", "b"],
-            "bottom-right-square": ["x", "o", "b"],
-        },
+        {column_name: ["x", "o", "b"] for column_name in columns_to_encode},
         index=["temp", "temp", "temp"],
     )
     dataset = pd.concat([dataset, temp_rows])
@@ -84,7 +96,7 @@ def downsample_dataset(dataset):
     """
 
     value_counts = dataset.index.value_counts(sort=True)
-    target_size = value_counts[-1]
+    target_size = value_counts.iloc[-1]
     outcomes_to_downsample = value_counts.index[:-1]
 
     # List of datasets to be combined once everything has been downsampled
@@ -118,7 +130,7 @@ def upsample_dataset(dataset):
     """
 
     value_counts = dataset.index.value_counts(sort=True)
-    target_size = value_counts[0]
+    target_size = value_counts.iloc[0]
     outcomes_to_upsample = value_counts.index[1:]
 
     # List of datasets to be combined once everything has been upsampled
@@ -140,6 +152,59 @@ def upsample_dataset(dataset):
     return dataset
 
 
+def get_board_indices(dataset):
+    """Calculates the base-3 index of the board state in each row of a dataset.
+
+    Args:
+        dataset [DataFrame]: Pandas DataFrame containing the board state columns
+
+    Returns:
+        [ndarray]: Index of each board state
+    """
+
+    squares = dataset[generators.get_board_state_column_names()].to_numpy()
+    digits = (squares == "o") + 2 * (squares == "b")
+
+    return digits @ board.PLACE_VALUES
+
+
+def deduplicate_symmetries(dataset):
+    """Removes rows whose board state is a rotation or reflection of an earlier row.
+
+    Args:
+        dataset [DataFrame]: Pandas DataFrame containing the dataset to be deduplicated
+
+    Returns:
+        [DataFrame]: Dataset containing one row per set of symmetric board states
+    """
+
+    canonical_indices = symmetry.CANONICAL_INDICES[get_board_indices(dataset)]
+    _, first_rows = np.unique(canonical_indices, return_index=True)
+
+    return dataset.iloc[np.sort(first_rows)]
+
+
+def reweight_symmetries(dataset):
+    """Removes rows whose board state is a rotation or reflection of an earlier row,
+    and weights each remaining row by the number of rows it represents.
+
+    Args:
+        dataset [DataFrame]: Pandas DataFrame containing the dataset to be reweighted
+
+    Returns:
+        [DataFrame]: Dataset containing one row per set of symmetric board states
+        [ndarray]: Sample weight of each remaining row
+    """
+
+    canonical_indices = symmetry.CANONICAL_INDICES[get_board_indices(dataset)]
+    _, first_rows, row_counts = np.unique(
+        canonical_indices, return_index=True, return_counts=True
+    )
+    order = np.argsort(first_rows)
+
+    return dataset.iloc[first_rows[order]], row_counts[order].astype(float)
+
+
 def calculate_move_counts(dataset):
     """Adds additional features to a dataset corresponding to the number of
     Xs and Os on the game board. These features are named "x_count" and "o_count"
@@ -189,56 +254,270 @@ def calculate_adjacent_symbols(dataset):
 
     """
 
-    v_positions = ["top", "middle", "bottom"]  # All possible vertical positions
-    h_positions = ["left", "middle", "right"]  # All possible horizontal positions
+    square_values = 1 << np.arange(board.SQUARE_COUNT)
+    squares = dataset[generators.get_board_state_column_names()].to_numpy()
 
     for player in ["x", "o"]:
-        # evaluate adj_horizontal
-        dataset[f"{player}_adj_horizontal"] = 0
-        for v_position in v_positions:
-            for h_index in [0, 1]:
-                adjacent_rows = (
-                    dataset[f"{v_position}-{h_positions[h_index]}-square"] == player
-                ) & (dataset[f"{v_position}-{h_positions[h_index+1]}-square"] == player)
-
-                dataset.loc[adjacent_rows, f"{player}_adj_horizontal"] += 1
-
-        # evaluate adj_vertical
-        dataset[f"{player}_adj_vertical"] = 0
-        for v_index in [0, 1]:
-            for h_position in h_positions:
-                adjacent_rows = (
-                    dataset[f"{v_positions[v_index]}-{h_position}-square"] == player
-                ) & (dataset[f"{v_positions[v_index+1]}-{h_position}-square"] == player)
-
-                dataset.loc[adjacent_rows, f"{player}_adj_vertical"] += 1
-
-        # evaluate adj_diagonal_pos
-        dataset[f"{player}_adj_diagonal_pos"] = 0
-        for v_index in [0, 1]:
-            for h_index in [0, 1]:
-                adjacent_rows = (
-                    dataset[f"{v_positions[v_index+1]}-{h_positions[h_index]}-square"]
-                    == player
-                ) & (
-                    dataset[f"{v_positions[v_index]}-{h_positions[h_index+1]}-square"]
-                    == player
-                )
-
-                dataset.loc[adjacent_rows, f"{player}_adj_diagonal_pos"] += 1
-
-        # evaluate adj_diagonal_neg
-        dataset[f"{player}_adj_diagonal_neg"] = 0
-        for v_index in [0, 1]:
-            for h_index in [0, 1]:
-                adjacent_rows = (
-                    dataset[f"{v_positions[v_index]}-{h_positions[h_index]}-square"]
-                    == player
-                ) & (
-                    dataset[f"{v_positions[v_index+1]}-{h_positions[h_index+1]}-square"]
-                    == player
-                )
-
-                dataset.loc[adjacent_rows, f"{player}_adj_diagonal_neg"] += 1
+        # Convert each row into a bitmask of the player's squares, from which the
+        # pair counts for all four axes are read in a single table lookup
+        masks = (squares == player) @ square_values
+        adjacent_counts = board.ADJACENT_COUNTS[masks].astype(np.int64)
+
+        for axis_index, axis in enumerate(
+            ["horizontal", "vertical", "diagonal_pos", "diagonal_neg"]
+        ):
+            dataset[f"{player}_adj_{axis}"] = adjacent_counts[:, axis_index]
 
     return dataset
+
+
+def get_split_draws(indices):
+    """Maps each board state to a fixed pseudo-random number in [0, 1), which
+    decides whether it is sampled, and whether it is in the training or test set.
+    The numbers depend only on the index of the board state, so a generated
+    dataset does not depend on the chunk size.
+
+    Args:
+        indices [ndarray]: Base-3 indices of board states
+
+    Returns:
+        [ndarray]: Number for each board state
+    """
+
+    # SplitMix64 finalizer, using wrapping unsigned arithmetic
+    mixed = np.asarray(indices, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+    mixed = (mixed ^ (mixed >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    mixed = (mixed ^ (mixed >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    mixed = mixed ^ (mixed >> np.uint64(31))
+
+    return (mixed >> np.uint64(11)).astype(np.float64) / 2.0**53
+
+
+def iter_generated_chunks(
+    test=False, symmetry_option=None, sample_rate=None, chunk_size=None
+):
+    """Enumerates the board states of the dataset (see dataset_generator) in
+    chunks, and takes a sample of each chunk for the training or test set.
+
+    Args:
+        test [Boolean]: Set as True for the test set
+        symmetry_option [String]: None, "deduplicate" or "reweight", see
+                                  training_service.import_data_as_pandas. Only
+                                  canonical board states are kept when set.
+        sample_rate [Float]: Fraction of the board states included in the
+                             dataset, TTT_DATASET_SAMPLE_RATE by default
+        chunk_size [Integer]: Number of board states enumerated at a time,
+                              TTT_CHUNK_SIZE by default
+
+    Returns:
+        [Generator]: For each chunk, the x masks, o masks and winners of the
+                     sampled board states, and their sample weights if
+                     symmetry_option == "reweight" (otherwise None)
+    """
+
+    if symmetry_option not in [None, "deduplicate", "reweight"]:
+        raise ValueError("Invalid symmetry option")
+
+    if sample_rate is None:
+        sample_rate = config.DATASET_SAMPLE_RATE
+    training_rate = sample_rate * TRAINING_FRACTION
+
+    def select(indices):
+        draws = get_split_draws(indices)
+        if test:
+            return (draws >= training_rate) & (draws < sample_rate)
+        return draws < training_rate
+
+    chunks = dataset_generator.iter_dataset_chunks(
+        file_name=config.DATASET_FILE, chunk_size=chunk_size, selector=select
+    )
+    for indices, x_masks, o_masks, outcome_codes in chunks:
+        sample_weight = None
+        if symmetry_option is not None:
+            symmetric_indices = symmetry.get_symmetric_indices(x_masks, o_masks)
+            canonical = symmetric_indices.min(axis=0) == indices
+            x_masks = x_masks[canonical]
+            o_masks = o_masks[canonical]
+            outcome_codes = outcome_codes[canonical]
+
+            if symmetry_option == "reweight":
+                # Each canonical board state represents its distinct equivalents
+                sorted_indices = np.sort(symmetric_indices[:, canonical], axis=0)
+                sample_weight = 1.0 + (np.diff(sorted_indices, axis=0) != 0).sum(axis=0)
+
+        yield x_masks, o_masks, dataset_generator.OUTCOMES[outcome_codes], sample_weight
+
+
+def get_resampled_rows(target, upsample):
+    """Selects rows such that all outcomes are equally represented. The rows are
+    those which upsample_dataset or downsample_dataset would select from a
+    DataFrame with the same outcomes, in the same order.
+
+    Args:
+        target [ndarray]: Outcome of each row
+        upsample [Boolean]: Set as True to duplicate rows of the less common
+                            outcomes, or False to drop rows of the more common ones
+
+    Returns:
+        [ndarray]: Indices of the selected rows
+    """
+
+    value_counts = pd.Index(target).value_counts(sort=True)
+    if upsample:
+        target_size = value_counts.iloc[0]
+        kept_outcome = value_counts.index[0]
+        outcomes_to_resample = value_counts.index[1:]
+    else:
+        target_size = value_counts.iloc[-1]
+        kept_outcome = value_counts.index[-1]
+        outcomes_to_resample = value_counts.index[:-1]
+
+    rows = [np.flatnonzero(target == kept_outcome)]
+    for outcome in outcomes_to_resample:
+        rows.append(
+            resample(
+                np.flatnonzero(target == outcome),
+                replace=upsample,
+                n_samples=target_size,
+                random_state=0,
+            )
+        )
+
+    return np.concatenate(rows)
+
+
+def get_balanced_weights(target, upsample, sample_weight=None):
+    """Weights rows such that all outcomes are equally represented, without
+    duplicating or dropping any of them. Each outcome's rows share the total
+    weight which its rows would have after get_resampled_rows.
+
+    Args:
+        target [ndarray]: Outcome of each row
+        upsample [Boolean]: Set as True to weight all outcomes as the most common
+                            one, or False to weight them as the least common one
+        sample_weight [ndarray]: Optional existing weight of each row, e.g. from
+                                 reweight_symmetries, which is scaled
+
+    Returns:
+        [ndarray]: Sample weight of each row
+    """
+
+    if sample_weight is None:
+        sample_weight = np.ones(len(target))
+
+    outcomes, outcome_codes = np.unique(target, return_inverse=True)
+    outcome_weights = np.bincount(
+        outcome_codes, weights=sample_weight, minlength=len(outcomes)
+    )
+    target_weight = outcome_weights.max() if upsample else outcome_weights.min()
+
+    return sample_weight * (target_weight / outcome_weights)[outcome_codes]
+
+
+def get_code_matrix(dataset):
+    """Converts the board state columns of a dataset into a matrix of symbol codes
+    in a single pass, such that:
+        x => 1
+        b => 0
+        o => -1
+
+    Args:
+        dataset [DataFrame]: Pandas DataFrame containing the board state columns
+
+    Returns:
+        [ndarray]: int8 array of shape (number of rows, number of squares)
+    """
+
+    column_names = generators.get_board_state_column_names()
+    codes = np.empty((len(dataset), len(column_names)), dtype=np.int8)
+
+    # The categories are fixed, so every column is coded the same way whichever
+    # symbols it contains. Their positions are the codes plus one.
+    for square, column_name in enumerate(column_names):
+        codes[:, square] = pd.Categorical(
+            dataset[column_name], categories=CODE_SYMBOLS
+        ).codes
+
+    if (codes < 0).any():
+        raise ValueError("Invalid symbol in board state columns")
+    codes -= 1
+
+    return codes
+
+
+def encode_features(dataset, model_number, resample=True):
+    """Encodes, resamples, and feature engineers a dataset as appropriate for the
+    given model_number, without copying the DataFrame. The board state columns
+    are coded once by get_code_matrix, and the features of every model are derived
+    from the codes by encoding_service, as they are for predictions.
+
+    Args:
+        dataset [DataFrame]: Pandas DataFrame containing the board state columns
+        model_number [String]: Value corresponding to a ML model
+        resample [Boolean]: Set as False to skip any up/downsampling
+
+    Returns:
+        [ndarray]: float32 array of the predictive features, with the columns
+                   named by get_feature_names
+        [ndarray]: Outcome of each row
+    """
+
+    model_number = str(model_number)
+    if model_number not in encoding_service.FEATURE_COUNTS:
+        raise ValueError("Invalid model_number")
+
+    codes = get_code_matrix(dataset)
+    target = dataset.index.values
+
+    if resample and model_number in RESAMPLED_MODELS:
+        rows = get_resampled_rows(target, upsample=RESAMPLED_MODELS[model_number])
+        codes = codes[rows]
+        target = target[rows]
+
+    square_values = 1 << np.arange(board.SQUARE_COUNT)
+    x_masks = (codes == 1) @ square_values
+    o_masks = (codes == -1) @ square_values
+    features = encoding_service.encode_masks(
+        x_masks, o_masks, model_number, dtype=np.float32
+    )
+
+    return features, target
+
+
+def get_feature_names(model_number):
+    """Returns the names of the features of a model, as produced by encode_features.
+    Onehot columns follow the schema of generators.get_onehot_column_names,
+    ordered by square and then by symbol (b, o, x).
+
+    Args:
+        model_number [String]: Value corresponding to a ML model
+
+    Returns:
+        [String[]]: List of column names
+    """
+
+    column_names = generators.get_board_state_column_names()
+    adjacent_names = [
+        f"{player}_adj_{axis}"
+        for player in ["x", "o"]
+        for axis in ["horizontal", "vertical", "diagonal_pos", "diagonal_neg"]
+    ]
+
+    model_number = str(model_number)
+    if model_number == "1":
+        # The schema is ordered by symbol (x, o, b), and then by square
+        onehot_names = generators.get_onehot_column_names()
+        square_count = len(column_names)
+        return [
+            onehot_names[symbol * square_count + square]
+            for square in range(square_count)
+            for symbol in [2, 1, 0]
+        ]
+    if model_number == "5":
+        return column_names + ["x_count", "o_count"]
+    if model_number == "6":
+        return adjacent_names
+    if model_number == "7":
+        return column_names + adjacent_names
+
+    return column_names
@@ -0,0 +1,260 @@
+"""
+The dataset generator module builds the dataset from the rules of the game,
+instead of parsing it from a csv file. Every board state of the configured board
+is enumerated in chunks, and labelled with the players holding a complete line:
+"x", "o", "nobody" or "everyone" (if both do), as in ml-ttt-data.csv.
+
+A dataset is held as a structured array with the base-3 index (see the board
+module) and the outcome code of each board state, which takes 5 bytes per board
+state. It can be saved to a .npy file, which is memory-mapped when it is read,
+and used for training by setting TTT_DATASET_FILE. Filters select a subset of
+the board states, e.g. only those which can occur in a game.
+
+Usage:
+    python -m src.service.dataset_generator [--filter legal] [--output file]
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.service import board, config, file_service, generators
+
+OUTCOMES = np.array(["x", "o", "nobody", "everyone"])  # Outcome codes 0, 1, 2, 3
+
+DATASET_DTYPE = np.dtype([("index", "<u4"), ("outcome", "u1")])
+
+
+def get_win_line_masks(size, win_length):
+    """Converts the winning runs of squares of a board into bitmasks.
+
+    Args:
+        size [Integer]: Width of the board
+        win_length [Integer]: Number of pieces in a row which win the game
+
+    Returns:
+        [ndarray]: Bitmask of each run
+    """
+
+    return np.array(
+        [
+            sum(1 << square for square in line)
+            for line in board.get_lines(size, win_length)
+        ],
+        dtype=np.int64,
+    )
+
+
+WIN_LINE_MASKS = get_win_line_masks(board.SIZE, board.WIN_LENGTH)
+
+
+def is_all(x_masks, o_masks):
+    """Keeps every board state"""
+
+    return np.ones(len(x_masks), dtype=bool)
+
+
+def is_legal(x_masks, o_masks):
+    """Keeps the board states whose piece counts can occur in a game, in which x
+    moves first and the players take turns"""
+
+    move_difference = board.PIECE_COUNTS[x_masks] - board.PIECE_COUNTS[o_masks]
+
+    return (move_difference == 0) | (move_difference == 1)
+
+
+FILTERS = {"all": is_all, "legal": is_legal}
+
+
+def get_outcome_codes(x_masks, o_masks, win_line_masks=WIN_LINE_MASKS):
+    """Labels board states with the players holding a complete line.
+
+    Args:
+        x_masks [ndarray]: Squares occupied by x for each board state
+        o_masks [ndarray]: Squares occupied by o for each board state
+        win_line_masks [ndarray]: Bitmask of each winning run of squares
+
+    Returns:
+        [ndarray]: Outcome code (an index into OUTCOMES) of each board state
+    """
+
+    x_wins = ((x_masks[:, np.newaxis] & win_line_masks) == win_line_masks).any(axis=1)
+    o_wins = ((o_masks[:, np.newaxis] & win_line_masks) == win_line_masks).any(axis=1)
+
+    outcome_codes = np.full(len(x_masks), 2, dtype=np.uint8)
+    outcome_codes[x_wins] = 0
+    outcome_codes[o_wins] = 1
+    outcome_codes[x_wins & o_wins] = 3
+
+    return outcome_codes
+
+
+def iter_dataset_chunks(
+    filter_name="all", file_name=None, chunk_size=None, selector=None
+):
+    """Enumerates and labels the board states of the dataset in chunks.
+
+    Args:
+        filter_name [String]: Key of FILTERS, applied to generated board states
+        file_name [String]: Dataset file to read instead of generating the
+                            board states
+        chunk_size [Integer]: Number of board states processed at a time,
+                              TTT_CHUNK_SIZE by default
+        selector [Function]: Optional function of the base-3 indices of a chunk,
+                             returning which of its board states to keep. It is
+                             applied before the board states are labelled.
+
+    Returns:
+        [Generator]: For each chunk, the base-3 indices, x masks, o masks and
+                     outcome codes of its board states
+    """
+
+    if filter_name not in FILTERS:
+        raise ValueError("Invalid dataset filter")
+
+    if file_name:
+        dataset = load_dataset(file_name)
+        for start, stop in board.get_chunks(len(dataset), chunk_size):
+            indices = dataset["index"][start:stop].astype(np.int64)
+            outcome_codes = np.array(dataset["outcome"][start:stop])
+            if selector is not None:
+                selected = selector(indices)
+                indices = indices[selected]
+                outcome_codes = outcome_codes[selected]
+
+            x_masks, o_masks = board.masks_from_indices(indices)
+            yield indices, x_masks, o_masks, outcome_codes
+        return
+
+    for start, stop in board.get_chunks(board.BOARD_STATE_COUNT, chunk_size):
+        indices = np.arange(start, stop)
+        if selector is not None:
+            indices = indices[selector(indices)]
+        x_masks, o_masks = board.masks_from_indices(indices)
+
+        selected = FILTERS[filter_name](x_masks, o_masks)
+        if not selected.all():
+            indices = indices[selected]
+            x_masks = x_masks[selected]
+            o_masks = o_masks[selected]
+
+        yield indices, x_masks, o_masks, get_outcome_codes(x_masks, o_masks)
+
+
+def generate_dataset(filter_name="all", chunk_size=None):
+    """Generates the dataset of the configured board.
+
+    Args:
+        filter_name [String]: Key of FILTERS
+        chunk_size [Integer]: Number of board states processed at a time
+
+    Returns:
+        [ndarray]: Structured array of the index and outcome code of each board
+                   state, in index order
+    """
+
+    chunks = []
+    for indices, _, _, outcome_codes in iter_dataset_chunks(
+        filter_name, chunk_size=chunk_size
+    ):
+        chunk = np.empty(len(indices), dtype=DATASET_DTYPE)
+        chunk["index"] = indices
+        chunk["outcome"] = outcome_codes
+        chunks.append(chunk)
+
+    return np.concatenate(chunks)
+
+
+def save_dataset(dataset, file_name):
+    """Writes a dataset to a .npy file.
+
+    Args:
+        dataset [ndarray]: Result of generate_dataset
+        file_name [String]: Name of the file
+    """
+
+    directory = os.path.dirname(file_name)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    temp_file_name = f"{file_name}.{os.getpid()}.tmp"
+    with open(temp_file_name, "wb") as file:
+        np.save(file, dataset)
+    os.replace(temp_file_name, file_name)
+
+
+def load_dataset(file_name):
+    """Memory-maps a dataset file, and checks that it belongs to the configured board.
+
+    Args:
+        file_name [String]: Name of the file
+
+    Returns:
+        [ndarray]: Read-only structured array, as returned by generate_dataset
+    """
+
+    dataset = np.load(file_name, mmap_mode="r")
+
+    if dataset.dtype != DATASET_DTYPE or dataset.ndim != 1:
+        raise ValueError("Invalid dataset file")
+
+    # Indices are in increasing order, so only the last needs checking
+    if len(dataset) and dataset["index"][-1] >= board.BOARD_STATE_COUNT:
+        raise ValueError("Invalid dataset file: dataset is for a larger board")
+
+    return dataset
+
+
+def get_dataset():
+    """Returns the dataset used for training: the file set by TTT_DATASET_FILE,
+    or every board state of the configured board.
+
+    Returns:
+        [ndarray]: Structured array, as returned by generate_dataset
+    """
+
+    if config.DATASET_FILE:
+        return load_dataset(config.DATASET_FILE)
+
+    return generate_dataset()
+
+
+def get_data_frame(dataset):
+    """Converts a dataset into the layout of the dataset csv file: one column of
+    "x", "o" or "b" per square, indexed by the winner.
+
+    Args:
+        dataset [ndarray]: Structured array, as returned by generate_dataset
+
+    Returns:
+        [DataFrame]: The dataset
+    """
+
+    digits = (
+        dataset["index"].astype(np.int64)[:, np.newaxis] // board.PLACE_VALUES
+    ) % 3
+    symbols = np.array(["x", "o", "b"], dtype=object)
+
+    return pd.DataFrame(
+        symbols[digits],
+        index=pd.Index(OUTCOMES[dataset["outcome"]].astype(object), name="winner"),
+        columns=generators.get_board_state_column_names(),
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--filter", choices=list(FILTERS), default="all")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    output_file_name = args.output or file_service.get_dataset_file_name(args.filter)
+    generated_dataset = generate_dataset(args.filter)
+    save_dataset(generated_dataset, output_file_name)
+
+    outcome_counts = np.bincount(generated_dataset["outcome"], minlength=len(OUTCOMES))
+    print(f"[INFO] Saved {len(generated_dataset)} board states to {output_file_name}")
+    for outcome, outcome_count in zip(OUTCOMES, outcome_counts):
+        print(f"[INFO] {outcome}: {outcome_count}")
@@ -0,0 +1,131 @@
+"""
+The encoding service module converts board states directly into the feature
+arrays used by each model, without building intermediate DataFrames.
+
+Features are looked up from the per-mask tables of the board module. The column
+order of each feature layout matches the order produced by the training pipeline
+in training_service.
+"""
+
+import numpy as np
+
+from src.service import board
+
+_SQUARES = board.SQUARE_COUNT
+_AXES = len(board.ADJACENT_PAIRS)
+
+FEATURE_COUNTS = {
+    "1": 3 * _SQUARES,
+    "2": _SQUARES,
+    "3": _SQUARES,
+    "4": _SQUARES,
+    "5": _SQUARES + 2,
+    "6": 2 * _AXES,
+    "7": _SQUARES + 2 * _AXES,
+}
+
+# Name of the feature layout of each model, recorded in saved models so that a
+# model is not evaluated with features it was not trained on. Layouts for boards
+# other than 3x3 are marked with the board's geometry.
+FEATURE_LAYOUTS = {
+    model_number: f"{layout}{board.GEOMETRY_SUFFIX}"
+    for model_number, layout in {
+        "1": "onehot",
+        "2": "ordinal",
+        "3": "ordinal",
+        "4": "ordinal",
+        "5": "ordinal+move_counts",
+        "6": "adjacent_counts",
+        "7": "ordinal+adjacent_counts",
+    }.items()
+}
+
+
+def encode_board(board_state, model_number):
+    """Encodes a single board state for a model.
+
+    Args:
+        board_state [Board]: Validated board state
+        model_number [String]: Integer value corresponding to a ML model.
+
+    Returns:
+        [ndarray]: Array of shape (1, number of features)
+    """
+
+    return encode_masks(
+        np.array([board_state.x_mask]), np.array([board_state.o_mask]), model_number
+    )
+
+
+def encode_boards(boards, model_number):
+    """Encodes a batch of board states for a model.
+
+    Args:
+        boards [Board[]]: List of validated board states
+        model_number [String]: Integer value corresponding to a ML model.
+
+    Returns:
+        [ndarray]: Array of shape (number of board states, number of features)
+    """
+
+    x_masks, o_masks = board.get_masks(boards)
+
+    return encode_masks(x_masks, o_masks, model_number)
+
+
+def encode_board_states(board_states, model_number):
+    """Validates and encodes a batch of board state strings for a model.
+
+    Args:
+        board_states [String[]]: List of board states
+        model_number [String]: Integer value corresponding to a ML model.
+
+    Returns:
+        [ndarray]: Array of shape (number of board states, number of features)
+    """
+
+    boards = [board.Board.from_string(board_state) for board_state in board_states]
+
+    return encode_boards(boards, model_number)
+
+
+def encode_masks(x_masks, o_masks, model_number, dtype=np.float64):
+    """Encodes board states, given as the squares occupied by each player, for a model.
+
+    Args:
+        x_masks [ndarray]: Squares occupied by x for each board state
+        o_masks [ndarray]: Squares occupied by o for each board state
+        model_number [String]: Integer value corresponding to a ML model.
+        dtype [dtype]: Type of the features, e.g. float32 for training
+
+    Returns:
+        [ndarray]: Array of shape (number of board states, number of features)
+    """
+
+    if model_number not in FEATURE_COUNTS:
+        raise ValueError("Invalid model_number")
+
+    features = np.empty((len(x_masks), FEATURE_COUNTS[model_number]), dtype=dtype)
+    x_squares = board.SQUARE_BITS[x_masks]
+    o_squares = board.SQUARE_BITS[o_masks]
+
+    if model_number == "1":
+        # Columns are ordered by square, then by symbol (b, o, x)
+        features[:, 0::3] = 1 - x_squares - o_squares
+        features[:, 1::3] = o_squares
+        features[:, 2::3] = x_squares
+    elif model_number == "5":
+        features[:, :_SQUARES] = x_squares - o_squares
+        features[:, _SQUARES] = board.PIECE_COUNTS[x_masks]
+        features[:, _SQUARES + 1] = board.PIECE_COUNTS[o_masks]
+    elif model_number == "6":
+        features[:, :_AXES] = board.ADJACENT_COUNTS[x_masks]
+        features[:, _AXES:] = board.ADJACENT_COUNTS[o_masks]
+    elif model_number == "7":
+        features[:, :_SQUARES] = x_squares - o_squares
+        features[:, _SQUARES : _SQUARES + _AXES] = board.ADJACENT_COUNTS[x_masks]
+        features[:, _SQUARES + _AXES :] = board.ADJACENT_COUNTS[o_masks]
+    else:
+        features[:] = x_squares - o_squares
+
+    return features
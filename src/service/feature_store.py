@@ -0,0 +1,199 @@
+"""
+The feature store module caches the encoded features and labels of each model's
+training and test sets as .npy files, so that they can be memory-mapped instead
+of re-generating, splitting and encoding the dataset.
+
+The files of the store are grouped by a version identifier made from a hash of
+the dataset and a hash of the feature engineering code. When either changes,
+the store moves to a new directory and the previous one is removed.
+"""
+
+import glob
+import hashlib
+import os
+import shutil
+import threading
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+from src.service import file_service
+
+# Modules whose code determines the contents of the store
+PIPELINE_MODULES = [
+    "training_service.py",
+    "data_service.py",
+    "dataset_generator.py",
+    "encoding_service.py",
+    "generators.py",
+    "board.py",
+    "symmetry.py",
+]
+
+# Arrays which may be stored for a set of features
+ARRAY_NAMES = ["features", "target", "sample_weight"]
+
+_pipeline_hash = None
+
+
+def get_pipeline_hash():
+    """Hashes the code of the feature engineering pipeline, along with the versions
+    of the libraries it depends on.
+
+    Returns:
+        [String]: Hexadecimal SHA-256 hash of the pipeline
+    """
+
+    global _pipeline_hash
+
+    if _pipeline_hash is None:
+        pipeline_hash = hashlib.sha256(
+            f"{np.__version__} {pd.__version__} {sklearn.__version__}".encode()
+        )
+        for module in PIPELINE_MODULES:
+            with open(os.path.join(os.path.dirname(__file__), module), "rb") as file:
+                pipeline_hash.update(file.read())
+
+        _pipeline_hash = pipeline_hash.hexdigest()
+
+    return _pipeline_hash
+
+
+def get_version():
+    """Generates the version identifier of the store for the current dataset
+    and pipeline.
+
+    Returns:
+        [String]: Version identifier
+    """
+
+    return f"{file_service.get_data_hash()[:16]}-{get_pipeline_hash()[:16]}"
+
+
+def get_key(model_number, test=False, symmetry=None, balancing=None):
+    """Generates the identifier of a set of encoded features.
+
+    Args:
+        model_number [String]: Value corresponding to a ML model
+        test [Boolean]: Set as True for the test set
+        symmetry [String]: Handling of symmetric board states, see
+                           training_service.import_data_as_pandas
+        balancing [String]: Balancing of the training set, set as "weight" for
+                            a set balanced by sample weights
+
+    Returns:
+        [String]: Identifier of the features
+    """
+
+    key = f"model_{model_number}_{'test' if test else 'train'}"
+    if symmetry is not None:
+        key = f"{key}_{symmetry}"
+    if balancing == "weight":
+        key = f"{key}_weighted"
+
+    return key
+
+
+def get_feature_files(model_number, test=False, symmetry=None, balancing=None):
+    """Returns the files holding a set of encoded features, if they are stored.
+
+    Args:
+        model_number [String]: Value corresponding to a ML model
+        test [Boolean]: Set as True for the test set
+        symmetry [String]: Handling of symmetric board states
+        balancing [String]: Balancing of the training set, see get_key
+
+    Returns:
+        [Dictionary]: Array name => file name, or None if the features are not stored
+    """
+
+    version = get_version()
+    key = get_key(model_number, test, symmetry, balancing)
+
+    file_names = {}
+    for array_name in ARRAY_NAMES:
+        file_name = file_service.get_feature_file_name(version, key, array_name)
+        if os.path.exists(file_name):
+            file_names[array_name] = file_name
+
+    if "features" not in file_names or "target" not in file_names:
+        return None
+
+    return file_names
+
+
+def load_features(model_number, test=False, symmetry=None, balancing=None):
+    """Memory-maps a set of encoded features from the store.
+
+    Args:
+        model_number [String]: Value corresponding to a ML model
+        test [Boolean]: Set as True for the test set
+        symmetry [String]: Handling of symmetric board states
+        balancing [String]: Balancing of the training set, see get_key
+
+    Returns:
+        [Dictionary]: Array name => read-only array, or None if the features are
+                      not stored
+    """
+
+    file_names = get_feature_files(model_number, test, symmetry, balancing)
+    if file_names is None:
+        return None
+
+    return {
+        array_name: np.load(file_name, mmap_mode="r")
+        for array_name, file_name in file_names.items()
+    }
+
+
+def save_features(model_number, arrays, test=False, symmetry=None, balancing=None):
+    """Writes a set of encoded features to the store. Directories belonging to
+    previous versions of the store are removed.
+
+    Args:
+        model_number [String]: Value corresponding to a ML model
+        arrays [Dictionary]: Array name => array, for names in ARRAY_NAMES. Must
+                             include "features" and "target", which are written
+                             last so that the set only becomes visible once it
+                             is complete.
+        test [Boolean]: Set as True for the test set
+        symmetry [String]: Handling of symmetric board states
+        balancing [String]: Balancing of the training set, see get_key
+
+    Returns:
+        [Dictionary]: Array name => file name
+    """
+
+    version = get_version()
+    key = get_key(model_number, test, symmetry, balancing)
+    directory = file_service.get_feature_directory(version)
+    os.makedirs(directory, exist_ok=True)
+
+    file_names = {}
+    for array_name in sorted(arrays, key=lambda name: name in ["features", "target"]):
+        file_name = file_service.get_feature_file_name(version, key, array_name)
+        temp_file_name = f"{file_name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_file_name, "wb") as file:
+            np.save(file, arrays[array_name])
+        os.replace(temp_file_name, file_name)
+        file_names[array_name] = file_name
+
+    remove_stale_versions(version)
+
+    return file_names
+
+
+def remove_stale_versions(version):
+    """Deletes the directories of the store which do not belong to the given version.
+
+    Args:
+        version [String]: Version of the store to keep
+    """
+
+    current_directory = file_service.get_feature_directory(version)
+    pattern = file_service.get_feature_directory("*")
+
+    for directory in glob.glob(pattern):
+        if directory != current_directory:
+            shutil.rmtree(directory, ignore_errors=True)
@@ -2,11 +2,24 @@
 The file service module contains the logic for handling the saving/loading of models to/from files
 """
 
+import hashlib
+import os
 import pickle
+import threading
+from typing import Dict, Tuple
+
+import numpy as np
+
+from src.service import board, config, forest_engine, model_artifact
+
+# (file name, modification time, size) => hash of the contents
+_data_hashes: Dict[Tuple[str, int, int], str] = {}
+_data_hashes_lock = threading.Lock()
 
 
 def save_model_to_file(model, model_number):
-    """Saves a model object to a file using pickle.
+    """Saves a model object to a file. Files with a .pkl extension are written
+    using pickle, and any others as a model artifact (see model_artifact).
 
     Args:
         model: SKLearn model to be saved
@@ -14,29 +27,186 @@ def save_model_to_file(model, model_number):
 
     file_name = get_file_name(model_number)
 
-    with open(file_name, "wb") as file:
-        pickle.dump(model, file)
+    if file_name.endswith(".pkl"):
+        with open(file_name, "wb") as file:
+            pickle.dump(model, file)
+    else:
+        model_artifact.save_model(model, model_number, file_name, get_data_hash())
 
 
 def load_model_from_file(model_number):
-    """Loads a pre-trained model object using pickle.
+    """Loads a pre-trained model object. Files with a .pkl extension are read using
+    pickle, and any others are memory-mapped as a model artifact.
 
     Args:
         model_number: Integer value corresponding to a ML model
 
     Returns:
-        model: SKLearn model"""
+        model: SKLearn model, or CompiledForest for a model artifact"""
 
     file_name = get_file_name(model_number)
 
-    with open(file_name, "rb") as file:
+    if file_name.endswith(".pkl"):
+        with open(file_name, "rb") as file:
+            model = pickle.load(file)
+    else:
+        model = model_artifact.load_model(file_name, model_number)
+
+    return model
+
+
+def load_estimator_from_file(model_number):
+    """Loads the SKLearn model of a model number, e.g. to retrain it incrementally.
+    A model artifact only holds the compiled trees of a forest, so the model is
+    read from its pickle file, which must hold the same trees as the artifact.
+
+    Args:
+        model_number: Integer value corresponding to a ML model
+
+    Returns:
+        model: SKLearn model"""
+
+    with open(get_pickle_file_name(model_number), "rb") as file:
         model = pickle.load(file)
 
+    file_name = get_file_name(model_number)
+    if not file_name.endswith(".pkl"):
+        artifact = model_artifact.load_model(file_name, model_number)
+        compiled_model = forest_engine.compile_forest(model)
+        for name in model_artifact.ARRAYS:
+            if not np.array_equal(
+                getattr(artifact, name), getattr(compiled_model, name)
+            ):
+                raise ValueError("Pickle file does not match the model file")
+
     return model
 
 
+def save_estimator_to_file(model, model_number):
+    """Saves the SKLearn model of a model number to its pickle file, from which
+    load_estimator_from_file reads it, whichever format the model is used in.
+
+    Args:
+        model: SKLearn model to be saved
+        model_number: Integer value corresponding to a ML model"""
+
+    file_name = get_pickle_file_name(model_number)
+    temp_file_name = f"{file_name}.{os.getpid()}.tmp"
+    with open(temp_file_name, "wb") as file:
+        pickle.dump(model, file)
+    os.replace(temp_file_name, file_name)
+
+
+def save_model_files(model, model_number):
+    """Saves a model to its model file and, unless the model file is already its
+    pickle file, to the pickle file read by load_estimator_from_file.
+
+    Args:
+        model: SKLearn model to be saved
+        model_number: Integer value corresponding to a ML model"""
+
+    save_model_to_file(model, model_number)
+    if config.MODEL_FORMAT != "pickle":
+        save_estimator_to_file(model, model_number)
+
+
+def convert_model_files(model_numbers=None):
+    """Saves the pickled models as model artifacts.
+
+    Args:
+        model_numbers [String[]]: Models to convert, all models by default
+
+    Returns:
+        [String[]]: File names of the model artifacts"""
+
+    file_names = []
+    for model_number in model_numbers or ["1", "2", "3", "4", "5", "6", "7"]:
+        with open(get_pickle_file_name(model_number), "rb") as file:
+            model = pickle.load(file)
+
+        file_name = get_artifact_file_name(model_number)
+        model_artifact.save_model(model, model_number, file_name, get_data_hash())
+        file_names.append(file_name)
+
+    return file_names
+
+
+def get_model_version(model_number):
+    """Generates a version identifier for the file of a model. The identifier
+    changes whenever the file is re-written.
+
+    Args:
+        model_number: Integer value corresponding to a ML model
+
+    Returns:
+        version: Version identifier as a string"""
+
+    file_stats = os.stat(get_file_name(model_number))
+    version = f"{file_stats.st_mtime_ns:x}-{file_stats.st_size:x}"
+
+    return version
+
+
+def get_model_size(model_number):
+    """Returns the size of the file of a model.
+
+    Args:
+        model_number: Integer value corresponding to a ML model
+
+    Returns:
+        size: File size in bytes"""
+
+    size = os.path.getsize(get_file_name(model_number))
+
+    return size
+
+
 def get_file_name(model_number):
-    """Generates a file name corresponding to a model.
+    """Generates a file name corresponding to a model, in the format chosen by
+    the TTT_MODEL_FORMAT setting.
+
+    Args:
+        model_number: Integer value corresponding to a ML model
+
+    Returns:
+        file_name: File name as a string"""
+
+    if config.MODEL_FORMAT == "pickle":
+        return get_pickle_file_name(model_number)
+
+    return get_artifact_file_name(model_number)
+
+
+def get_pickle_file_name(model_number):
+    """Generates the file name of a model saved using pickle.
+
+    Args:
+        model_number: Integer value corresponding to a ML model
+
+    Returns:
+        file_name: File name as a string"""
+
+    file_name = f"models/model_{str(model_number)}{board.GEOMETRY_SUFFIX}.pkl"
+
+    return file_name
+
+
+def get_artifact_file_name(model_number):
+    """Generates the file name of a model saved as a model artifact.
+
+    Args:
+        model_number: Integer value corresponding to a ML model
+
+    Returns:
+        file_name: File name as a string"""
+
+    file_name = f"models/model_{str(model_number)}{board.GEOMETRY_SUFFIX}.forest"
+
+    return file_name
+
+
+def get_evaluation_file_name(model_number):
+    """Generates the file name of the stored evaluation of a model.
 
     Args:
         model_number: Integer value corresponding to a ML model
@@ -44,6 +214,178 @@ def get_file_name(model_number):
     Returns:
         file_name: File name as a string"""
 
-    file_name = f"models/model_{str(model_number)}.pkl"
+    file_name = (
+        f"models/model_{str(model_number)}{board.GEOMETRY_SUFFIX}_evaluation.json"
+    )
+
+    return file_name
+
+
+def get_table_file_name(model_number, version):
+    """Generates a file name corresponding to the answer table of a model version.
+
+    Args:
+        model_number: Integer value corresponding to a ML model
+        version: Version identifier of the model file
+
+    Returns:
+        file_name: File name as a string"""
+
+    file_name = (
+        f"models/tables/model_{str(model_number)}{board.GEOMETRY_SUFFIX}_{version}.npy"
+    )
+
+    return file_name
+
+
+def get_data_file_name():
+    """Returns the file name of the dataset.
+
+    Returns:
+        file_name: File name as a string, or an empty string if the dataset is
+                   generated rather than read from a file"""
+
+    return config.DATASET_FILE
+
+
+def get_dataset_file_name(filter_name):
+    """Generates the file name of a dataset written by the dataset generator.
+
+    Args:
+        filter_name: Name of the filter applied to the board states
+
+    Returns:
+        file_name: File name as a string"""
+
+    file_name = f"models/datasets/dataset{board.GEOMETRY_SUFFIX}_{filter_name}.npy"
 
     return file_name
+
+
+def get_data_hash():
+    """Hashes the dataset. A dataset file is hashed by its contents, which are
+    only re-hashed when the file is modified. A generated dataset is identified
+    by the board's geometry. Boards other than 3x3 are trained on a sample of the
+    dataset, so the sample rate is included for them.
+
+    Returns:
+        hash: Hexadecimal SHA-256 hash"""
+
+    file_name = get_data_file_name()
+    if file_name:
+        data_hash = _get_file_hash(file_name)
+    else:
+        description = f"generated_{board.SIZE}x{board.SIZE}_k{board.WIN_LENGTH}"
+        data_hash = hashlib.sha256(description.encode()).hexdigest()
+
+    if board.GEOMETRY_SUFFIX:
+        sampled_description = f"{data_hash}-{config.DATASET_SAMPLE_RATE!r}"
+        data_hash = hashlib.sha256(sampled_description.encode()).hexdigest()
+
+    return data_hash
+
+
+def _get_file_hash(file_name):
+    """Hashes the contents of a file, unless they are unchanged since the last call"""
+
+    file_stats = os.stat(file_name)
+    key = (file_name, file_stats.st_mtime_ns, file_stats.st_size)
+
+    with _data_hashes_lock:
+        if key in _data_hashes:
+            return _data_hashes[key]
+
+    with open(file_name, "rb") as file:
+        data_hash = hashlib.sha256(file.read()).hexdigest()
+
+    with _data_hashes_lock:
+        _data_hashes.clear()
+        _data_hashes[key] = data_hash
+
+    return data_hash
+
+
+def get_feature_directory(version):
+    """Generates the directory of the feature store for a version of the dataset
+    and feature engineering pipeline.
+
+    Args:
+        version: Version identifier of the dataset and pipeline
+
+    Returns:
+        directory: Directory name as a string"""
+
+    directory = f"models/features/{version}"
+
+    return directory
+
+
+def get_feature_file_name(version, key, array_name):
+    """Generates a file name corresponding to an array of the feature store.
+
+    Args:
+        version: Version identifier of the dataset and pipeline
+        key: Identifier of a set of encoded features, see feature_store
+        array_name: Name of the array, e.g. "features" or "target"
+
+    Returns:
+        file_name: File name as a string"""
+
+    file_name = f"{get_feature_directory(version)}/{key}_{array_name}.npy"
+
+    return file_name
+
+
+def get_search_directory(version):
+    """Generates the directory of the hyper-parameter search cache for a version
+    of the dataset and feature engineering pipeline.
+
+    Args:
+        version: Version identifier of the dataset and pipeline
+
+    Returns:
+        directory: Directory name as a string"""
+
+    directory = f"models/search/{version}"
+
+    return directory
+
+
+def get_search_cache_file_name(version, key):
+    """Generates a file name corresponding to the cached cross validation scores
+    of a set of features.
+
+    Args:
+        version: Version identifier of the dataset and pipeline
+        key: Identifier of a set of encoded features, see feature_store
+
+    Returns:
+        file_name: File name as a string"""
+
+    file_name = f"{get_search_directory(version)}/{key}_scores.json"
+
+    return file_name
+
+
+def get_job_directory():
+    """Returns the directory holding the status of background jobs, which is
+    shared by the worker processes of the server.
+
+    Returns:
+        directory: Directory name as a string"""
+
+    return "models/jobs"
+
+
+def get_profile_directory():
+    """Returns the directory holding the profiles of sampled requests.
+
+    Returns:
+        directory: Directory name as a string"""
+
+    return "models/profiles"
+
+
+if __name__ == "__main__":
+    for converted_file_name in convert_model_files():
+        print(f"[INFO] Saved {converted_file_name}")
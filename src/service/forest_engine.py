@@ -0,0 +1,246 @@
+"""
+The forest engine module evaluates random forest models without calling
+scikit-learn's predict, which spends most of its time on input validation and
+dispatching each tree when predicting a small number of rows.
+
+The trees of a forest are flattened into contiguous arrays, and every tree is
+walked for a whole batch of rows at once. The predictions are identical to those
+of the model's predict method: each tree's leaf class probabilities are summed
+in the same order and with the same precision as scikit-learn, before taking
+the most probable class.
+"""
+
+import threading
+import weakref
+from typing import Any, Optional
+
+import numpy as np
+from sklearn import ensemble
+
+TREE_LEAF = -1  # Child of a leaf node in a scikit-learn tree
+
+# model => CompiledForest, or None if the model cannot be compiled
+_engines: "weakref.WeakKeyDictionary[Any, Optional[CompiledForest]]"
+_engines = weakref.WeakKeyDictionary()
+_engines_lock = threading.Lock()
+
+
+class CompiledForest:
+    """A random forest flattened into arrays of nodes.
+
+    Nodes are numbered consecutively across all of the trees. Leaf nodes are
+    their own children, so a row which reaches a leaf stays there.
+
+    Args:
+        feature [ndarray]: Feature tested at each node
+        threshold [ndarray]: Threshold tested at each node, rows whose feature is
+                             less than or equal to it go to the left child
+        left [ndarray]: Left child of each node
+        right [ndarray]: Right child of each node
+        leaf_index [ndarray]: Row of leaf_proba holding each leaf node's class
+                              probabilities (0 for other nodes)
+        leaf_proba [ndarray]: Class probabilities of each leaf, of shape
+                              (number of leaves, number of classes)
+        roots [ndarray]: Root node of each tree
+        max_depth [Integer]: Depth of the deepest tree
+        classes [ndarray]: Class labels of the forest
+        metadata [Dictionary]: Optional description of the model, see model_artifact
+    """
+
+    def __init__(
+        self,
+        feature,
+        threshold,
+        left,
+        right,
+        leaf_index,
+        leaf_proba,
+        roots,
+        max_depth,
+        classes,
+        metadata=None,
+    ):
+        # The arrays are kept as they are, rather than converted to intp, so that
+        # those of a model artifact stay memory-mapped and shared between workers
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.leaf_index = leaf_index
+        self.leaf_proba = leaf_proba
+        self.roots = roots
+        self.max_depth = max_depth
+        self.classes = classes
+        self.metadata = metadata or {}
+
+    @property
+    def n_trees(self):
+        """Number of trees in the forest"""
+        return len(self.roots)
+
+    @property
+    def nbytes(self):
+        """Size of the forest's arrays in bytes"""
+        return sum(
+            array.nbytes
+            for array in [
+                self.feature,
+                self.threshold,
+                self.left,
+                self.right,
+                self.leaf_index,
+                self.leaf_proba,
+                self.roots,
+            ]
+        )
+
+    def apply(self, user_inputs):
+        """Finds the leaf reached by each row in each tree.
+
+        Args:
+            user_inputs [ndarray]: Array of shape (number of rows, number of features)
+
+        Returns:
+            [ndarray]: Leaf node of shape (number of trees, number of rows)
+        """
+
+        # The trees compare float32 features against float64 thresholds
+        user_inputs = np.asarray(user_inputs, dtype=np.float32)
+        rows = np.arange(len(user_inputs))
+        nodes = np.repeat(self.roots[:, np.newaxis], len(user_inputs), axis=1)
+
+        for _ in range(self.max_depth):
+            go_left = user_inputs[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+
+        return nodes
+
+    def predict_proba(self, user_inputs):
+        """Predicts the class probabilities of each row.
+
+        Args:
+            user_inputs [ndarray]: Array of shape (number of rows, number of features)
+
+        Returns:
+            [ndarray]: Array of shape (number of rows, number of classes)
+        """
+
+        leaves = self.apply(user_inputs)
+
+        # Sum one tree at a time, as scikit-learn does, so that the result is
+        # rounded in the same way
+        proba = np.zeros((leaves.shape[1], len(self.classes)))
+        for tree_leaves in leaves:
+            proba += self.leaf_proba[self.leaf_index[tree_leaves]]
+        proba /= self.n_trees
+
+        return proba
+
+    def predict(self, user_inputs):
+        """Predicts the class of each row.
+
+        Args:
+            user_inputs [ndarray]: Array of shape (number of rows, number of features)
+
+        Returns:
+            [ndarray]: Predicted class label of each row
+        """
+
+        return self.classes.take(np.argmax(self.predict_proba(user_inputs), axis=1))
+
+
+def compile_forest(model):
+    """Flattens the trees of a random forest classifier into a CompiledForest.
+
+    Args:
+        model: SKLearn random forest classifier, or a search (e.g. GridSearchCV)
+               whose best estimator is one
+
+    Returns:
+        [CompiledForest]: The compiled forest
+    """
+
+    forest = getattr(model, "best_estimator_", model)
+    if not isinstance(forest, ensemble.RandomForestClassifier):
+        raise ValueError("Model is not a random forest classifier")
+    if forest.n_outputs_ != 1:
+        raise ValueError("Model has more than one output")
+
+    features = []
+    thresholds = []
+    lefts = []
+    rights = []
+    leaf_indices = []
+    leaf_probas = []
+    roots = []
+    node_count = 0
+    leaf_count = 0
+
+    for estimator in forest.estimators_:
+        tree_ = estimator.tree_
+        nodes = np.arange(tree_.node_count)
+        is_leaf = tree_.children_left == TREE_LEAF
+
+        # Normalise the leaf class counts into probabilities, as the tree's
+        # predict_proba does
+        value = tree_.value[is_leaf, 0, : len(forest.classes_)]
+        normalizer = value.sum(axis=1)[:, np.newaxis]
+        normalizer[normalizer == 0.0] = 1.0
+
+        leaf_index = np.zeros(tree_.node_count, dtype=np.intp)
+        leaf_index[is_leaf] = leaf_count + np.arange(is_leaf.sum())
+
+        roots.append(node_count)
+        features.append(np.where(is_leaf, 0, tree_.feature))
+        thresholds.append(tree_.threshold)
+        lefts.append(node_count + np.where(is_leaf, nodes, tree_.children_left))
+        rights.append(node_count + np.where(is_leaf, nodes, tree_.children_right))
+        leaf_indices.append(leaf_index)
+        leaf_probas.append(value / normalizer)
+        node_count += tree_.node_count
+        leaf_count += len(value)
+
+    return CompiledForest(
+        feature=np.concatenate(features),
+        threshold=np.concatenate(thresholds).astype(np.float64),
+        left=np.concatenate(lefts),
+        right=np.concatenate(rights),
+        leaf_index=np.concatenate(leaf_indices),
+        leaf_proba=np.concatenate(leaf_probas).astype(np.float64),
+        roots=np.array(roots),
+        max_depth=max(estimator.tree_.max_depth for estimator in forest.estimators_),
+        classes=forest.classes_,
+    )
+
+
+def get_engine(model):
+    """Returns the compiled forest of a model, compiling it on first use. The
+    compiled forest is kept for as long as the model is.
+
+    Args:
+        model: SKLearn model, or a CompiledForest which is returned as it is
+
+    Returns:
+        [CompiledForest]: The compiled forest, or None if the model cannot be
+                          compiled
+    """
+
+    if isinstance(model, CompiledForest):
+        return model
+
+    with _engines_lock:
+        if model in _engines:
+            return _engines[model]
+
+    try:
+        engine = compile_forest(model)
+    except ValueError:
+        engine = None
+
+    try:
+        with _engines_lock:
+            _engines[model] = engine
+    except TypeError:
+        pass  # The model cannot be weakly referenced, so is compiled on every use
+
+    return engine
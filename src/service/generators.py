@@ -1,39 +1,61 @@
-def get_onehot_column_names():
+from src.service import board
+
+
+def get_square_names(size=None):
+    """Returns the name of each square of a board, from top-left to bottom-right.
+    The squares of a 3x3 board are named by position, e.g. "top-left", and those
+    of other boards by row and column, e.g. "row1-column1".
+
+    Args:
+        size [Integer]: Width of the board, TTT_BOARD_SIZE by default
+
+    Returns:
+        [String[]]: List of square names
+    """
+
+    size = size or board.SIZE
+
+    if size == 3:
+        v_positions = ["top", "middle", "bottom"]  # All possible vertical positions
+        h_positions = ["left", "middle", "right"]  # All possible horizontal positions
+    else:
+        v_positions = [f"row{y + 1}" for y in range(size)]
+        h_positions = [f"column{x + 1}" for x in range(size)]
+
+    return [f"{y}-{x}" for y in v_positions for x in h_positions]
+
+
+def get_onehot_column_names(size=None):
     """Returns a set of column names corresponding to a onehot encoded board state.
 
+    Args:
+        size [Integer]: Width of the board, TTT_BOARD_SIZE by default
+
     Returns:
         [String[]]: List of column names
     """
 
-    v_positions = ["top", "middle", "bottom"]  # All possible vertical positions
-    h_positions = ["left", "middle", "right"]  # All possible horizontal positions
     players = ["x", "o", "b"]  # All possible players (including blanks)
     column_names = []
 
     for p in players:
-        for y in v_positions:
-            for x in h_positions:
-                column_names.append(f"{y}-{x}-square_{p}")
+        for square_name in get_square_names(size):
+            column_names.append(f"{square_name}-square_{p}")
 
     return column_names
 
 
-def get_board_state_column_names():
+def get_board_state_column_names(size=None):
     """Returns a set of column names corresponding to a board state input.
 
+    Args:
+        size [Integer]: Width of the board, TTT_BOARD_SIZE by default
+
     Returns:
         [String[]]: List of column names
     """
 
-    v_positions = ["top", "middle", "bottom"]  # All possible vertical positions
-    h_positions = ["left", "middle", "right"]  # All possible horizontal positions
-    column_names = []
-
-    for y in v_positions:
-        for x in h_positions:
-            column_names.append(f"{y}-{x}-square")
-
-    return column_names
+    return [f"{square_name}-square" for square_name in get_square_names(size)]
 
 
 def get_param_grid():
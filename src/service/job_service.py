@@ -0,0 +1,425 @@
+"""
+The job service module runs long tasks, such as training a model, in background
+threads so that the requests which start them return immediately. Each job is
+given an id which can be used to poll its status.
+
+When the service runs in several worker processes, the status of each job is
+also written to a file in a shared directory, so that it can be polled through
+any worker, and a lock file is held for each active key so that a key only has
+one active job across all of the workers.
+
+A job may also name the resources it writes (e.g. the files of the models it
+trains). Jobs whose resources overlap, such as training every model and training
+one of them, are run one after the other, in this process and across workers.
+"""
+
+import fcntl
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent import futures
+
+from src.service import config, file_service
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class JobManager:
+    """Thread-safe runner and record of background jobs.
+
+    Jobs are identified by a key (e.g. a model number), and only one job may be
+    active for a key at a time. Submitting a job for a key which already has a
+    queued or running job returns the id of the existing job instead. A job
+    stays queued until no other job holds any of its resources.
+
+    Args:
+        max_workers [Integer]: Number of jobs which may run at the same time
+        max_finished_jobs [Integer]: Number of finished jobs whose status is kept
+        directory [String]: Directory shared with the job managers of other
+                            processes, or None to keep the jobs in memory only
+    """
+
+    def __init__(self, max_workers, max_finished_jobs, directory=None):
+        self.max_finished_jobs = max_finished_jobs
+        self.directory = directory
+
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+        self._executor = futures.ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="job"
+        )
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()  # job_id => job
+        self._active_jobs = {}  # key => job_id
+        self._lock_files = {}  # key => open lock file of an active job
+        self._resource_locks = {}  # resource => lock held by the job using it
+
+    def submit(self, key, function, resources=None):
+        """Runs a function in the background, unless a job with the same key is
+        already queued or running.
+
+        Args:
+            key [String]: Identifier of the work done by the job
+            function [Function]: Called as function(progress), where
+                                 progress(stage, **details) records the current
+                                 stage of the job. Its return value is recorded
+                                 as the result of the job.
+            resources [String[]]: Identifiers of what the job writes, which only
+                                  one job may hold at a time. The key by default.
+
+        Returns:
+            [String]: Id of the job
+        """
+
+        resources = sorted({str(resource) for resource in resources or [key]})
+
+        with self._lock:
+            if key in self._active_jobs:
+                return self._active_jobs[key]
+
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                "job_id": job_id,
+                "key": key,
+                "status": QUEUED,
+                "stage": None,
+                "details": {},
+                "submitted_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+                "result": None,
+                "error": None,
+                "resources": resources,
+            }
+
+            if self.directory is not None:
+                # The status file is written before the lock is taken, so that
+                # the job can be polled as soon as another process finds it
+                self._write_job(job_id)
+                active_job_id = self._lock_key(key, job_id)
+                if active_job_id is not None:
+                    del self._jobs[job_id]
+                    self._remove_job_file(job_id)
+                    return active_job_id
+
+            self._active_jobs[key] = job_id
+
+        self._executor.submit(self._run, job_id, function)
+
+        return job_id
+
+    def get_job(self, job_id):
+        """Returns the status of a job.
+
+        Args:
+            job_id [String]: Id of the job
+
+        Returns:
+            [Dictionary]: Copy of the job's status, including the seconds elapsed
+                          since it started, or None if the job does not exist
+        """
+
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                status = dict(job, details=dict(job["details"]))
+
+        if job is None:
+            status = self._read_job(job_id)
+            if status is None:
+                return None
+
+        if status["started_at"] is None:
+            status["elapsed_seconds"] = 0.0
+        else:
+            finished_at = status["finished_at"] or time.time()
+            status["elapsed_seconds"] = finished_at - status["started_at"]
+
+        return status
+
+    def get_counts(self):
+        """Counts the jobs held by this job manager.
+
+        Returns:
+            [Dictionary]: Status => number of jobs
+        """
+
+        counts = dict.fromkeys([QUEUED, RUNNING, SUCCEEDED, FAILED], 0)
+        with self._lock:
+            for job in self._jobs.values():
+                counts[job["status"]] += 1
+
+        return counts
+
+    def wait(self, job_id, timeout=None):
+        """Blocks until a job has finished.
+
+        Args:
+            job_id [String]: Id of the job
+            timeout [Float]: Maximum number of seconds to wait
+
+        Returns:
+            [Dictionary]: Status of the job
+        """
+
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            status = self.get_job(job_id)
+            if status is None or status["status"] in [SUCCEEDED, FAILED]:
+                return status
+            if deadline is not None and time.time() >= deadline:
+                return status
+            time.sleep(0.05)
+
+    def _run(self, job_id, function):
+        """Executes a job in a worker thread and records its outcome"""
+
+        def progress(stage, **details):
+            with self._lock:
+                self._jobs[job_id]["stage"] = stage
+                self._jobs[job_id]["details"] = details
+                self._write_job(job_id)
+
+        with self._lock:
+            resources = self._jobs[job_id]["resources"]
+        resource_locks, lock_files = self._acquire_resources(resources)
+
+        try:
+            with self._lock:
+                self._jobs[job_id]["status"] = RUNNING
+                self._jobs[job_id]["started_at"] = time.time()
+                self._write_job(job_id)
+
+            try:
+                result = function(progress)
+                outcome = {"status": SUCCEEDED, "result": result}
+            except Exception as error:
+                outcome = {
+                    "status": FAILED,
+                    "error": str(error) or type(error).__name__,
+                }
+        finally:
+            self._release_resources(resource_locks, lock_files)
+
+        with self._lock:
+            job = self._jobs[job_id]
+            job.update(outcome, finished_at=time.time())
+            self._write_job(job_id)
+            self._unlock_key(job["key"])
+            del self._active_jobs[job["key"]]
+            self._remove_finished_jobs()
+
+    def shutdown(self, wait=True):
+        """Stops accepting jobs.
+
+        Args:
+            wait [Boolean]: Set as True to block until the queued and running jobs
+                            have finished
+        """
+
+        self._executor.shutdown(wait=wait)
+
+    def _remove_finished_jobs(self):
+        """Forgets the oldest finished jobs, beyond max_finished_jobs.
+        Must be called while holding the lock."""
+
+        finished_job_ids = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job["status"] in [SUCCEEDED, FAILED]
+        ]
+        for job_id in finished_job_ids[: -self.max_finished_jobs or None]:
+            del self._jobs[job_id]
+            self._remove_job_file(job_id)
+
+    def _get_job_file_name(self, job_id):
+        """Returns the status file of a job, or None if the id is not a job id"""
+
+        if self.directory is None or not re.fullmatch("[0-9a-f]{32}", job_id):
+            return None
+
+        return os.path.join(self.directory, f"{job_id}.json")
+
+    def _write_job(self, job_id):
+        """Writes the status of a job to its file. Must be called while holding
+        the lock."""
+
+        file_name = self._get_job_file_name(job_id)
+        if file_name is None:
+            return
+
+        temp_file_name = f"{file_name}.{os.getpid()}.tmp"
+        with open(temp_file_name, "w") as file:
+            json.dump(self._jobs[job_id], file, default=str)
+        os.replace(temp_file_name, file_name)
+
+    def _read_job(self, job_id):
+        """Reads the status of a job written by any process, or None if it is
+        not found"""
+
+        file_name = self._get_job_file_name(job_id)
+        if file_name is None:
+            return None
+
+        try:
+            with open(file_name) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def _remove_job_file(self, job_id):
+        """Deletes the status file of a job"""
+
+        file_name = self._get_job_file_name(job_id)
+        if file_name is None:
+            return
+
+        try:
+            os.remove(file_name)
+        except FileNotFoundError:
+            pass
+
+    def _lock_key(self, key, job_id):
+        """Takes the lock file of a key for a job, unless another process holds
+        it. The lock is released by the operating system if the process holding
+        it exits.
+
+        Returns:
+            [String]: Id of the active job holding the lock, or None if the lock
+                      was taken
+        """
+
+        lock_file = open(os.path.join(self.directory, f"{key}.lock"), "a+")
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                lock_file.seek(0)
+                active_job_id = lock_file.read()
+                if active_job_id:
+                    lock_file.close()
+                    return active_job_id
+
+                # The lock is being taken or released by another process
+                time.sleep(0.01)
+                continue
+
+            lock_file.truncate(0)
+            lock_file.write(job_id)
+            lock_file.flush()
+            self._lock_files[key] = lock_file
+
+            return None
+
+    def _acquire_resources(self, resources):
+        """Blocks until the job holds every one of its resources. They are taken
+        in sorted order, so that jobs waiting for each other cannot deadlock. A
+        lock file is also held for each resource when the directory is shared.
+
+        Returns:
+            [Lock[]]: The locks held, to be released
+            [File[]]: The lock files held, to be released
+        """
+
+        resource_locks = []
+        lock_files = []
+        for resource in resources:
+            with self._lock:
+                resource_lock = self._resource_locks.setdefault(
+                    resource, threading.Lock()
+                )
+            resource_lock.acquire()
+            resource_locks.append(resource_lock)
+
+            if self.directory is not None:
+                lock_file = open(
+                    os.path.join(self.directory, f"resource-{resource}.lock"), "a"
+                )
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                lock_files.append(lock_file)
+
+        return resource_locks, lock_files
+
+    def _release_resources(self, resource_locks, lock_files):
+        """Releases the locks and lock files of a job's resources"""
+
+        for lock_file in lock_files:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+            lock_file.close()
+        for resource_lock in resource_locks:
+            resource_lock.release()
+
+    def _unlock_key(self, key):
+        """Releases the lock file of a key, if this process holds it"""
+
+        lock_file = self._lock_files.pop(key, None)
+        if lock_file is None:
+            return
+
+        lock_file.truncate(0)
+        lock_file.flush()
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+        lock_file.close()
+
+
+jobs = JobManager(
+    config.JOB_WORKERS,
+    config.JOB_HISTORY,
+    file_service.get_job_directory() if config.WORKERS > 1 else None,
+)
+
+
+def submit_job(key, function, resources=None):
+    """Runs a function in the background using the shared job manager.
+
+    Args:
+        key [String]: Identifier of the work done by the job
+        function [Function]: Called as function(progress)
+        resources [String[]]: Identifiers of what the job writes, the key by default
+
+    Returns:
+        [String]: Id of the job"""
+
+    return jobs.submit(key, function, resources)
+
+
+def get_job(job_id):
+    """Returns the status of a job from the shared job manager.
+
+    Args:
+        job_id [String]: Id of the job
+
+    Returns:
+        [Dictionary]: Status of the job, or None if the job does not exist"""
+
+    return jobs.get_job(job_id)
+
+
+def get_job_counts():
+    """Counts the jobs of the shared job manager.
+
+    Returns:
+        [Dictionary]: Status => number of jobs"""
+
+    return jobs.get_counts()
+
+
+def wait(job_id, timeout=None):
+    """Blocks until a job of the shared job manager has finished.
+
+    Args:
+        job_id [String]: Id of the job
+        timeout [Float]: Maximum number of seconds to wait
+
+    Returns:
+        [Dictionary]: Status of the job"""
+
+    return jobs.wait(job_id, timeout)
@@ -0,0 +1,321 @@
+"""
+The metrics service module records the latency of each request, and of each
+stage of handling it, in fixed-bucket histograms labelled by route and model
+number. The histograms, along with the counters of the model registry, the
+response cache and the background jobs, are exposed in the Prometheus text format.
+
+Recording a value only takes a clock read, a bisection of the bucket bounds and
+an increment, so the metrics are always enabled. The metrics of each worker
+process (see server) are held separately.
+"""
+
+import bisect
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from src.service import answer_tables, job_service, model_registry, response_cache
+
+# Upper bounds (in seconds) of the latency histogram buckets
+BUCKETS = (
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+REQUEST_METRIC = "ttt_request_duration_seconds"
+STAGE_METRIC = "ttt_stage_duration_seconds"
+
+METRIC_HELP = {
+    REQUEST_METRIC: "Time taken to handle a request",
+    STAGE_METRIC: "Time taken by each stage of handling a request",
+}
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Label value of requests which are not for a model, or not handled by a route
+NO_LABEL = "none"
+
+# (metric, labels) => [bucket counts..., +Inf count, sum]
+_histograms: Dict[Tuple[str, Tuple], List[float]] = {}
+_histograms_lock = threading.Lock()
+_request_context = threading.local()
+
+
+def observe(metric, seconds, labels):
+    """Records a duration in a histogram.
+
+    Args:
+        metric [String]: Name of the histogram
+        seconds [Float]: Duration to record
+        labels [Tuple]: (name, value) pairs identifying the histogram's series
+    """
+
+    bucket = bisect.bisect_left(BUCKETS, seconds)
+    key = (metric, labels)
+
+    with _histograms_lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = [0] * (len(BUCKETS) + 1) + [0.0]
+        histogram[bucket] += 1
+        histogram[-1] += seconds
+
+
+def start_request(route):
+    """Starts timing a request handled by the current thread.
+
+    Args:
+        route [String]: Route of the request, e.g. "/get-prediction/<board_state>/<model_number>"
+    """
+
+    _request_context.route = route
+    _request_context.model_number = NO_LABEL
+    _request_context.start_time = time.perf_counter()
+
+
+def end_request():
+    """Records the duration of the request handled by the current thread"""
+
+    start_time = getattr(_request_context, "start_time", None)
+    if start_time is None:
+        return
+
+    observe(
+        REQUEST_METRIC,
+        time.perf_counter() - start_time,
+        (
+            ("route", _request_context.route),
+            ("model_number", _request_context.model_number),
+        ),
+    )
+    _request_context.start_time = None
+    _request_context.route = NO_LABEL
+
+
+def get_request_model_number():
+    """Returns the validated model number of the request handled by the current
+    thread, or NO_LABEL if it has none"""
+
+    return getattr(_request_context, "model_number", NO_LABEL)
+
+
+class StageTimer:
+    """Times consecutive stages of handling a request for a model. Each stage
+    lasts from the end of the previous one (or the creation of the timer) until
+    stage is called.
+
+    The model number is only used as a label once the first stage has been
+    recorded, so it should be validated before then.
+
+    Args:
+        model_number [String]: Integer value corresponding to a ML model
+    """
+
+    def __init__(self, model_number):
+        self.model_number = str(model_number)
+        self.route = getattr(_request_context, "route", NO_LABEL)
+        self._last_time = time.perf_counter()
+
+    def stage(self, name):
+        """Records the duration of a stage.
+
+        Args:
+            name [String]: Name of the stage which has just finished
+        """
+
+        now = time.perf_counter()
+        observe(
+            STAGE_METRIC,
+            now - self._last_time,
+            (
+                ("route", self.route),
+                ("model_number", self.model_number),
+                ("stage", name),
+            ),
+        )
+        self._last_time = now
+        _request_context.model_number = self.model_number
+
+
+def reset():
+    """Clears every histogram"""
+
+    with _histograms_lock:
+        _histograms.clear()
+
+
+def get_histogram(metric, **labels):
+    """Returns the observations of a histogram series.
+
+    Args:
+        metric [String]: Name of the histogram
+        labels: Values of the series' labels
+
+    Returns:
+        [Dictionary]: Number of observations in each bucket, including the
+                      last (+Inf) bucket, count and sum, or None if nothing
+                      has been recorded
+    """
+
+    with _histograms_lock:
+        histogram = _histograms.get((metric, tuple(labels.items())))
+        if histogram is None:
+            return None
+        histogram = list(histogram)
+
+    return {
+        "buckets": histogram[:-1],
+        "count": sum(histogram[:-1]),
+        "sum": histogram[-1],
+    }
+
+
+def render():
+    """Renders every metric in the Prometheus text exposition format.
+
+    Returns:
+        [String]: The metrics
+    """
+
+    with _histograms_lock:
+        histograms = sorted(
+            (key, list(histogram)) for key, histogram in _histograms.items()
+        )
+
+    lines = []
+    for metric in [REQUEST_METRIC, STAGE_METRIC]:
+        lines.append(f"# HELP {metric} {METRIC_HELP[metric]}")
+        lines.append(f"# TYPE {metric} histogram")
+
+        for (series_metric, labels), histogram in histograms:
+            if series_metric != metric:
+                continue
+
+            cumulative_count = 0
+            for bound, count in zip(BUCKETS + ("+Inf",), histogram[:-1]):
+                cumulative_count += count
+                bucket_labels = _format_labels(labels + (("le", str(bound)),))
+                lines.append(f"{metric}_bucket{bucket_labels} {cumulative_count}")
+            lines.append(f"{metric}_sum{_format_labels(labels)} {histogram[-1]!r}")
+            lines.append(f"{metric}_count{_format_labels(labels)} {cumulative_count}")
+
+    registry_stats = model_registry.get_stats()
+    response_stats = response_cache.get_stats()
+    counters = [
+        (
+            "ttt_model_cache_hits_total",
+            "counter",
+            "Model registry hits",
+            registry_stats["hits"],
+        ),
+        (
+            "ttt_model_cache_misses_total",
+            "counter",
+            "Model registry misses",
+            registry_stats["misses"],
+        ),
+        (
+            "ttt_model_cache_evictions_total",
+            "counter",
+            "Models evicted from the model registry",
+            registry_stats["evictions"],
+        ),
+        (
+            "ttt_model_cache_hit_ratio",
+            "gauge",
+            "Fraction of model registry requests which were hits",
+            registry_stats["hit_rate"],
+        ),
+        (
+            "ttt_model_load_seconds_total",
+            "counter",
+            "Time spent loading models",
+            registry_stats["load_time_seconds"],
+        ),
+        (
+            "ttt_models_in_memory",
+            "gauge",
+            "Models held by the model registry",
+            registry_stats["models_in_memory"],
+        ),
+        (
+            "ttt_model_memory_bytes",
+            "gauge",
+            "Size of the models held by the model registry",
+            registry_stats["memory_used_bytes"],
+        ),
+        (
+            "ttt_response_cache_hits_total",
+            "counter",
+            "Prediction responses served from the response cache",
+            response_stats["hits"],
+        ),
+        (
+            "ttt_response_cache_misses_total",
+            "counter",
+            "Prediction responses not found in the response cache",
+            response_stats["misses"],
+        ),
+        (
+            "ttt_response_not_modified_total",
+            "counter",
+            "Prediction requests answered with 304 Not Modified",
+            response_stats["not_modified"],
+        ),
+        (
+            "ttt_response_cache_entries",
+            "gauge",
+            "Prediction responses held by the response cache",
+            response_stats["entries"],
+        ),
+        (
+            "ttt_answer_tables_in_memory",
+            "gauge",
+            "Answer tables mapped into memory",
+            answer_tables.get_table_count(),
+        ),
+    ]
+    for name, metric_type, help_text, value in counters:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        lines.append(f"{name} {value!r}")
+
+    lines.append(
+        "# HELP ttt_training_jobs Background jobs known to this process, by status"
+    )
+    lines.append("# TYPE ttt_training_jobs gauge")
+    for status, count in job_service.get_job_counts().items():
+        lines.append(f'ttt_training_jobs{{status="{status}"}} {count}')
+
+    return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels):
+    """Formats (name, value) pairs as a Prometheus label set"""
+
+    formatted_labels = ",".join(f'{name}="{_escape(value)}"' for name, value in labels)
+
+    return f"{{{formatted_labels}}}"
+
+
+def _escape(value):
+    """Escapes a label value"""
+
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,213 @@
+"""
+The model artifact module saves and loads random forest models in a compact
+binary format, which is read by memory-mapping the file rather than unpickling
+it, so that loading a model cannot execute arbitrary code.
+
+Only the arrays of the best estimator's compiled trees (see forest_engine) are
+kept. A file is laid out as:
+    MAGIC (8 bytes)
+    length of the header (4 bytes, little-endian)
+    JSON header describing the model and the position of each array
+    data section, starting at the next multiple of ALIGNMENT bytes, holding each
+    array in ARRAYS order at an offset (from the start of the data section)
+    which is a multiple of ALIGNMENT bytes
+"""
+
+import json
+import os
+
+import numpy as np
+
+from src.service import encoding_service, forest_engine
+
+MAGIC = b"TTTFRST\x00"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+
+# Arrays of a compiled forest, and the type they are stored as
+ARRAYS = {
+    "feature": "<i4",
+    "threshold": "<f8",
+    "left": "<i4",
+    "right": "<i4",
+    "leaf_index": "<i4",
+    "leaf_proba": "<f8",
+    "roots": "<i4",
+}
+
+# Entries which every header must contain
+HEADER_KEYS = {
+    "format_version",
+    "model_number",
+    "feature_layout",
+    "n_features",
+    "classes",
+    "max_depth",
+    "arrays",
+}
+
+
+def save_model(model, model_number, file_name, data_hash=None):
+    """Saves the best estimator of a random forest model as a model artifact.
+
+    Args:
+        model: SKLearn random forest classifier, or a search whose best estimator is one
+        model_number [String]: Integer value corresponding to a ML model
+        file_name [String]: File to write
+        data_hash [String]: Hash of the dataset the model was trained on
+    """
+
+    engine = forest_engine.compile_forest(model)
+    model_number = str(model_number)
+
+    arrays = [
+        np.ascontiguousarray(getattr(engine, name), dtype=dtype)
+        for name, dtype in ARRAYS.items()
+    ]
+    array_headers = []
+    offset = 0
+    for (name, dtype), array in zip(ARRAYS.items(), arrays):
+        array_headers.append(
+            {"name": name, "dtype": dtype, "shape": list(array.shape), "offset": offset}
+        )
+        offset = _align(offset + array.nbytes)
+
+    header = {
+        "format_version": FORMAT_VERSION,
+        "model_number": model_number,
+        "feature_layout": encoding_service.FEATURE_LAYOUTS.get(model_number),
+        "n_features": int(getattr(model, "best_estimator_", model).n_features_in_),
+        "classes": [str(label) for label in engine.classes],
+        "n_trees": engine.n_trees,
+        "max_depth": int(engine.max_depth),
+        "data_hash": data_hash,
+        "best_params": getattr(model, "best_params_", None),
+        "best_score": getattr(model, "best_score_", None),
+        "arrays": array_headers,
+    }
+    header_bytes = json.dumps(header, default=_to_json).encode()
+
+    temp_file_name = f"{file_name}.{os.getpid()}.tmp"
+    with open(temp_file_name, "wb") as file:
+        file.write(MAGIC)
+        file.write(len(header_bytes).to_bytes(4, "little"))
+        file.write(header_bytes)
+
+        data_start = _align(file.tell())
+        for array_header, array in zip(array_headers, arrays):
+            file.write(b"\x00" * (data_start + array_header["offset"] - file.tell()))
+            file.write(array.tobytes())
+    os.replace(temp_file_name, file_name)
+
+
+def load_model(file_name, model_number=None):
+    """Memory-maps a model artifact. The contents of the file are checked, so that
+    a corrupt file raises an error rather than producing invalid predictions.
+
+    Args:
+        file_name [String]: File to read
+        model_number [String]: If given, the model number and feature layout
+                               recorded in the file must match this model's
+
+    Returns:
+        [CompiledForest]: The model, with the file's header as its metadata
+    """
+
+    data = np.memmap(file_name, dtype=np.uint8, mode="r")
+    header_start = len(MAGIC) + 4
+
+    if len(data) < header_start or bytes(data[: len(MAGIC)]) != MAGIC:
+        raise ValueError("Invalid model file")
+
+    header_length = int.from_bytes(bytes(data[len(MAGIC) : header_start]), "little")
+    try:
+        header = json.loads(bytes(data[header_start : header_start + header_length]))
+    except ValueError:
+        raise ValueError("Invalid model file: unreadable header") from None
+
+    if not isinstance(header, dict) or header.get("format_version") != FORMAT_VERSION:
+        raise ValueError("Invalid model file: unsupported format version")
+
+    if not HEADER_KEYS <= set(header) or len(header["arrays"]) != len(ARRAYS):
+        raise ValueError("Invalid model file: incomplete header")
+
+    if model_number is not None and (
+        header["model_number"] != str(model_number)
+        or header["feature_layout"]
+        != encoding_service.FEATURE_LAYOUTS.get(str(model_number))
+    ):
+        raise ValueError("Invalid model file: model does not match its model number")
+
+    data_start = _align(header_start + header_length)
+    arrays = {}
+    for array_header, (name, dtype) in zip(header["arrays"], ARRAYS.items()):
+        if array_header["name"] != name or array_header["dtype"] != dtype:
+            raise ValueError("Invalid model file: unexpected array")
+
+        shape = tuple(array_header["shape"])
+        start = data_start + array_header["offset"]
+        end = start + int(np.prod(shape)) * np.dtype(dtype).itemsize
+        if array_header["offset"] % ALIGNMENT or end > len(data):
+            raise ValueError("Invalid model file: array out of bounds")
+
+        # Plain arrays backed by the memory map, which avoid the overhead of
+        # memmap operations on every lookup
+        arrays[name] = data[start:end].view(np.ndarray).view(dtype).reshape(shape)
+
+    classes = np.array(header["classes"], dtype=object)
+    _check_bounds(arrays, header["n_features"], len(classes))
+
+    if not 0 <= header["max_depth"] <= len(arrays["feature"]):
+        raise ValueError("Invalid model file: invalid depth")
+
+    metadata = {key: value for key, value in header.items() if key != "arrays"}
+
+    return forest_engine.CompiledForest(
+        max_depth=header["max_depth"], classes=classes, metadata=metadata, **arrays
+    )
+
+
+def _check_bounds(arrays, n_features, n_classes):
+    """Checks that every index held by the arrays of a forest is in range"""
+
+    node_count = len(arrays["feature"])
+    leaf_count = len(arrays["leaf_proba"])
+
+    checks = [
+        (arrays["threshold"], node_count),
+        (arrays["left"], node_count),
+        (arrays["right"], node_count),
+        (arrays["leaf_index"], node_count),
+    ]
+    for array, length in checks:
+        if len(array) != length:
+            raise ValueError("Invalid model file: inconsistent array lengths")
+
+    indices = [
+        (arrays["feature"], n_features),
+        (arrays["left"], node_count),
+        (arrays["right"], node_count),
+        (arrays["leaf_index"], leaf_count),
+        (arrays["roots"], node_count),
+    ]
+    for array, limit in indices:
+        if len(array) and (array.min() < 0 or array.max() >= limit):
+            raise ValueError("Invalid model file: index out of range")
+
+    if arrays["leaf_proba"].shape[1:] != (n_classes,) or not len(arrays["roots"]):
+        raise ValueError("Invalid model file: inconsistent array shapes")
+
+
+def _align(offset):
+    """Rounds an offset up to the next multiple of ALIGNMENT"""
+
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _to_json(value):
+    """Converts NumPy scalars in the header to Python values"""
+
+    if isinstance(value, np.generic):
+        return value.item()
+
+    raise TypeError(f"Cannot serialise {type(value).__name__}")
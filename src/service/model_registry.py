@@ -0,0 +1,172 @@
+"""
+The model registry module keeps loaded models in memory so that they are not
+re-loaded from file for every prediction
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from src.service import config, file_service
+
+
+class ModelRegistry:
+    """Thread-safe, least-recently-used cache of loaded models.
+
+    Models are keyed by their model number and file version, so a model which
+    is re-trained and saved is loaded again on its next use. The size of a model
+    is approximated by the size of its file.
+
+    Args:
+        max_models [Integer]: Maximum number of models held in memory
+        memory_budget [Integer]: Maximum combined size of the models held in memory
+    """
+
+    def __init__(self, max_models, memory_budget):
+        self.max_models = max_models
+        self.memory_budget = memory_budget
+
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self._entries = OrderedDict()  # (model_number, version) => (model, size)
+        self._memory_used = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.load_time = 0.0
+
+    def get_model(self, model_number):
+        """Returns a model, loading it from file if it is not already in memory.
+
+        Args:
+            model_number: Integer value corresponding to a ML model
+
+        Returns:
+            model: SKLearn model"""
+
+        model_number = str(model_number)
+        key = (model_number, file_service.get_model_version(model_number))
+
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key][0]
+
+            self.misses += 1
+            load_lock = self._load_locks.setdefault(model_number, threading.Lock())
+
+        # Only one thread loads a given model; any others wait for it to finish
+        with load_lock:
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    return self._entries[key][0]
+
+            start_time = time.perf_counter()
+            model = file_service.load_model_from_file(model_number)
+            size = file_service.get_model_size(model_number)
+            load_time = time.perf_counter() - start_time
+
+            with self._lock:
+                self.load_time += load_time
+                self._remove(model_number)
+                self._entries[key] = (model, size)
+                self._memory_used += size
+                self._evict()
+
+        return model
+
+    def evict(self, model_number):
+        """Removes all versions of a model from memory.
+
+        Args:
+            model_number: Integer value corresponding to a ML model"""
+
+        with self._lock:
+            self._remove(str(model_number))
+
+    def clear(self):
+        """Removes all models from memory and resets the counters"""
+
+        with self._lock:
+            self._entries.clear()
+            self._memory_used = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+            self.load_time = 0.0
+
+    def get_stats(self):
+        """Returns the cache counters.
+
+        Returns:
+            [Dictionary]: Hit, miss, eviction and load time counters"""
+
+        with self._lock:
+            requests = self.hits + self.misses
+
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / requests if requests else 0.0,
+                "evictions": self.evictions,
+                "load_time_seconds": self.load_time,
+                "models_in_memory": len(self._entries),
+                "memory_used_bytes": self._memory_used,
+            }
+
+    def _remove(self, model_number):
+        """Removes all versions of a model. The caller must hold the lock."""
+
+        for key in [key for key in self._entries if key[0] == model_number]:
+            self._memory_used -= self._entries.pop(key)[1]
+
+    def _evict(self):
+        """Removes least recently used models until the cache is within its
+        limits. The most recently used model is always kept. The caller must
+        hold the lock."""
+
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_models
+            or self._memory_used > self.memory_budget
+        ):
+            _, (_, size) = self._entries.popitem(last=False)
+            self._memory_used -= size
+            self.evictions += 1
+
+
+registry = ModelRegistry(
+    config.MODEL_CACHE_MAX_MODELS, config.MODEL_CACHE_MEMORY_BUDGET
+)
+
+
+def get_model(model_number):
+    """Returns a model from the shared registry.
+
+    Args:
+        model_number: Integer value corresponding to a ML model
+
+    Returns:
+        model: SKLearn model"""
+
+    return registry.get_model(model_number)
+
+
+def evict(model_number):
+    """Removes a model from the shared registry.
+
+    Args:
+        model_number: Integer value corresponding to a ML model"""
+
+    registry.evict(model_number)
+
+
+def get_stats():
+    """Returns the counters of the shared registry.
+
+    Returns:
+        [Dictionary]: Hit, miss, eviction and load time counters"""
+
+    return registry.get_stats()
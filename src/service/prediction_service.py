@@ -2,56 +2,82 @@
 The service module contains the prediction functionality of the project
 """
 
-import pandas as pd
-import numpy as np
-
-from src.service import data_service, generators
+from src.service import config, encoding_service, forest_engine
 
 
 def handle_user_input(board_state, model_number):
-    """Converts raw user inputs into a Pandas Dataframe object
-    which may be used with the predictive model.
+    """Converts a validated user input into a NumPy array which may be used
+    with the predictive model.
 
     Args:
-        board_state [String]: string containing the board state from top-left to bottom-right.
-                              where 'x' == cross, 'o' == nought, 'b' == blank
+        board_state [Board]: Validated board state
         model_number [String]: Integer value corresponding to a ML model.
 
     Returns:
-        [DataFrame]: Pandas Dataframe containing reformatted and one-hot encoded user inputs.
+        [ndarray]: Array containing one row of encoded user inputs.
     """
 
-    column_names = generators.get_board_state_column_names()
-    input_df = pd.DataFrame(np.zeros(9), index=column_names).transpose()
-    for square_index in range(0, 9):
-        input_df.iloc[0, square_index] = board_state[square_index]
+    return encoding_service.encode_board(board_state, model_number)
+
 
-    # Apply any necessary manipulation
-    if model_number == "1":
-        input_df = data_service.onehot_encode(input_df)
-    elif model_number == "5":
-        input_df = data_service.ordinal_encode(
-            data_service.calculate_move_counts(input_df)
-        )
-    elif model_number == "6":
-        input_df = data_service.calculate_adjacent_symbols(input_df).iloc[:, 9:]
-    elif model_number == "7":
-        input_df = data_service.ordinal_encode(
-            data_service.calculate_adjacent_symbols(input_df)
-        )
-    else:
-        input_df = data_service.ordinal_encode(input_df)
+def handle_user_inputs(board_states, model_number):
+    """Converts a batch of board states into a single NumPy array which may be
+    used with the predictive model.
 
-    input_df = data_service.ordinal_encode(input_df)
+    Args:
+        board_states [Board[]]: List of validated board states
+        model_number [String]: Integer value corresponding to a ML model.
+
+    Returns:
+        [ndarray]: Array containing one row of encoded user inputs per board
+                   state, in input order.
+    """
 
-    return input_df
+    return encoding_service.encode_boards(board_states, model_number)
 
 
 def evaluate_prediction(model, user_input):
 
-    prediction = model.predict(user_input)
+    prediction = get_predictor(model, len(user_input)).predict(user_input)
 
     # remove square brackets and apostrophes from the prediction
     prediction_string = str(prediction)[2:-2]
 
     return prediction_string
+
+
+def evaluate_predictions(model, user_inputs):
+    """Predicts the outcome of each row of a batch of user inputs.
+
+    Args:
+        model: SKLearn model
+        user_inputs [ndarray]: Encoded user inputs
+
+    Returns:
+        [String[]]: Predicted outcome for each row, in input order
+    """
+
+    predictions = get_predictor(model, len(user_inputs)).predict(user_inputs)
+
+    return [str(prediction) for prediction in predictions]
+
+
+def get_predictor(model, rows):
+    """Chooses how to evaluate a batch of user inputs. The compiled forest avoids
+    the fixed overhead of the model's predict method, which dominates for small
+    batches, while the model's predict method is faster for large batches.
+
+    Args:
+        model: SKLearn model
+        rows [Integer]: Number of rows in the batch
+
+    Returns:
+        An object with a predict method which gives the same predictions as the model
+    """
+
+    if rows <= config.FOREST_ENGINE_MAX_BATCH:
+        engine = forest_engine.get_engine(model)
+        if engine is not None:
+            return engine
+
+    return model
@@ -0,0 +1,131 @@
+"""
+The profiler service module profiles a sample of live requests, to show where
+the time goes in an individual slow request.
+
+Profiling is opt-in: a fraction of requests set by TTT_PROFILE_SAMPLE_RATE is
+profiled, along with any request sent with an "X-Profile: 1" header when
+TTT_PROFILE_HEADER is set. Each profile is written in the pstats format, with
+its route, model number and duration in its file name, and only the most
+recent TTT_PROFILE_MAX_FILES profiles are kept. Requests which are not sampled
+are only checked against the sample rate, and are not otherwise affected.
+
+Usage:
+    python -m src.service.profiler_service [profile file]
+"""
+
+import cProfile
+import glob
+import os
+import pstats
+import random
+import re
+import sys
+import time
+
+from src.service import config, file_service
+
+PROFILE_HEADER = "X-Profile"
+
+
+def should_profile(header_value=None):
+    """Decides whether to profile a request.
+
+    Args:
+        header_value [String]: Value of the request's X-Profile header, if any
+
+    Returns:
+        [Boolean]: True if the request should be profiled
+    """
+
+    if config.PROFILE_HEADER and header_value == "1":
+        return True
+
+    # Sampling is not used for security purposes
+    return (
+        config.PROFILE_SAMPLE_RATE > 0
+        and random.random() < config.PROFILE_SAMPLE_RATE  # nosec B311
+    )
+
+
+def start_profile():
+    """Starts profiling the current thread.
+
+    Returns:
+        [Profile]: The running profiler
+    """
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+
+    return profiler
+
+
+def save_profile(profiler, route, model_number, duration_seconds):
+    """Stops a profiler and writes its profile, then removes the oldest profiles
+    beyond TTT_PROFILE_MAX_FILES.
+
+    Args:
+        profiler [Profile]: Profiler returned by start_profile
+        route [String]: Name of the route which handled the request
+        model_number [String]: Model used by the request
+        duration_seconds [Float]: Duration of the request
+
+    Returns:
+        [String]: Name of the profile's file
+    """
+
+    profiler.disable()
+
+    directory = file_service.get_profile_directory()
+    os.makedirs(directory, exist_ok=True)
+
+    tags = "-".join(
+        re.sub("[^A-Za-z0-9_]", "_", str(tag))
+        for tag in [route, f"model_{model_number}"]
+    )
+    file_name = os.path.join(
+        directory,
+        f"{time.time_ns()}-{os.getpid()}-{tags}-{duration_seconds * 1000:.3f}ms.prof",
+    )
+    profiler.dump_stats(file_name)
+
+    remove_old_profiles(config.PROFILE_MAX_FILES)
+
+    return file_name
+
+
+def remove_old_profiles(max_files):
+    """Deletes the oldest profiles beyond the given number.
+
+    Args:
+        max_files [Integer]: Number of profiles to keep
+    """
+
+    for file_name in get_profiles()[: -max_files or None]:
+        try:
+            os.remove(file_name)
+        except FileNotFoundError:
+            pass  # Removed by another worker process
+
+
+def get_profiles():
+    """Lists the stored profiles, from oldest to most recent.
+
+    Returns:
+        [String[]]: File names of the profiles
+    """
+
+    # File names start with the time at which they were written
+    return sorted(
+        glob.glob(os.path.join(file_service.get_profile_directory(), "*.prof")),
+        key=os.path.basename,
+    )
+
+
+if __name__ == "__main__":
+    profile_file_names = sys.argv[1:] or get_profiles()[-1:]
+    if not profile_file_names:
+        print("[INFO] No profiles have been recorded")
+    for profile_file_name in profile_file_names:
+        print(f"[INFO] {profile_file_name}")
+        pstats.Stats(profile_file_name).sort_stats("cumulative").print_stats(25)
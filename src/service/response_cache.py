@@ -0,0 +1,163 @@
+"""
+The response cache module keeps the serialized responses of prediction requests,
+so that a repeated request is answered without validating, encoding or predicting
+its board state again.
+
+A prediction only depends on the model file and the board state, so each
+response is identified by a strong ETag derived from the model's file version
+and the board state. The ETag is also sent to clients, which may then revalidate
+their copy with If-None-Match, and which receive a new ETag once the model is
+retrained.
+
+With canonical answer tables (see answer_tables), the 8 symmetric forms of a
+board state are answered with the same outcome, which does not depend on the
+orientation of the board, so they share the ETag and the cached response of
+their canonical form. Otherwise the models are not symmetric, and each board
+state is cached separately.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+from src.service import config, symmetry
+
+
+def get_etag(model_number, version, board_state):
+    """Generates the ETag of a prediction response.
+
+    Args:
+        model_number [String]: Integer value corresponding to a ML model
+        version [String]: Version of the model's file, see file_service.get_model_version
+        board_state [Board]: Validated board state
+
+    Returns:
+        [String]: The ETag, without quotes
+    """
+
+    # Canonical answer tables change the answers of some board states
+    if config.CANONICAL_ANSWER_TABLES:
+        board_state, _ = symmetry.canonicalize(board_state)
+    description = (
+        f"{model_number}:{version}:{config.CANONICAL_ANSWER_TABLES}:{board_state}"
+    )
+
+    return hashlib.sha256(description.encode()).hexdigest()[:32]
+
+
+class ResponseCache:
+    """Thread-safe, least-recently-used cache of serialized responses, keyed by
+    their ETag.
+
+    Args:
+        max_entries [Integer]: Maximum number of responses held in memory
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # ETag => response body
+
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def get(self, etag):
+        """Returns the body of a cached response.
+
+        Args:
+            etag [String]: ETag of the response
+
+        Returns:
+            [Bytes]: The body, or None if the response is not cached"""
+
+        with self._lock:
+            body = self._entries.get(etag)
+            if body is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._entries.move_to_end(etag)
+            return body
+
+    def put(self, etag, body):
+        """Caches the body of a response, evicting the least recently used
+        responses beyond the limit.
+
+        Args:
+            etag [String]: ETag of the response
+            body [Bytes]: Serialized response"""
+
+        if self.max_entries <= 0:
+            return
+
+        with self._lock:
+            self._entries[etag] = body
+            self._entries.move_to_end(etag)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def record_not_modified(self):
+        """Counts a request answered with 304 Not Modified"""
+
+        with self._lock:
+            self.not_modified += 1
+
+    def clear(self):
+        """Removes every response and resets the counters"""
+
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.not_modified = 0
+
+    def get_stats(self):
+        """Returns the cache counters.
+
+        Returns:
+            [Dictionary]: Hit, miss and not modified counters, and the number of
+                          responses held"""
+
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified,
+                "entries": len(self._entries),
+            }
+
+
+cache = ResponseCache(config.RESPONSE_CACHE_MAX_ENTRIES)
+
+
+def get(etag):
+    """Returns the body of a response from the shared cache, or None"""
+
+    return cache.get(etag)
+
+
+def put(etag, body):
+    """Adds the body of a response to the shared cache"""
+
+    cache.put(etag, body)
+
+
+def record_not_modified():
+    """Counts a request of the shared cache answered with 304 Not Modified"""
+
+    cache.record_not_modified()
+
+
+def clear():
+    """Empties the shared cache"""
+
+    cache.clear()
+
+
+def get_stats():
+    """Returns the counters of the shared cache"""
+
+    return cache.get_stats()
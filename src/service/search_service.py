@@ -0,0 +1,385 @@
+"""
+The search service module tunes the hyper-parameters of a random forest by
+successive halving, as an alternative to the exhaustive grid search of
+training_service.fit_model. Every candidate of the grid is scored on a small
+resource (a subset of the rows, or a number of trees), and only the best third
+go on to the next iteration, whose resource is three times larger. The search
+may be given a time budget, after which no more candidates are fitted.
+
+The cross validation scores of each candidate are kept in a cache file, keyed by
+the version of the feature store (which hashes the dataset and the feature
+engineering code), the set of features, and the parameters and resource of the
+candidate. A repeated or widened search then only fits the candidates which it
+has not scored before.
+"""
+
+import glob
+import json
+import math
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+from sklearn import ensemble, model_selection
+
+from src.service import file_service
+
+RESOURCES = ["n_samples", "n_estimators"]
+
+# Ratio between the resources of successive iterations, and between the number
+# of candidates of successive iterations
+FACTOR = 3
+
+# Number of cross validation folds, as for GridSearchCV
+SPLITS = 5
+
+# Random state of the forests fitted by the search, so that cached scores can
+# be reproduced
+RANDOM_STATE = 0
+
+_cache_lock = threading.Lock()
+
+
+class HalvingSearch:
+    """Result of a successive halving search. Like a fitted GridSearchCV, it
+    predicts with the forest of the best candidate, refitted on all of the rows.
+
+    Args:
+        best_estimator [RandomForestClassifier]: Refitted forest of the best candidate
+        best_params [Dictionary]: Parameters of the best candidate
+        best_score [Float]: Mean cross validation score of the best candidate
+        results [Dictionary[]]: Parameters, resource, iteration, mean score and
+                                whether the score was cached, for each candidate
+                                of each iteration
+    """
+
+    def __init__(self, best_estimator, best_params, best_score, results):
+        self.best_estimator_ = best_estimator
+        self.best_params_ = best_params
+        self.best_score_ = best_score
+        self.results_ = results
+
+    @property
+    def classes_(self):
+        """Classes of the best estimator"""
+
+        return self.best_estimator_.classes_
+
+    @property
+    def n_features_in_(self):
+        """Number of features of the best estimator"""
+
+        return self.best_estimator_.n_features_in_
+
+    def predict(self, predictive_features):
+        """Predicts with the best estimator"""
+
+        return self.best_estimator_.predict(predictive_features)
+
+    def predict_proba(self, predictive_features):
+        """Predicts class probabilities with the best estimator"""
+
+        return self.best_estimator_.predict_proba(predictive_features)
+
+    def score(self, predictive_features, target_feature):
+        """Scores the best estimator"""
+
+        return self.best_estimator_.score(predictive_features, target_feature)
+
+
+def get_schedule(candidate_count, max_resources, min_resources):
+    """Plans the resource of each iteration. There are enough iterations to
+    reduce the candidates to one, unless the resources run out first, and the
+    last iteration uses all of the resources.
+
+    Args:
+        candidate_count [Integer]: Number of candidates in the grid
+        max_resources [Integer]: Resource of the last iteration
+        min_resources [Integer]: Smallest useful resource of an iteration
+
+    Returns:
+        [Integer[]]: Resource of each iteration
+    """
+
+    required_iterations = 1 + math.floor(math.log(candidate_count, FACTOR) + 1e-9)
+    possible_iterations = 1 + math.floor(
+        math.log(max(max_resources // min_resources, 1), FACTOR) + 1e-9
+    )
+    iterations = min(required_iterations, possible_iterations)
+
+    return [
+        max(max_resources // FACTOR ** (iterations - 1 - iteration), 1)
+        for iteration in range(iterations)
+    ]
+
+
+def get_cache_key(params, resource, resource_value):
+    """Identifies the scores of a candidate within a cache file.
+
+    Args:
+        params [Dictionary]: Parameters of the candidate
+        resource [String]: "n_samples" or "n_estimators"
+        resource_value [Integer]: Amount of the resource used
+
+    Returns:
+        [String]: The key
+    """
+
+    return json.dumps(
+        {
+            "params": params,
+            "resource": resource,
+            "resource_value": int(resource_value),
+            "splits": SPLITS,
+            "random_state": RANDOM_STATE,
+        },
+        sort_keys=True,
+    )
+
+
+def load_scores(version, key):
+    """Reads the cached fold scores of a set of features.
+
+    Args:
+        version [String]: Version of the feature store, see feature_store.get_version
+        key [String]: Identifier of the set of features, see feature_store.get_key
+
+    Returns:
+        [Dictionary]: Cache key => fold scores
+    """
+
+    file_name = file_service.get_search_cache_file_name(version, key)
+
+    with _cache_lock:
+        try:
+            with open(file_name) as file:
+                return json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+
+def save_scores(version, key, scores):
+    """Writes the fold scores of a set of features to the cache, merged with any
+    written since they were read. Directories belonging to previous versions of
+    the feature store are removed.
+
+    Args:
+        version [String]: Version of the feature store
+        key [String]: Identifier of the set of features
+        scores [Dictionary]: Cache key => fold scores
+    """
+
+    file_name = file_service.get_search_cache_file_name(version, key)
+    directory = os.path.dirname(file_name)
+
+    with _cache_lock:
+        os.makedirs(directory, exist_ok=True)
+        try:
+            with open(file_name) as file:
+                merged_scores = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            merged_scores = {}
+        merged_scores.update(scores)
+
+        temp_file_name = f"{file_name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_file_name, "w") as file:
+            json.dump(merged_scores, file)
+        os.replace(temp_file_name, file_name)
+
+        for stale_directory in glob.glob(file_service.get_search_directory("*")):
+            if stale_directory != directory:
+                shutil.rmtree(stale_directory, ignore_errors=True)
+
+
+def score_candidate(
+    predictive_features,
+    target_feature,
+    params,
+    rows,
+    n_jobs=1,
+    sample_weight=None,
+):
+    """Cross validates a candidate on a subset of the rows.
+
+    Args:
+        predictive_features [ndarray]: Array of predictive features
+        target_feature [ndarray]: Target feature values
+        params [Dictionary]: Parameters of the forest
+        rows [ndarray]: Indices of the rows used
+        n_jobs [Integer]: Number of parallel jobs used by the forest
+        sample_weight [ndarray]: Optional weight of each row, used by the fits
+
+    Returns:
+        [Float[]]: Accuracy of each fold
+    """
+
+    target_subset = np.asarray(target_feature)[rows]
+    folds = model_selection.StratifiedKFold(n_splits=SPLITS)
+
+    fold_scores = []
+    for train_rows, test_rows in folds.split(rows, target_subset):
+        forest = ensemble.RandomForestClassifier(
+            n_jobs=n_jobs, random_state=RANDOM_STATE, **params
+        )
+        fit_params = {}
+        if sample_weight is not None:
+            fit_params["sample_weight"] = np.asarray(sample_weight)[rows[train_rows]]
+        forest.fit(
+            predictive_features[rows[train_rows]],
+            target_subset[train_rows],
+            **fit_params,
+        )
+        fold_scores.append(
+            forest.score(predictive_features[rows[test_rows]], target_subset[test_rows])
+        )
+
+    return fold_scores
+
+
+def halving_search(
+    predictive_features,
+    target_feature,
+    param_grid,
+    resource="n_samples",
+    time_budget=None,
+    cache=None,
+    n_jobs=1,
+    progress=None,
+    sample_weight=None,
+):
+    """Tunes the hyper-parameters of a random forest by successive halving.
+
+    Args:
+        predictive_features [ndarray]: Array of predictive features
+        target_feature [ndarray]: Target feature values
+        param_grid [Dictionary]: Parameter name => values, as for GridSearchCV
+        resource [String]: "n_samples" to grow the subset of rows used by each
+                           iteration, or "n_estimators" to grow the number of
+                           trees (up to the largest value of the grid)
+        time_budget [Float]: Seconds after which no more candidates are fitted.
+                             The best candidate of the last iteration reached is
+                             then chosen. At least one candidate is always scored.
+        cache [Tuple]: Version of the feature store and key of the set of
+                       features, under which fold scores are cached, or None
+        n_jobs [Integer]: Number of parallel jobs used by the forests
+        progress [Function]: Optional callback, called as progress("fitting",
+                             candidate=k, candidates=n) before each candidate
+                             is scored
+        sample_weight [ndarray]: Optional weight of each row
+
+    Returns:
+        [HalvingSearch]: The search, whose best estimator is refitted on all rows
+    """
+
+    if resource not in RESOURCES:
+        raise ValueError("Invalid search resource")
+
+    start_time = time.perf_counter()
+    param_grid = dict(param_grid)
+    row_count = len(target_feature)
+    all_rows = np.arange(row_count)
+
+    if resource == "n_estimators":
+        max_resources = max(param_grid.pop("n_estimators", [100]))
+        min_resources = 1
+    else:
+        # Shuffled once, so that each iteration's rows include the previous ones
+        shuffled_rows = np.random.RandomState(RANDOM_STATE).permutation(row_count)
+        max_resources = row_count
+        min_resources = SPLITS * 2 * len(np.unique(target_feature))
+
+    candidates = list(model_selection.ParameterGrid(param_grid))
+    schedule = get_schedule(len(candidates), max_resources, min_resources)
+    scheduled_fits = sum(
+        math.ceil(len(candidates) / FACTOR**iteration)
+        for iteration in range(len(schedule))
+    )
+
+    scores = load_scores(*cache) if cache is not None else {}
+    new_scores = {}
+    results = []
+    fitted = 0
+    out_of_time = False
+    best_params = None
+    best_score = -np.inf
+
+    for iteration, resource_value in enumerate(schedule):
+        if resource == "n_estimators":
+            rows = all_rows
+        else:
+            rows = np.sort(shuffled_rows[:resource_value])
+
+        iteration_scores = []
+        for params in candidates:
+            cache_key = get_cache_key(params, resource, resource_value)
+            cached = cache_key in scores
+            if not cached:
+                out_of_time = (
+                    time_budget is not None
+                    and results
+                    and time.perf_counter() - start_time >= time_budget
+                )
+                if out_of_time:
+                    break
+
+                fit_params = dict(params)
+                if resource == "n_estimators":
+                    fit_params["n_estimators"] = resource_value
+                if progress is not None:
+                    progress("fitting", candidate=fitted + 1, candidates=scheduled_fits)
+                scores[cache_key] = new_scores[cache_key] = score_candidate(
+                    predictive_features,
+                    target_feature,
+                    fit_params,
+                    rows,
+                    n_jobs=n_jobs,
+                    sample_weight=sample_weight,
+                )
+                fitted += 1
+
+            mean_score = float(np.mean(scores[cache_key]))
+            iteration_scores.append((mean_score, params))
+            results.append(
+                {
+                    "params": params,
+                    "resource": int(resource_value),
+                    "iteration": iteration,
+                    "mean_score": mean_score,
+                    "cached": cached,
+                }
+            )
+
+        if cache is not None and new_scores:
+            save_scores(*cache, new_scores)
+            new_scores = {}
+
+        if iteration_scores:
+            # Stable ordering, so ties keep the order of the grid
+            iteration_scores.sort(key=lambda item: -item[0])
+            best_score, best_params = iteration_scores[0]
+
+        if out_of_time:
+            break
+
+        candidates = [
+            params
+            for _, params in iteration_scores[
+                : math.ceil(len(iteration_scores) / FACTOR)
+            ]
+        ]
+
+    best_params = dict(best_params)
+    if resource == "n_estimators":
+        best_params["n_estimators"] = max_resources
+
+    best_estimator = ensemble.RandomForestClassifier(
+        n_jobs=n_jobs, random_state=RANDOM_STATE, **best_params
+    )
+    fit_params = {}
+    if sample_weight is not None:
+        fit_params["sample_weight"] = sample_weight
+    best_estimator.fit(predictive_features, target_feature, **fit_params)
+
+    return HalvingSearch(best_estimator, best_params, best_score, results)
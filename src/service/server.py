@@ -0,0 +1,288 @@
+"""
+The server module serves the API using waitress, either in this process or in
+several worker processes which share a listening socket.
+
+In the multi-process mode the models are warmed up before the workers are
+forked, so the workers share their memory rather than each loading a copy:
+model artifacts and answer tables are memory-mapped from their files, and any
+other memory is shared copy-on-write. A supervisor restarts workers which exit,
+and when a model file is re-written (e.g. by a training job) it warms up the new
+model and replaces every worker with one forked from the updated process. Model
+files saved one after another cause a single restart, once they have stopped
+changing, and the previous workers keep serving if the new models fail to warm up.
+"""
+
+import os
+import signal
+import socket
+import time
+
+import waitress
+from waitress.server import create_server
+
+from src.service import (
+    config,
+    file_service,
+    job_service,
+    model_registry,
+    warmup_service,
+)
+from src.service.api import app
+
+STOP_SIGNALS = [signal.SIGTERM, signal.SIGINT]
+
+
+def run(workers=None, threads=None, host=None, port=None):
+    """Serves the API until the process is stopped.
+
+    Args:
+        workers [Integer]: Number of worker processes, TTT_WORKERS by default.
+                           With a single worker the API is served by this process,
+                           and the models are warmed up in the background.
+        threads [Integer]: Number of threads of each worker, TTT_THREADS by default
+        host [String]: Address to listen on, TTT_HOST by default
+        port [Integer]: Port to listen on, TTT_PORT by default
+    """
+
+    workers = config.WORKERS if workers is None else workers
+    threads = config.THREADS if threads is None else threads
+    host = config.HOST if host is None else host
+    port = config.PORT if port is None else port
+
+    if workers <= 1:
+        warmup_service.start_warm_up()
+        waitress.serve(app, host=host, port=port, threads=threads)
+        return
+
+    listener = socket.create_server((host, port), backlog=1024)
+    warmup_service.warm_up()
+    Supervisor(listener, workers, threads).run()
+
+
+def get_model_versions(model_numbers):
+    """Returns the version of the file of each model.
+
+    Args:
+        model_numbers [String[]]: Models to check
+
+    Returns:
+        [Dictionary]: Model number => version identifier, or None if the model
+                      has no file
+    """
+
+    versions = {}
+    for model_number in model_numbers:
+        try:
+            versions[model_number] = file_service.get_model_version(model_number)
+        except FileNotFoundError:
+            versions[model_number] = None
+
+    return versions
+
+
+class Supervisor:
+    """Runs worker processes serving the API from a shared listening socket.
+
+    Args:
+        listener [Socket]: Bound socket which the workers accept connections from
+        workers [Integer]: Number of worker processes
+        threads [Integer]: Number of threads of each worker
+        model_numbers [String[]]: Models whose files are watched for changes,
+                                  TTT_PRELOAD_MODELS by default
+        reload_interval [Float]: Seconds between checks of the model files
+        reload_delay [Float]: Seconds for which the model files must be unchanged
+                              before the workers are restarted
+    """
+
+    def __init__(
+        self,
+        listener,
+        workers,
+        threads,
+        model_numbers=None,
+        reload_interval=config.RELOAD_INTERVAL,
+        reload_delay=config.RELOAD_DELAY,
+    ):
+        self.listener = listener
+        self.workers = workers
+        self.threads = threads
+        self.model_numbers = (
+            config.PRELOAD_MODELS if model_numbers is None else model_numbers
+        )
+        self.reload_interval = reload_interval
+        self.reload_delay = reload_delay
+
+        self._pids = set()  # Workers serving the current models
+        self._retiring_pids = set()  # Workers which have been asked to stop
+        self._model_versions = {}  # Versions served by the workers
+        self._seen_versions = {}  # Versions found by the last check
+        self._seen_at = 0.0  # When the versions found were first seen
+        self._failed_versions = None  # Versions which last failed to warm up
+        self._stopping = False
+
+    def run(self):
+        """Starts the workers, and supervises them until a stop signal is received"""
+
+        for signal_number in STOP_SIGNALS:
+            signal.signal(signal_number, self._handle_stop_signal)
+
+        self._model_versions = get_model_versions(self.model_numbers)
+        for _ in range(self.workers):
+            self._spawn_worker()
+
+        next_check = time.monotonic() + self.reload_interval
+        while not self._stopping:
+            self.reap_workers()
+
+            if time.monotonic() >= next_check:
+                self.check_models()
+                next_check = time.monotonic() + self.reload_interval
+
+            time.sleep(0.1)
+
+        self.stop_workers()
+
+    def reap_workers(self):
+        """Collects the workers which have exited, replacing any which exited
+        without being asked to"""
+
+        while self._pids or self._retiring_pids:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+
+            if pid in self._pids:
+                self._pids.remove(pid)
+                if not self._stopping:
+                    print(f"[WARNING] Worker {pid} exited, starting a replacement")
+                    self._spawn_worker()
+            self._retiring_pids.discard(pid)
+
+    def check_models(self):
+        """Replaces every worker if a model file has changed since they were
+        started, once the model files have been unchanged for reload_delay
+        seconds. The new models are warmed up first, so that the new workers
+        share them. If they fail to warm up, the workers keep serving, and the
+        models are only reloaded once their files change again."""
+
+        model_versions = get_model_versions(self.model_numbers)
+        if model_versions != self._seen_versions:
+            self._seen_versions = model_versions
+            self._seen_at = time.monotonic()
+
+        changed_model_numbers = [
+            model_number
+            for model_number, version in model_versions.items()
+            if version != self._model_versions.get(model_number)
+        ]
+        if (
+            not changed_model_numbers
+            or model_versions == self._failed_versions
+            or time.monotonic() - self._seen_at < self.reload_delay
+        ):
+            return
+
+        print(f"[INFO] Reloading models {', '.join(changed_model_numbers)}")
+        previous_status = warmup_service.get_status()
+        for model_number in changed_model_numbers:
+            model_registry.evict(model_number)
+        if not warmup_service.warm_up(self.model_numbers):
+            print("[WARNING] Models failed to warm up, keeping the current workers")
+            warmup_service.set_status(previous_status)
+            self._failed_versions = model_versions
+            return
+
+        self._model_versions = model_versions
+        self._failed_versions = None
+
+        self.restart_workers()
+
+    def restart_workers(self):
+        """Starts a new set of workers, then asks the previous ones to stop once
+        they have finished their requests and jobs"""
+
+        previous_pids = list(self._pids)
+        for _ in range(self.workers):
+            self._spawn_worker()
+
+        for pid in previous_pids:
+            self._pids.remove(pid)
+            self._retiring_pids.add(pid)
+            _signal_worker(pid, signal.SIGTERM)
+
+    def stop_workers(self, timeout=30):
+        """Asks every worker to stop, and waits for them to exit.
+
+        Args:
+            timeout [Float]: Seconds after which the remaining workers are killed
+        """
+
+        self._stopping = True
+        self._retiring_pids |= self._pids
+        self._pids = set()
+        for pid in self._retiring_pids:
+            _signal_worker(pid, signal.SIGTERM)
+
+        deadline = time.monotonic() + timeout
+        while self._retiring_pids and time.monotonic() < deadline:
+            self.reap_workers()
+            time.sleep(0.05)
+
+        for pid in self._retiring_pids:
+            _signal_worker(pid, signal.SIGKILL)
+
+    def _spawn_worker(self):
+        """Forks a worker process"""
+
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 1
+            try:
+                self._run_worker()
+                exit_code = 0
+            finally:
+                os._exit(exit_code)  # Skip the supervisor's clean-up
+
+        self._pids.add(pid)
+
+        return pid
+
+    def _run_worker(self):
+        """Serves the API in a worker process until it receives a stop signal"""
+
+        for signal_number in STOP_SIGNALS:
+            signal.signal(signal_number, _raise_system_exit)
+
+        server = create_server(app, sockets=[self.listener], threads=self.threads)
+        server.run()
+
+        # Let any training job started by this worker finish saving its model
+        job_service.jobs.shutdown(wait=True)
+
+    def _handle_stop_signal(self, signal_number, frame):
+        """Stops supervising once the current iteration has finished"""
+
+        self._stopping = True
+
+
+def _raise_system_exit(signal_number, frame):
+    """Makes a stop signal interrupt the server loop of a worker, which then
+    closes its connections"""
+
+    raise SystemExit(0)
+
+
+def _signal_worker(pid, signal_number):
+    """Sends a signal to a worker, unless it has already exited"""
+
+    try:
+        os.kill(pid, signal_number)
+    except ProcessLookupError:
+        pass
+
+
+if __name__ == "__main__":
+    run()
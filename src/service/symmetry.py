@@ -0,0 +1,168 @@
+"""
+The symmetry module maps board states onto a canonical form under the eight
+rotations and reflections of the board (the D4 group). All symmetric board
+states share the same winner.
+
+The canonical form of a board state is the symmetric equivalent with the lowest
+base-3 index, and its symmetry id is the transformation which produces it.
+
+The tables covering every board state (CANONICAL_INDICES, SYMMETRY_IDS,
+CANONICAL_BOARD_STATES, ORBIT_NUMBERS and CANONICAL_BOARD_STATE_COUNT) are built
+in chunks the first time they are used, since they take about 400 MB for a 4x4
+board. get_symmetric_indices works on any batch of board states without them.
+"""
+
+import threading
+
+import numpy as np
+
+from src.service import board
+
+
+def get_permutations(size):
+    """Lists the square permutations of the symmetries of a board, such that
+    square i of the transformed board is square permutation[i] of the original
+    board.
+
+    Args:
+        size [Integer]: Width of the board
+
+    Returns:
+        [List[]]: Permutation of each symmetry
+    """
+
+    squares = np.arange(size**2).reshape(size, size)
+    transformed_boards = [
+        squares,  # identity
+        np.rot90(squares, -1),  # rotate 90 degrees clockwise
+        np.rot90(squares, 2),  # rotate 180 degrees
+        np.rot90(squares, 1),  # rotate 270 degrees clockwise
+        np.fliplr(squares),  # reflect left-right
+        squares.T,  # reflect in the negative diagonal
+        np.flipud(squares),  # reflect top-bottom
+        np.rot90(squares, 2).T,  # reflect in the positive diagonal
+    ]
+
+    return [transformed.flatten().tolist() for transformed in transformed_boards]
+
+
+PERMUTATIONS = get_permutations(board.SIZE)
+SYMMETRY_COUNT = len(PERMUTATIONS)
+
+# Mask of each symmetry applied to every mask
+PERMUTED_MASKS = np.stack(
+    [
+        board.SQUARE_BITS[:, permutation] @ (1 << np.arange(board.SQUARE_COUNT))
+        for permutation in PERMUTATIONS
+    ]
+)
+
+_TABLE_NAMES = [
+    "CANONICAL_INDICES",
+    "SYMMETRY_IDS",
+    "CANONICAL_BOARD_STATES",
+    "ORBIT_NUMBERS",
+    "CANONICAL_BOARD_STATE_COUNT",
+]
+_tables_lock = threading.Lock()
+
+
+def get_symmetric_indices(x_masks, o_masks):
+    """Calculates the index of every symmetric equivalent of a batch of board states.
+
+    Args:
+        x_masks [ndarray]: Squares occupied by x for each board state
+        o_masks [ndarray]: Squares occupied by o for each board state
+
+    Returns:
+        [ndarray]: Array of shape (SYMMETRY_COUNT, number of board states)
+    """
+
+    return (
+        board.BOARD_STATE_COUNT
+        - 1
+        - 2 * board.INDEX_WEIGHTS[PERMUTED_MASKS[:, x_masks]]
+        - board.INDEX_WEIGHTS[PERMUTED_MASKS[:, o_masks]]
+    )
+
+
+def _build_tables():
+    """Precomputes the canonical form of every board state"""
+
+    canonical_indices = np.empty(board.BOARD_STATE_COUNT, dtype=np.int32)
+    symmetry_ids = np.empty(board.BOARD_STATE_COUNT, dtype=np.int8)
+    for start, stop in board.get_chunks(board.BOARD_STATE_COUNT):
+        x_masks, o_masks = board.masks_from_indices(np.arange(start, stop))
+        symmetric_indices = get_symmetric_indices(x_masks, o_masks)
+        symmetry_ids[start:stop] = symmetric_indices.argmin(axis=0)
+        canonical_indices[start:stop] = symmetric_indices.min(axis=0)
+
+    # A board state is canonical if it is its own canonical form. Number the
+    # canonical board states consecutively.
+    is_canonical = canonical_indices == np.arange(board.BOARD_STATE_COUNT)
+    canonical_board_states = np.flatnonzero(is_canonical).astype(np.int32)
+    orbit_numbers = (np.cumsum(is_canonical, dtype=np.int32) - 1)[canonical_indices]
+    if len(canonical_board_states) <= np.iinfo(np.int16).max:
+        orbit_numbers = orbit_numbers.astype(np.int16)
+
+    return {
+        "CANONICAL_INDICES": canonical_indices,
+        "SYMMETRY_IDS": symmetry_ids,
+        "CANONICAL_BOARD_STATES": canonical_board_states,
+        "ORBIT_NUMBERS": orbit_numbers,
+        "CANONICAL_BOARD_STATE_COUNT": len(canonical_board_states),
+    }
+
+
+def __getattr__(name):
+    """Builds the tables covering every board state when one is first used"""
+
+    if name not in _TABLE_NAMES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    with _tables_lock:
+        if name not in globals():
+            globals().update(_build_tables())
+
+    return globals()[name]
+
+
+def canonicalize(board_state):
+    """Returns the canonical form of a board state.
+
+    Args:
+        board_state [Board]: Validated board state
+
+    Returns:
+        [Board]: Canonical board state
+        [Integer]: Id of the symmetry which maps the board state onto its canonical form
+    """
+
+    symmetric_indices = get_symmetric_indices(
+        np.array([board_state.x_mask]), np.array([board_state.o_mask])
+    )[:, 0]
+    symmetry_id = int(symmetric_indices.argmin())
+    canonical_board = board.Board(
+        int(PERMUTED_MASKS[symmetry_id, board_state.x_mask]),
+        int(PERMUTED_MASKS[symmetry_id, board_state.o_mask]),
+        int(symmetric_indices[symmetry_id]),
+    )
+
+    return canonical_board, symmetry_id
+
+
+def transform(board_state, symmetry_id):
+    """Applies one of the symmetries to a board state.
+
+    Args:
+        board_state [Board]: Validated board state
+        symmetry_id [Integer]: Index into PERMUTATIONS
+
+    Returns:
+        [Board]: Transformed board state
+    """
+
+    return board.Board.from_masks(
+        int(PERMUTED_MASKS[symmetry_id, board_state.x_mask]),
+        int(PERMUTED_MASKS[symmetry_id, board_state.o_mask]),
+    )
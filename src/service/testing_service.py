@@ -1,14 +1,149 @@
-from sklearn import metrics
+"""
+The testing service module evaluates models against the test set. Precision,
+recall and F1 score are all derived from a single confusion matrix, and the
+evaluation of each model is stored alongside it, so that it is only repeated
+when the model or the test set changes.
+"""
+
+import json
+import os
+import time
+
+import numpy as np
+
+from src.service import feature_store, file_service, prediction_service
 
 
 def test_model(model, x_test, y_test):
-    y_predicted = model.predict(x_test)
+    """Evaluates a model against a test set.
+
+    Args:
+        model: SKLearn model
+        x_test [ndarray]: Predictive features of the test set
+        y_test [ndarray]: Target feature of the test set
+
+    Returns:
+        [Dictionary]: The classes, in the order used by the confusion matrix, the
+                      confusion matrix (rows are true classes and columns are
+                      predicted classes), the precision, recall, F1 score and
+                      support of each class, the accuracy, and the time taken to
+                      predict the test set
+    """
+
+    start_time = time.perf_counter()
+    y_predicted = prediction_service.get_predictor(model, len(x_test)).predict(x_test)
+    predict_seconds = time.perf_counter() - start_time
+
+    # Number each label once across both arrays, in sorted order as scikit-learn does
+    classes, label_indices = np.unique(
+        np.concatenate([np.asarray(y_test, dtype=str), y_predicted.astype(str)]),
+        return_inverse=True,
+    )
+    class_count = len(classes)
+    true_indices = label_indices[: len(y_test)]
+    predicted_indices = label_indices[len(y_test) :]
+
+    confusion_matrix = np.bincount(
+        true_indices * class_count + predicted_indices, minlength=class_count**2
+    ).reshape(class_count, class_count)
+
+    true_positives = np.diag(confusion_matrix)
+    support = confusion_matrix.sum(axis=1)
+    predicted_counts = confusion_matrix.sum(axis=0)
+
+    # Undefined ratios are reported as 0, as scikit-learn does
+    precision = _divide(true_positives, predicted_counts)
+    recall = _divide(true_positives, support)
+    f1_score = _divide(2 * precision * recall, precision + recall)
+
+    return {
+        "classes": classes.tolist(),
+        "confusion_matrix": confusion_matrix.tolist(),
+        "precision": _by_class(classes, precision),
+        "recall": _by_class(classes, recall),
+        "f1_score": _by_class(classes, f1_score),
+        "support": _by_class(classes, support),
+        "accuracy": float(true_positives.sum() / len(y_test)),
+        "macro_f1_score": float(f1_score.mean()),
+        "rows": len(y_test),
+        "predict_seconds": predict_seconds,
+        "rows_per_second": len(y_test) / predict_seconds,
+    }
+
+
+def get_evaluation_version(model_number):
+    """Generates a version identifier for the evaluation of a model, which changes
+    whenever the model's file or the test set changes.
+
+    Args:
+        model_number [String]: Integer value corresponding to a ML model
+
+    Returns:
+        [String]: Version identifier
+    """
+
+    return (
+        f"{file_service.get_model_version(model_number)}-{feature_store.get_version()}"
+    )
+
+
+def load_evaluation(model_number, version):
+    """Reads the stored evaluation of a model.
+
+    Args:
+        model_number [String]: Integer value corresponding to a ML model
+        version [String]: Version of the evaluation, see get_evaluation_version
+
+    Returns:
+        [Dictionary]: The evaluation, or None if it has not been stored for this
+                      version of the model and test set
+    """
+
+    try:
+        with open(file_service.get_evaluation_file_name(model_number)) as file:
+            stored_evaluation = json.load(file)
+    except (OSError, ValueError):
+        return None
+
+    if stored_evaluation.get("version") != version:
+        return None
+
+    return stored_evaluation["evaluation"]
+
+
+def save_evaluation(model_number, version, evaluation):
+    """Stores the evaluation of a model.
+
+    Args:
+        model_number [String]: Integer value corresponding to a ML model
+        version [String]: Version of the model and test set which were evaluated,
+                          taken before they were loaded
+        evaluation [Dictionary]: Result of test_model
+    """
+
+    file_name = file_service.get_evaluation_file_name(model_number)
+    stored_evaluation = {"version": version, "evaluation": evaluation}
+
+    temp_file_name = f"{file_name}.{os.getpid()}.tmp"
+    with open(temp_file_name, "w") as file:
+        json.dump(stored_evaluation, file)
+    os.replace(temp_file_name, file_name)
+
+
+def _divide(numerators, denominators):
+    """Divides element-wise, giving 0 where the denominator is 0"""
+
+    numerators = numerators.astype(np.float64)
+
+    return np.divide(
+        numerators,
+        denominators,
+        out=np.zeros_like(numerators),
+        where=denominators != 0,
+    )
 
-    cm = metrics.confusion_matrix(y_test, y_predicted)
-    precision = metrics.precision_score(y_test, y_predicted, average=None)
-    recall = metrics.recall_score(y_test, y_predicted, average=None)
-    f1 = metrics.f1_score(y_test, y_predicted, average=None)
 
-    output = f"f1 Score: {f1}, Precision: {precision}, Recall: {recall}, Confusion Matrix: {cm}"
+def _by_class(classes, values):
+    """Maps each class to its value"""
 
-    return output
+    return {label: value.item() for label, value in zip(classes.tolist(), values)}
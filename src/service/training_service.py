@@ -2,106 +2,677 @@
 The service module contains the model training functionality of the project
 """
 
+import copy
+import os
+import time
+from concurrent import futures
+
+import numpy as np
 import pandas as pd
-from sklearn import model_selection, ensemble
+from sklearn import model_selection, ensemble, metrics
+
+from src.service import (
+    board,
+    config,
+    data_service,
+    dataset_generator,
+    encoding_service,
+    feature_store,
+    generators,
+    search_service,
+)
+
+# Models trained by train_all_models by default
+MODEL_NUMBERS = ["1", "2", "3", "4", "5", "6", "7"]
 
-from src.service import data_service, generators
+# How the training set of each model in data_service.RESAMPLED_MODELS is balanced:
+#   "resample" => duplicate or drop rows, see data_service.get_resampled_rows
+#   "weight" => weight the rows instead, see data_service.get_balanced_weights
+BALANCING = {"3": "resample", "4": "resample", "7": "resample"}
 
+BALANCING_OPTIONS = ["resample", "weight"]
 
-def train_model(model_number):
-    """Loads training data from OpenML and trains a random forest classification model.
+# Ways of retraining a model on a grown dataset, see retrain_model:
+#   "grow" => add trees fitted on the old and new rows
+#   "refresh" => replace the oldest trees with trees fitted on the old and new rows
+RETRAINING_MODES = ["grow", "refresh"]
+
+
+def train_model(
+    model_number, symmetry=None, n_jobs=1, progress=None, balancing=None, search=None
+):
+    """Loads the training set of a model from the feature store, or generates it
+    from the rules of the game (see dataset_generator) and feature engineers it if
+    it is not stored yet, and trains a random forest classification model.
 
     Args:
         model_number: Integer value corresponding to a ML model
+        symmetry: Handling of symmetric board states, see import_data_as_pandas
+        n_jobs: Number of parallel jobs used by the grid search and the forest
+        progress: Optional callback, called as progress(stage, **details) as
+                  training moves through the loading, encoding and fitting stages
+        balancing: Balancing of the training set, see import_data_as_pandas
+        search: Hyper-parameter search, see fit_model
 
     Returns:
         model: Scikit Learn random forest model"""
 
-    # Import dataset from csv
-    predictive_features, target_feature = import_data_as_pandas(
-        model_number, test=False
+    # Import dataset
+    fit_params = {}
+    data = import_data_as_pandas(
+        model_number,
+        test=False,
+        symmetry=symmetry,
+        progress=progress,
+        balancing=balancing,
+    )
+    if len(data) == 3:
+        predictive_features, target_feature, fit_params["sample_weight"] = data
+    else:
+        predictive_features, target_feature = data
+
+    return fit_model(
+        predictive_features,
+        target_feature,
+        n_jobs=n_jobs,
+        progress=progress,
+        search=search,
+        cache=get_search_cache(model_number, symmetry, balancing),
+        **fit_params,
     )
 
-    # Build random forest model and tune hyper-parameters
-    random_forest = ensemble.RandomForestClassifier()
+
+def fit_model(
+    predictive_features,
+    target_feature,
+    n_jobs=1,
+    progress=None,
+    search=None,
+    cache=None,
+    **fit_params,
+):
+    """Builds a random forest model and tunes its hyper-parameters.
+
+    Args:
+        predictive_features: Array of predictive features
+        target_feature: List of target feature values
+        n_jobs: Number of parallel jobs used by the grid search and the forest
+        progress: Optional callback, called as progress("fitting", candidate=k,
+                  candidates=n) before each candidate of the grid search is fitted.
+                  The candidate is only reported when n_jobs == 1.
+        search: "grid" for an exhaustive grid search, or "halving" for a
+                successive halving search (see search_service), TTT_SEARCH by
+                default
+        cache: Identifier of the features under which a halving search caches
+               its scores, from get_search_cache, or None
+        fit_params: Additional parameters passed to the fit, e.g. sample_weight
+
+    Returns:
+        model: Scikit Learn random forest model"""
+
+    search = search or config.SEARCH
+    if search == "halving":
+        return search_service.halving_search(
+            predictive_features,
+            target_feature,
+            generators.get_param_grid(),
+            resource=config.SEARCH_RESOURCE,
+            time_budget=config.SEARCH_TIME_BUDGET or None,
+            cache=cache,
+            n_jobs=n_jobs,
+            progress=progress,
+            sample_weight=fit_params.get("sample_weight"),
+        )
+    if search != "grid":
+        raise ValueError("Invalid search option")
+
+    random_forest = ensemble.RandomForestClassifier(n_jobs=n_jobs)
     param_grid = generators.get_param_grid()
-    model = model_selection.GridSearchCV(random_forest, param_grid)
-    model.fit(predictive_features, target_feature)
+    model = model_selection.GridSearchCV(random_forest, param_grid, n_jobs=n_jobs)
+
+    # The scorer runs in this process, and can report each candidate, only if
+    # the grid search is not parallel
+    report_candidates = progress is not None and n_jobs == 1
+    if progress is not None:
+        candidates = len(model_selection.ParameterGrid(param_grid))
+        if report_candidates:
+            model.scoring = _get_progress_scorer(
+                progress, candidates, model_selection.check_cv(model.cv).get_n_splits()
+            )
+            progress("fitting", candidate=1, candidates=candidates)
+        else:
+            progress("fitting", candidate=None, candidates=candidates)
+
+    model.fit(predictive_features, target_feature, **fit_params)
+
+    if report_candidates:
+        # Restore the default scorer, so that the progress callback is not
+        # saved with the model
+        model.scoring = None
+        model.scorer_ = metrics.check_scoring(random_forest)
 
     return model
 
 
-def import_data_as_pandas(model_number, test=False):
-    """Imports the dataset from a csv file, from which a training or test set is
-    taken. The sample is then encoded, resampled, and feature engineered as
+def get_search_cache(model_number, symmetry=None, balancing=None):
+    """Identifies a model's training set for the cache of a halving search.
+
+    Args:
+        model_number [String]: Value corresponding to a ML model
+        symmetry [String]: Handling of symmetric board states
+        balancing [String]: Balancing of the training set, see get_balancing
+
+    Returns:
+        [Tuple]: Version of the feature store, and key of the training set
+    """
+
+    store_options = _get_store_options(symmetry, get_balancing(model_number, balancing))
+
+    return feature_store.get_version(), feature_store.get_key(
+        model_number, **store_options
+    )
+
+
+def retrain_model(
+    model,
+    model_number,
+    data_delta,
+    mode="grow",
+    trees=None,
+    balancing=None,
+    n_jobs=1,
+):
+    """Retrains a model incrementally when the dataset grows, instead of training
+    a new model from scratch. The forest of the model is warm started: only the
+    trees which are added are fitted, on the model's training set together with
+    the new rows. The hyper-parameters of the model are kept.
+
+    Args:
+        model: Scikit Learn random forest model, or a search (e.g. GridSearchCV)
+               whose best estimator is one. It is not modified.
+        model_number [String]: Value corresponding to a ML model
+        data_delta [DataFrame]: New labelled board states, in the layout of the
+                                dataset (see dataset_generator.get_data_frame)
+        mode [String]: "grow" or "refresh", see RETRAINING_MODES
+        trees [Integer]: Number of trees fitted. By default, half of the forest's
+                         trees are added when growing, and a quarter of them are
+                         replaced when refreshing.
+        balancing [String]: Balancing of the training set, see get_balancing.
+                            When balanced by weight, the weights are recalculated
+                            with the new rows; otherwise the new rows are added
+                            unresampled.
+        n_jobs [Integer]: Number of parallel jobs used by the forest
+
+    Returns:
+        model: The retrained model, of the same type as the given model
+        [Dictionary]: Report of the retraining: the mode, the number of rows and
+                      new rows, the number of trees fitted and in the forest, and
+                      the seconds taken to fit them
+    """
+
+    if mode not in RETRAINING_MODES:
+        raise ValueError("Invalid retraining mode")
+
+    forest = getattr(model, "best_estimator_", model)
+    if not isinstance(forest, ensemble.RandomForestClassifier):
+        raise ValueError("Model is not a random forest classifier")
+
+    model_number = str(model_number)
+    balancing = get_balancing(model_number, balancing)
+    data = import_data_as_pandas(model_number, balancing=balancing)
+    delta_features, delta_target = data_service.encode_features(
+        data_delta, model_number, resample=False
+    )
+
+    predictive_features = np.concatenate([data[0], delta_features])
+    target_feature = np.concatenate([data[1], delta_target.astype(str)])
+    fit_params = {}
+    if balancing == "weight":
+        fit_params["sample_weight"] = data_service.get_balanced_weights(
+            target_feature, upsample=data_service.RESAMPLED_MODELS[model_number]
+        )
+
+    # Trees fitted before would predict the wrong classes if the classes changed
+    if not np.array_equal(np.unique(target_feature), forest.classes_):
+        raise ValueError("New rows change the classes, so the model must be retrained")
+
+    forest = copy.deepcopy(forest)
+    if mode == "grow":
+        trees = trees or max(forest.n_estimators // 2, 1)
+        forest.n_estimators += trees
+    else:
+        trees = min(trees or max(forest.n_estimators // 4, 1), forest.n_estimators)
+        forest.estimators_ = forest.estimators_[trees:]
+
+    start_time = time.perf_counter()
+    forest.set_params(warm_start=True, n_jobs=n_jobs)
+    forest.fit(predictive_features, target_feature, **fit_params)
+    forest.set_params(warm_start=False)
+    fit_seconds = time.perf_counter() - start_time
+
+    if hasattr(model, "best_estimator_"):
+        retrained_model = copy.copy(model)
+        retrained_model.best_estimator_ = forest
+        retrained_model.best_params_ = dict(
+            model.best_params_, n_estimators=forest.n_estimators
+        )
+    else:
+        retrained_model = forest
+
+    report = {
+        "mode": mode,
+        "rows": len(target_feature),
+        "new_rows": len(delta_target),
+        "trees_fitted": trees,
+        "trees": len(forest.estimators_),
+        "fit_seconds": fit_seconds,
+    }
+
+    return retrained_model, report
+
+
+def _get_progress_scorer(progress, candidates, splits):
+    """Creates a scorer which is equivalent to the default accuracy scorer of a
+    classifier, and which reports the grid search's progress as each fold is scored.
+
+    Args:
+        progress: Callback, see fit_model
+        candidates [Integer]: Number of parameter combinations in the grid
+        splits [Integer]: Number of cross validation folds per candidate
+
+    Returns:
+        [Function]: Scorer accepted by GridSearchCV
+    """
+
+    scored_folds = 0
+
+    def scorer(estimator, predictive_features, target_feature):
+        nonlocal scored_folds
+        score = estimator.score(predictive_features, target_feature)
+
+        scored_folds += 1
+        if scored_folds % splits == 0 and scored_folds < candidates * splits:
+            progress(
+                "fitting", candidate=scored_folds // splits + 1, candidates=candidates
+            )
+
+        return score
+
+    return scorer
+
+
+def train_all_models(
+    model_numbers=None, processes=None, n_jobs=1, balancing=None, search=None
+):
+    """Trains several models in parallel. The dataset is read and split once, and
+    the features of each model are engineered once in this process, unless they
+    are already in the feature store. They are then shared with the worker
+    processes through the feature store's memory-mapped files.
+
+    Args:
+        model_numbers [String[]]: Models to train, all models by default
+        processes [Integer]: Number of worker processes, one per model by default
+                             (up to the number of CPUs)
+        n_jobs [Integer]: Number of parallel jobs used within each worker
+        balancing [Dictionary]: model_number => "resample" or "weight", overriding
+                                BALANCING for the given models
+        search [String]: Hyper-parameter search, see fit_model
+
+    Returns:
+        [Dictionary]: model_number => trained model
+        [Dictionary]: model_number => timing report
+    """
+
+    model_numbers = model_numbers or MODEL_NUMBERS
+    processes = processes or min(len(model_numbers), os.cpu_count() or 1)
+    data_split = None
+
+    models = {}
+    report = {}
+    jobs = {}
+    with futures.ProcessPoolExecutor(max_workers=processes) as executor:
+        for model_number in model_numbers:
+            start_time = time.perf_counter()
+            model_balancing = get_balancing(
+                model_number, (balancing or {}).get(model_number)
+            )
+            store_options = _get_store_options(None, model_balancing)
+
+            file_names = feature_store.get_feature_files(model_number, **store_options)
+            cached = file_names is not None
+            if not cached:
+                if not board.GEOMETRY_SUFFIX:
+                    data_split = data_split or load_data_split()
+                arrays = encode_data_set(
+                    model_number, data_split=data_split, balancing=model_balancing
+                )
+                file_names = feature_store.save_features(
+                    model_number, arrays, **store_options
+                )
+
+            rows, features = np.load(file_names["features"], mmap_mode="r").shape
+            report[model_number] = {
+                "rows": rows,
+                "features": features,
+                "feature_seconds": time.perf_counter() - start_time,
+                "cached": cached,
+                "balancing": model_balancing,
+            }
+            jobs[model_number] = executor.submit(
+                _fit_shared_model,
+                file_names["features"],
+                file_names["target"],
+                n_jobs,
+                file_names.get("sample_weight"),
+                search,
+                get_search_cache(model_number, balancing=model_balancing),
+            )
+
+        for model_number, job in jobs.items():
+            models[model_number], fit_seconds = job.result()
+            report[model_number]["fit_seconds"] = fit_seconds
+            report[model_number]["best_score"] = models[model_number].best_score_
+            report[model_number]["best_params"] = models[model_number].best_params_
+
+    return models, report
+
+
+def _fit_shared_model(
+    features_file,
+    target_file,
+    n_jobs,
+    sample_weight_file=None,
+    search=None,
+    cache=None,
+):
+    """Worker process entry point for train_all_models"""
+
+    start_time = time.perf_counter()
+    predictive_features = np.load(features_file, mmap_mode="r")
+    target_feature = np.load(target_file, mmap_mode="r")
+    fit_params = {}
+    if sample_weight_file is not None:
+        fit_params["sample_weight"] = np.load(sample_weight_file, mmap_mode="r")
+    model = fit_model(
+        predictive_features,
+        target_feature,
+        n_jobs=n_jobs,
+        search=search,
+        cache=cache,
+        **fit_params,
+    )
+
+    return model, time.perf_counter() - start_time
+
+
+def format_training_report(report):
+    """Formats the report of train_all_models as a table.
+
+    Args:
+        report [Dictionary]: model_number => timing report
+
+    Returns:
+        [String]: The formatted report
+    """
+
+    lines = [
+        f"{'model':>5} {'rows':>7} {'features':>8} {'features (s)':>12}"
+        f" {'fit (s)':>8} {'best score':>10}"
+    ]
+    for model_number, timings in report.items():
+        lines.append(
+            f"{model_number:>5} {timings['rows']:>7} {timings['features']:>8}"
+            f" {timings['feature_seconds']:>12.3f} {timings['fit_seconds']:>8.3f}"
+            f" {timings['best_score']:>10.4f}"
+        )
+
+    return "\n".join(lines)
+
+
+def get_balancing(model_number, balancing=None):
+    """Returns how the training set of a model is balanced.
+
+    Args:
+        model_number [String]: Value corresponding to a ML model
+        balancing [String]: "resample" or "weight", or None for the model's
+                            setting in BALANCING
+
+    Returns:
+        [String]: "resample" or "weight", or None if the model's training set is
+                  not balanced
+    """
+
+    if balancing is not None and balancing not in BALANCING_OPTIONS:
+        raise ValueError("Invalid balancing option")
+
+    model_number = str(model_number)
+    if model_number not in data_service.RESAMPLED_MODELS:
+        return None
+
+    return balancing or BALANCING.get(model_number, "resample")
+
+
+def _get_store_options(symmetry, balancing):
+    """Returns the options identifying a training set in the feature store. Sets
+    balanced by weight are stored apart from the resampled sets of the same model."""
+
+    store_options = {"symmetry": symmetry}
+    if balancing == "weight":
+        store_options["balancing"] = balancing
+
+    return store_options
+
+
+def import_data_as_pandas(
+    model_number, test=False, symmetry=None, progress=None, balancing=None
+):
+    """Imports the dataset (see dataset_generator), from which a training or test
+    set is taken. The sample is then encoded, resampled, and feature engineered as
     appropriate for the given model_number.
 
+    The result is kept in the feature store, from which it is memory-mapped by
+    later calls until the dataset or the feature engineering code changes.
+
+    Board states which are rotations or reflections of each other always share
+    the same outcome, so they may optionally be collapsed into a single row:
+        "deduplicate" => keep only the first row of each set of symmetric board states
+        "reweight" => as above, and return the number of rows each remaining row
+                      represents as its sample weight. Resampling is skipped, since
+                      duplicated rows could not be matched to their weights.
+
+    The training sets of some models are balanced so that all outcomes are equally
+    represented (see get_balancing), either by resampling their rows or by weighting
+    them. Weighting keeps every row once, and also applies to reweighted sets.
+
     Args:
         model_number [Integer]: Value corresponding to a ML model
         test [Boolean]: Set as True if the test dataset is required
+        symmetry [String]: None, "deduplicate" or "reweight"
+        progress [Function]: Optional callback, called as progress(stage) at the
+                             start of the "loading" and "encoding" stages
+        balancing [String]: "resample" or "weight", overriding BALANCING
 
     Returns:
-        Integer[] : Array of predictive features
-        Integer[] : List of target feature values
+        Float[] : Array of predictive features
+        String[] : List of target feature values
+        Float[] : List of sample weights (only returned if symmetry == "reweight",
+                  or if the training set is balanced by weight)
     """
 
-    # Read the dataset from a csv file
-    with open("ml-ttt-data.csv") as csv_string:
-        input_data = pd.read_csv(csv_string, index_col=0)
+    if symmetry not in [None, "deduplicate", "reweight"]:
+        raise ValueError("Invalid symmetry option")
 
-    # Split the data into a training set and a test set
-    training_set, test_set = model_selection.train_test_split(
-        input_data, test_size=0.75, train_size=0.25, random_state=0
-    )
+    balancing = None if test else get_balancing(model_number, balancing)
+    store_options = _get_store_options(symmetry, balancing)
+
+    if progress is not None:
+        progress("loading")
+
+    arrays = feature_store.load_features(model_number, test=test, **store_options)
+    if arrays is None:
+        if progress is not None:
+            progress("encoding")
+
+        arrays = encode_data_set(
+            model_number, test=test, symmetry=symmetry, balancing=balancing
+        )
+        feature_store.save_features(model_number, arrays, test=test, **store_options)
+
+    if symmetry == "reweight" or balancing == "weight":
+        return arrays["features"], arrays["target"], arrays["sample_weight"]
+
+    return arrays["features"], arrays["target"]
+
+
+def encode_data_set(
+    model_number, test=False, symmetry=None, data_split=None, balancing=None
+):
+    """Builds the arrays held by the feature store for a model's training or test set.
+
+    The features are stored as float32, which is the dtype used by the forest, and
+    the labels as fixed-width strings so that both can be memory-mapped.
+
+    Args:
+        model_number [String]: Value corresponding to a ML model
+        test [Boolean]: Set as True if the test dataset is required
+        symmetry [String]: None, "deduplicate" or "reweight"
+        data_split [Tuple]: Training and test sets from load_data_split, which
+                            are generated if not given
+        balancing [String]: "resample" or "weight", overriding BALANCING
+
+    Returns:
+        [Dictionary]: "features", "target" and, if symmetry == "reweight" or the
+                      training set is balanced by weight, "sample_weight" arrays
+    """
+
+    if board.GEOMETRY_SUFFIX:
+        return encode_generated_set(
+            model_number, test=test, symmetry=symmetry, balancing=balancing
+        )
+
+    training_set, test_set = data_split or load_data_split()
     data_set = test_set if test else training_set
 
-    # Apply any necessary manipulation
-    if model_number == "1":  # Onhot encoded
-        data_set = data_service.onehot_encode(data_set)
+    arrays = {}
+    if symmetry == "deduplicate":
+        data_set = data_service.deduplicate_symmetries(data_set)
+    elif symmetry == "reweight":
+        data_set, arrays["sample_weight"] = data_service.reweight_symmetries(data_set)
+    elif symmetry is not None:
+        raise ValueError("Invalid symmetry option")
+
+    balancing = None if test else get_balancing(model_number, balancing)
+    resample = balancing == "resample" and symmetry != "reweight"
+    features, target = data_service.encode_features(
+        data_set, model_number, resample=resample
+    )
 
-    elif model_number == "2":  # Ordinal encoded
-        data_set = data_service.ordinal_encode(data_set)
+    arrays["features"] = features
+    arrays["target"] = target.astype(str)
+
+    if balancing == "weight":
+        arrays["sample_weight"] = data_service.get_balanced_weights(
+            target,
+            upsample=data_service.RESAMPLED_MODELS[str(model_number)],
+            sample_weight=arrays.get("sample_weight"),
+        )
+
+    return arrays
 
-    elif model_number == "3":  # Downsampled dataset
-        if not test:
-            data_set = data_service.ordinal_encode(
-                data_service.downsample_dataset(data_set)
-            )
-        else:
-            data_set = data_service.ordinal_encode(data_set)
 
-    elif model_number == "4":  # Upsampled dataset
-        if not test:
-            data_set = data_service.ordinal_encode(
-                data_service.upsample_dataset(data_set)
+def encode_generated_set(model_number, test=False, symmetry=None, balancing=None):
+    """Builds the arrays held by the feature store for a board other than 3x3,
+    whose dataset is too large for a DataFrame. The board states are encoded a chunk at a time by
+    encoding_service, whose features match those of engineer_features, so the
+    only arrays held in full are the results.
+
+    Args:
+        model_number [String]: Value corresponding to a ML model
+        test [Boolean]: Set as True if the test dataset is required
+        symmetry [String]: None, "deduplicate" or "reweight"
+        balancing [String]: "resample" or "weight", overriding BALANCING
+
+    Returns:
+        [Dictionary]: "features", "target" and, if symmetry == "reweight" or the
+                      training set is balanced by weight, "sample_weight" arrays
+    """
+
+    model_number = str(model_number)
+    balancing = None if test else get_balancing(model_number, balancing)
+    features = []
+    targets = []
+    sample_weights = []
+    for x_masks, o_masks, winners, sample_weight in data_service.iter_generated_chunks(
+        test=test, symmetry_option=symmetry
+    ):
+        features.append(
+            encoding_service.encode_masks(
+                x_masks, o_masks, model_number, dtype=np.float32
             )
-        else:
-            data_set = data_service.ordinal_encode(data_set)
+        )
+        targets.append(winners)
+        sample_weights.append(sample_weight)
 
-    elif model_number == "5":  # Number of x, o, b
-        data_set = data_service.ordinal_encode(
-            data_service.calculate_move_counts(data_set)
+    arrays = {"features": np.concatenate(features), "target": np.concatenate(targets)}
+
+    if symmetry == "reweight":
+        arrays["sample_weight"] = np.concatenate(sample_weights)
+
+    if balancing == "weight":
+        arrays["sample_weight"] = data_service.get_balanced_weights(
+            arrays["target"],
+            upsample=data_service.RESAMPLED_MODELS[model_number],
+            sample_weight=arrays.get("sample_weight"),
+        )
+    elif balancing == "resample" and symmetry != "reweight":
+        rows = data_service.get_resampled_rows(
+            arrays["target"], upsample=data_service.RESAMPLED_MODELS[model_number]
         )
+        arrays = {name: array[rows] for name, array in arrays.items()}
 
-    elif model_number == "6":  # Adjacent pairs of x, o, b
-        data_set = data_service.calculate_adjacent_symbols(data_set).iloc[:, 9:]
+    return arrays
 
-    elif model_number == "7":  # Best model
-        if not test:
-            data_set = data_service.ordinal_encode(
-                data_service.calculate_adjacent_symbols(
-                    data_service.upsample_dataset(data_set)
-                )
-            )
-        else:
-            data_set = data_service.ordinal_encode(
-                data_service.calculate_adjacent_symbols(data_set)
-            )
 
-    else:
-        raise ValueError("Invalid model_number")
+def load_data_split():
+    """Generates the dataset, or reads it from the file set by TTT_DATASET_FILE,
+    and splits it into a training set and a test set.
+
+    Returns:
+        [DataFrame]: Training set
+        [DataFrame]: Test set
+    """
+
+    # Generate the dataset, in the layout of the csv file it replaces
+    input_data = dataset_generator.get_data_frame(dataset_generator.get_dataset())
+
+    # Split the data into a training set and a test set
+    training_set, test_set = model_selection.train_test_split(
+        input_data, test_size=0.75, train_size=0.25, random_state=0
+    )
+
+    return training_set, test_set
+
 
-    predictive_features = data_set.iloc[:, :].values
-    target_feature = data_set.index.values
+def engineer_features(data_set, model_number, resample=True):
+    """Encodes, resamples, and feature engineers a dataset as appropriate for
+    the given model_number.
 
-    return predictive_features, target_feature
+    Args:
+        data_set [DataFrame]: Pandas DataFrame containing the board state columns
+        model_number [String]: Value corresponding to a ML model
+        resample [Boolean]: Set as False to skip any up/downsampling
+
+    Returns:
+        [DataFrame]: Dataset containing the predictive features of the model
+    """
+
+    features, target = data_service.encode_features(
+        data_set, model_number, resample=resample
+    )
+
+    return pd.DataFrame(
+        features,
+        index=pd.Index(target, name=data_set.index.name),
+        columns=data_service.get_feature_names(model_number),
+        copy=False,
+    )
@@ -2,26 +2,57 @@
 The validator module is used to verify that user inputs are valid
 """
 
+from src.service import board, config
+
 
 def validate_board_state(board_state):
-    """Raises an exception if the input is not a nine-character string
-    containing only characters from {"x", "o", "b"}
+    """Raises an exception if the input is not a string with one character per
+    square of the board (nine for a 3x3 board), containing only characters from
+    {"x", "o", "b"}
 
     Args:
-        board_state: string corresponding to a board state."""
+        board_state: string corresponding to a board state.
 
-    try:
-        if len(board_state) != 9:
-            raise ValueError("Validation Error: Incorrect length")
+    Returns:
+        [Board]: The validated board state"""
 
-        for char in board_state:
-            if not char in ["x", "o", "b"]:
-                raise ValueError("Validation Error: Invalid character")
+    try:
+        return board.Board.from_string(board_state)
 
-    except:
+    except ValueError:
         raise ValueError("Validation Error: Invalid input") from Exception
 
 
+def validate_board_states(board_states):
+    """Checks each board state in a batch. Raises an exception if the batch
+    itself is not a list of an acceptable size.
+
+    Args:
+        board_states: list of strings corresponding to board states.
+
+    Returns:
+        [Board[]]: The validated board state for each item, or None if it is invalid
+        [String[]]: Validation error for each item, or None if it is valid"""
+
+    if not isinstance(board_states, list):
+        raise ValueError("Validation Error: Board states must be a list")
+
+    if len(board_states) > config.MAX_BATCH_SIZE:
+        raise ValueError("Validation Error: Too many board states")
+
+    boards = []
+    errors = []
+    for board_state in board_states:
+        try:
+            boards.append(board.Board.from_string(board_state))
+            errors.append(None)
+        except ValueError as error:
+            boards.append(None)
+            errors.append(str(error))
+
+    return boards, errors
+
+
 def validate_model_number(model_number):
     """Raises an exception if the input is not a valid model number.
 
@@ -0,0 +1,175 @@
+"""
+The warm-up service module loads models before the server receives traffic, so
+that the first request for a model does not pay for loading it, compiling its
+forest and mapping its answer table. Readiness is only reported once every
+configured model has been warmed up.
+"""
+
+import threading
+import time
+from typing import Any, Dict
+
+from src.service import (
+    answer_tables,
+    config,
+    file_service,
+    forest_engine,
+    model_registry,
+    prediction_service,
+)
+from src.service.board import SQUARE_COUNT, Board
+
+WARMUP_BOARD_STATE = "b" * SQUARE_COUNT
+
+NOT_STARTED = "not_started"
+WARMING_UP = "warming_up"
+READY = "ready"
+FAILED = "failed"
+
+_status: Dict[str, Any] = {
+    "status": NOT_STARTED,
+    "started_at": None,
+    "finished_at": None,
+    "models": {},
+}
+_status_lock = threading.Lock()
+
+
+def warm_up(model_numbers=None):
+    """Loads each model, runs a prediction with it and maps its answer table,
+    which is compiled first if it is missing.
+
+    Args:
+        model_numbers [String[]]: Models to warm up, TTT_PRELOAD_MODELS by default
+
+    Returns:
+        [Boolean]: True if every model was warmed up
+    """
+
+    if model_numbers is None:
+        model_numbers = config.PRELOAD_MODELS
+
+    with _status_lock:
+        _status.update(
+            status=WARMING_UP, started_at=time.time(), finished_at=None, models={}
+        )
+
+    succeeded = True
+    for model_number in model_numbers:
+        try:
+            model_status = warm_up_model(model_number)
+        except Exception as error:
+            model_status = {"error": str(error) or type(error).__name__}
+            succeeded = False
+
+        with _status_lock:
+            _status["models"][model_number] = model_status
+
+    with _status_lock:
+        _status.update(status=READY if succeeded else FAILED, finished_at=time.time())
+
+    return succeeded
+
+
+def warm_up_model(model_number):
+    """Loads a model into the model registry, runs a prediction with it and maps
+    its answer table.
+
+    Args:
+        model_number [String]: Integer value corresponding to a ML model
+
+    Returns:
+        [Dictionary]: Load and warm-up times, and memory size of the model and
+                      its answer table
+    """
+
+    start_time = time.perf_counter()
+    model = model_registry.get_model(model_number)
+    load_seconds = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    board = Board.from_string(WARMUP_BOARD_STATE)
+    user_input = prediction_service.handle_user_input(board, model_number)
+    prediction_service.evaluate_prediction(model, user_input)
+
+    # Compile the answer table if the model has been saved since it was built
+    table = answer_tables.get_table(model_number)
+    if table is None:
+        answer_tables.compile_table(model, model_number)
+        table = answer_tables.get_table(model_number)
+    answer_tables.lookup(table, board)
+    warmup_seconds = time.perf_counter() - start_time
+
+    engine = forest_engine.get_engine(model)
+
+    return {
+        "load_seconds": load_seconds,
+        "warmup_seconds": warmup_seconds,
+        "file_size_bytes": file_service.get_model_size(model_number),
+        "memory_bytes": engine.nbytes if engine is not None else None,
+        "answer_table_bytes": table.nbytes,
+    }
+
+
+def start_warm_up(model_numbers=None):
+    """Warms up the models in a background thread.
+
+    Args:
+        model_numbers [String[]]: Models to warm up, TTT_PRELOAD_MODELS by default
+
+    Returns:
+        [Thread]: The warm-up thread
+    """
+
+    with _status_lock:
+        _status["status"] = WARMING_UP
+
+    thread = threading.Thread(
+        target=warm_up, args=(model_numbers,), name="warm-up", daemon=True
+    )
+    thread.start()
+
+    return thread
+
+
+def is_ready():
+    """Returns True once every configured model has been warmed up"""
+
+    with _status_lock:
+        return _status["status"] == READY
+
+
+def get_status():
+    """Returns the progress of the warm-up.
+
+    Returns:
+        [Dictionary]: Overall status, and the load time, warm-up time and memory
+                      size of each warmed up model
+    """
+
+    with _status_lock:
+        return dict(
+            _status,
+            models={
+                model_number: dict(model_status)
+                for model_number, model_status in _status["models"].items()
+            },
+        )
+
+
+def set_status(status):
+    """Replaces the progress of the warm-up, e.g. to restore the status of the
+    models which are still served after a warm-up has failed.
+
+    Args:
+        status [Dictionary]: Progress of the warm-up, as returned by get_status
+    """
+
+    with _status_lock:
+        _status.update(
+            status,
+            models={
+                model_number: dict(model_status)
+                for model_number, model_status in status["models"].items()
+            },
+        )
@@ -2,7 +2,7 @@ import pytest
 from unittest import mock
 import os
 
-from src.service import api, controller
+from src.service import api, controller, job_service
 
 
 @mock.patch("src.service.api.jsonify")
@@ -15,12 +15,27 @@ from src.service import api, controller
         "criterion": ["entropy"],
     },
 )
+@mock.patch(
+    "src.service.api.controller.file_service.get_table_file_name",
+    return_value="src/test/resources/temp.npy",
+)
+@mock.patch(
+    "src.service.api.controller.file_service.get_pickle_file_name",
+    return_value="src/test/resources/temp_estimator.pkl",
+)
 @mock.patch(
     "src.service.api.controller.file_service.get_file_name",
     return_value="src/test/resources/temp.pkl",
 )
-def test_train_model(mock_get_file_name, mock_param_grid, mock_jsonify):
-    """Test that the train_model api produces a file. This file is then deleted."""
+def test_train_model(
+    mock_get_file_name,
+    mock_get_pickle_file_name,
+    mock_get_table_file_name,
+    mock_param_grid,
+    mock_jsonify,
+):
+    """Test that the train_model api starts a training job which produces a model
+    file, its pickle file and an answer table. These files are then deleted."""
 
     train_model = api.train_model.__wrapped__
     success = True
@@ -28,7 +43,13 @@ def test_train_model(mock_get_file_name, mock_param_grid, mock_jsonify):
 
     try:
         train_model(model_number)
+        job_id = mock_jsonify.call_args.kwargs["message"]["job_id"]
+        status = job_service.wait(job_id, timeout=120)
+        assert status["status"] == job_service.SUCCEEDED
+        assert status["stage"] == "saving"
         os.remove("src/test/resources/temp.pkl")
+        os.remove("src/test/resources/temp_estimator.pkl")
+        os.remove("src/test/resources/temp.npy")
     except:
         success = False
 
@@ -103,3 +124,23 @@ def test_get_prediction_unsuccessful(mock_get_file_name, mock_jsonify):
     mock_jsonify.assert_called_once_with(
         status=500, message="Server was unable to process the request"
     )
+
+
+@mock.patch(
+    "src.service.controller.file_service.get_file_name",
+    return_value="src/test/resources/model.pkl",
+)
+def test_get_predictions(mock_get_file_name):
+    """Test that the batch prediction api returns results in input order"""
+
+    client = api.app.test_client()
+    request_body = {"model_number": "1", "board_states": ["bbbbbbbbb", "abc", "xxx"]}
+
+    response = client.post("/get-predictions", json=request_body).get_json()
+    results = response["message"]
+
+    assert response["status"] == 200
+    assert [result["board_state"] for result in results] == ["bbbbbbbbb", "abc", "xxx"]
+    assert results[0]["prediction"] in ["nobody", "x", "o", "everyone"]
+    assert "error" in results[1]
+    assert "error" in results[2]
@@ -0,0 +1,91 @@
+from unittest import mock
+import os
+import pickle
+
+import numpy as np
+
+from src.service import answer_tables, prediction_service, symmetry
+from src.service.board import Board
+
+
+@mock.patch(
+    "src.service.answer_tables.file_service.get_file_name",
+    return_value="src/test/resources/model.pkl",
+)
+def test_compile_table_matches_model(mock_get_file_name, tmp_path):
+    """Test that the compiled table agrees with the live model"""
+
+    with open("src/test/resources/model.pkl", "rb") as file:
+        model = pickle.load(file)
+
+    table_file_name = str(tmp_path / "tables" / "model_1_{}.npy")
+    with mock.patch(
+        "src.service.answer_tables.file_service.get_table_file_name",
+        side_effect=lambda model_number, version: table_file_name.format(version),
+    ):
+        file_name = answer_tables.compile_table(model, "1")
+        table = answer_tables.get_table("1")
+
+    assert file_name.startswith(str(tmp_path))
+    assert table.shape == (19683,)
+
+    # Compare against the single board prediction path for a sample of boards
+    for index in range(0, 19683, 97):
+        board_state = Board.from_index(index)
+        user_input = prediction_service.handle_user_input(board_state, "1")
+        expected_prediction = prediction_service.evaluate_prediction(model, user_input)
+
+        assert answer_tables.lookup(table, board_state) == expected_prediction
+
+
+@mock.patch(
+    "src.service.answer_tables.file_service.get_file_name",
+    return_value="src/test/resources/model.pkl",
+)
+def test_compile_table_concurrently(mock_get_file_name, tmp_path):
+    """Test that a table compiled by two processes at once is not an error"""
+
+    with open("src/test/resources/model.pkl", "rb") as file:
+        model = pickle.load(file)
+
+    table_file_name = str(tmp_path / "tables" / "model_1_{}.npy")
+    with mock.patch(
+        "src.service.answer_tables.file_service.get_table_file_name",
+        side_effect=lambda model_number, version: table_file_name.format(version),
+    ):
+        file_name = answer_tables.compile_table(model, "1")
+
+        # The other process replaces the table first, and ours cannot replace it
+        with mock.patch(
+            "src.service.answer_tables.os.replace", side_effect=PermissionError
+        ):
+            assert answer_tables.compile_table(model, "1") == file_name
+
+    assert os.listdir(tmp_path / "tables") == [os.path.basename(file_name)]
+
+
+@mock.patch(
+    "src.service.answer_tables.file_service.get_table_file_name",
+    return_value="src/test/resources/missing.npy",
+)
+@mock.patch(
+    "src.service.answer_tables.file_service.get_model_version", return_value="v0"
+)
+def test_get_table_missing(mock_get_model_version, mock_get_table_file_name):
+    """Test that no table is returned if it has not been compiled"""
+
+    assert answer_tables.get_table("1") is None
+
+
+def test_lookup_canonical_table():
+    """Test that a canonical table answers every symmetric equivalent identically"""
+
+    table = np.zeros(2862, dtype=np.uint8)
+    canonical_board = Board.from_string("xobbbbbbb")
+    table[symmetry.ORBIT_NUMBERS[canonical_board.index]] = 3
+
+    for symmetry_id in range(symmetry.SYMMETRY_COUNT):
+        board_state = symmetry.transform(canonical_board, symmetry_id)
+        assert answer_tables.lookup(table, board_state) == "everyone"
+
+    assert answer_tables.lookup(table, Board.from_string("bbbbbbbbb")) == "x"
@@ -1,8 +1,18 @@
 from unittest import mock
 
+import pytest
+
 import src.service.api as api
 
 
+@pytest.fixture(autouse=True)
+def clear_response_cache():
+    """Keeps the responses of mocked predictions out of the shared response cache"""
+
+    yield
+    api.response_cache.clear()
+
+
 @mock.patch("src.service.api.jsonify")
 @mock.patch("src.service.api.controller.get_prediction", return_value="prediction")
 def test_get_prediction_success(mock_controller, mock_jsonify):
@@ -57,7 +67,7 @@ def test_get_prediction_server_error(mock_controller, mock_jsonify):
 
 
 @mock.patch("src.service.api.jsonify")
-@mock.patch("src.service.api.controller.train_model", return_value="prediction")
+@mock.patch("src.service.api.controller.submit_training_job", return_value="job")
 def test_train_model_success(mock_controller, mock_jsonify):
     """
     Test for a successful request
@@ -69,13 +79,11 @@ def test_train_model_success(mock_controller, mock_jsonify):
     train_model(model_number)
 
     mock_controller.assert_called_once_with(model_number)
-    mock_jsonify.assert_called_once_with(
-        status=200, message="Model successfully trained"
-    )
+    mock_jsonify.assert_called_once_with(status=202, message={"job_id": "job"})
 
 
 @mock.patch("src.service.api.jsonify")
-@mock.patch("src.service.api.controller.train_model", side_effect=ValueError)
+@mock.patch("src.service.api.controller.submit_training_job", side_effect=ValueError)
 def test_train_model_validation_error(mock_controller, mock_jsonify):
     """
     Test for an unsuccessful request due to an invalid input
@@ -91,7 +99,7 @@ def test_train_model_validation_error(mock_controller, mock_jsonify):
 
 
 @mock.patch("src.service.api.jsonify")
-@mock.patch("src.service.api.controller.train_model", side_effect=Exception)
+@mock.patch("src.service.api.controller.submit_training_job", side_effect=Exception)
 def test_train_model_server_error(mock_controller, mock_jsonify):
     """
     Test for an unsuccessful request due to a runtime error
@@ -106,3 +114,205 @@ def test_train_model_server_error(mock_controller, mock_jsonify):
     mock_jsonify.assert_called_once_with(
         status=500, message="Server was unable to process the request"
     )
+
+
+@mock.patch("src.service.api.jsonify")
+@mock.patch(
+    "src.service.api.controller.submit_train_all_models_job", return_value="job"
+)
+def test_train_all_models_success(mock_controller, mock_jsonify):
+    """
+    Test that training every model is started in the background
+    """
+
+    train_all_models = api.train_all_models.__wrapped__
+
+    train_all_models()
+
+    mock_controller.assert_called_once_with()
+    mock_jsonify.assert_called_once_with(status=202, message={"job_id": "job"})
+
+
+@mock.patch("src.service.api.jsonify")
+@mock.patch(
+    "src.service.api.controller.submit_train_all_models_job", side_effect=Exception
+)
+def test_train_all_models_server_error(mock_controller, mock_jsonify):
+    """
+    Test for an unsuccessful request due to a runtime error
+    """
+
+    train_all_models = api.train_all_models.__wrapped__
+
+    train_all_models()
+
+    mock_jsonify.assert_called_once_with(
+        status=500, message="Server was unable to process the request"
+    )
+
+
+@mock.patch("src.service.api.jsonify")
+@mock.patch("src.service.api.controller.get_predictions", return_value=["predictions"])
+def test_get_predictions_success(mock_controller, mock_jsonify):
+    """
+    Test for a successful batch request
+    """
+
+    get_predictions = api.get_predictions.__wrapped__
+    request_body = {"model_number": "1", "board_states": ["bbbbbbbbb"]}
+
+    with api.app.test_request_context(method="POST", json=request_body):
+        get_predictions()
+
+    mock_controller.assert_called_once_with(["bbbbbbbbb"], "1")
+    mock_jsonify.assert_called_once_with(status=200, message=["predictions"])
+
+
+@mock.patch("src.service.api.jsonify")
+@mock.patch("src.service.api.controller.get_predictions")
+def test_get_predictions_invalid_body(mock_controller, mock_jsonify):
+    """
+    Test for an unsuccessful batch request due to a body which is not a JSON object
+    """
+
+    get_predictions = api.get_predictions.__wrapped__
+
+    with api.app.test_request_context(method="POST", data="not json"):
+        get_predictions()
+
+    mock_controller.assert_not_called()
+    mock_jsonify.assert_called_once_with(status=400, message="Invalid request")
+
+
+@mock.patch("src.service.api.jsonify")
+@mock.patch(
+    "src.service.api.controller.get_training_job", return_value={"status": "running"}
+)
+def test_get_training_job_success(mock_controller, mock_jsonify):
+    """
+    Test for a successful request
+    """
+
+    get_training_job = api.get_training_job.__wrapped__
+
+    get_training_job("job")
+
+    mock_controller.assert_called_once_with("job")
+    mock_jsonify.assert_called_once_with(status=200, message={"status": "running"})
+
+
+@mock.patch("src.service.api.jsonify")
+@mock.patch("src.service.api.controller.get_training_job", side_effect=ValueError)
+def test_get_training_job_validation_error(mock_controller, mock_jsonify):
+    """
+    Test for an unsuccessful request due to an unknown job id
+    """
+
+    get_training_job = api.get_training_job.__wrapped__
+
+    get_training_job("job")
+
+    mock_jsonify.assert_called_once_with(status=400, message="Invalid request")
+
+
+@mock.patch("src.service.api.jsonify", return_value="response")
+@mock.patch("src.service.api.warmup_service.get_status", return_value="status")
+@mock.patch("src.service.api.warmup_service.is_ready", return_value=True)
+def test_ready_success(mock_is_ready, mock_get_status, mock_jsonify):
+    """
+    Test that the instance reports that it is ready
+    """
+
+    response = api.ready.__wrapped__()
+
+    mock_jsonify.assert_called_once_with(status=200, message="status")
+    assert response == "response"
+
+
+@mock.patch("src.service.api.jsonify", return_value="response")
+@mock.patch("src.service.api.warmup_service.get_status", return_value="status")
+@mock.patch("src.service.api.warmup_service.is_ready", return_value=False)
+def test_ready_warming_up(mock_is_ready, mock_get_status, mock_jsonify):
+    """
+    Test that a 503 status code is returned until the instance is ready
+    """
+
+    response = api.ready.__wrapped__()
+
+    mock_jsonify.assert_called_once_with(status=503, message="status")
+    assert response == ("response", 503)
+
+
+@mock.patch("src.service.api.metrics_service.render", return_value="metrics\n")
+def test_metrics(mock_render):
+    """
+    Test that the metrics are returned in the Prometheus text format
+    """
+
+    response = api.app.test_client().get("/metrics")
+
+    assert response.status_code == 200
+    assert response.content_type == api.metrics_service.CONTENT_TYPE
+    assert response.get_data(as_text=True) == "metrics\n"
+
+
+@mock.patch("src.service.api.profiler_service.save_profile")
+@mock.patch("src.service.api.profiler_service.should_profile", return_value=True)
+@mock.patch("src.service.api.controller.get_prediction", return_value="prediction")
+def test_request_profiled(mock_controller, mock_should_profile, mock_save_profile):
+    """
+    Test that a sampled request is profiled and tagged with its route
+    """
+
+    api.app.test_client().get("/get-prediction/bbbbbbbbb/1", headers={"X-Profile": "1"})
+
+    mock_should_profile.assert_called_once_with("1")
+    profiler, route, model_number, duration_seconds = mock_save_profile.call_args[0]
+    assert route == "get_prediction"
+    assert duration_seconds > 0
+
+
+@mock.patch(
+    "src.service.api.controller.get_prediction_etag", return_value="0123456789abcdef"
+)
+@mock.patch("src.service.api.controller.get_prediction", return_value="x")
+def test_get_prediction_cached(mock_controller, mock_get_prediction_etag):
+    """
+    Test that a repeated prediction is answered from the response cache, and a
+    current copy is answered with 304 Not Modified
+    """
+
+    client = api.app.test_client()
+    response = client.get("/get-prediction/xxxoobbbb/1")
+    cached_response = client.get("/get-prediction/xxxoobbbb/1")
+    not_modified_response = client.get(
+        "/get-prediction/xxxoobbbb/1",
+        headers={"If-None-Match": response.headers["ETag"]},
+    )
+
+    mock_controller.assert_called_once_with("xxxoobbbb", "1")
+    assert response.headers["ETag"] == '"0123456789abcdef"'
+    assert "max-age" in response.headers["Cache-Control"]
+    assert cached_response.get_data() == response.get_data()
+    assert cached_response.get_json() == {"status": 200, "message": "x"}
+    assert cached_response.headers["ETag"] == response.headers["ETag"]
+    assert not_modified_response.status_code == 304
+    assert not_modified_response.get_data() == b""
+
+
+@mock.patch(
+    "src.service.api.controller.get_prediction_etag", return_value="0123456789abcdef"
+)
+@mock.patch("src.service.api.controller.get_prediction", side_effect=ValueError)
+def test_get_prediction_error_not_cached(mock_controller, mock_get_prediction_etag):
+    """
+    Test that an unsuccessful prediction is neither cached nor tagged
+    """
+
+    client = api.app.test_client()
+    response = client.get("/get-prediction/xxxoobbbb/1")
+    client.get("/get-prediction/xxxoobbbb/1")
+
+    assert mock_controller.call_count == 2
+    assert "ETag" not in response.headers
+    assert response.get_json()["status"] == 400
@@ -0,0 +1,108 @@
+import itertools
+
+import pytest
+
+from src.service import board as board_module
+from src.service.board import Board, masks_from_indices
+
+
+def test_from_string():
+    """Test that the masks and index are calculated in one pass"""
+
+    board = Board.from_string("xobboxobx")
+
+    assert board.x_mask == 0b100100001
+    assert board.o_mask == 0b001010010
+    assert board.index == int("012210120", 3)
+    assert str(board) == "xobboxobx"
+
+
+def test_index_matches_dataset_order():
+    """Test that the index numbers board states in the same order as the dataset"""
+
+    board_states = ["".join(squares) for squares in itertools.product("xob", repeat=9)]
+    x_masks, o_masks = masks_from_indices(range(len(board_states)))
+
+    for index, board_state in enumerate(board_states):
+        board = Board.from_string(board_state)
+
+        assert board.index == index
+        assert board.x_mask == x_masks[index]
+        assert board.o_mask == o_masks[index]
+        assert Board.from_masks(board.x_mask, board.o_mask).index == index
+
+
+def test_from_index():
+    """Test conversion from an index back to a board state"""
+
+    assert str(Board.from_index(0)) == "xxxxxxxxx"
+    assert str(Board.from_index(1)) == "xxxxxxxxo"
+    assert str(Board.from_index(19682)) == "bbbbbbbbb"
+
+
+@pytest.mark.parametrize(
+    "board_state, exception_message",
+    [
+        ("xxxxxxxx", "Validation Error: Incorrect length"),
+        ("xxxxxxxxxx", "Validation Error: Incorrect length"),
+        ("xxxxxxxxy", "Validation Error: Invalid character"),
+        ("xxxx1xxxx", "Validation Error: Invalid character"),
+        (123456789, "Validation Error: Invalid input"),
+    ],
+)
+def test_from_string_invalid(board_state, exception_message):
+    """Test that invalid board states raise an exception"""
+
+    with pytest.raises(ValueError) as error:
+        Board.from_string(board_state)
+
+    assert str(error.value) == exception_message
+
+
+def test_counts():
+    """Test the piece, adjacency and line counts"""
+
+    board = Board.from_string("xxxoobbbo")
+
+    assert board.x_count == 3
+    assert board.o_count == 3
+    assert board.adjacent_counts("x") == [2, 0, 0, 0]
+    assert board.adjacent_counts("o") == [1, 0, 0, 1]
+    assert board.line_count("x") == 1
+    assert board.line_count("o") == 0
+
+
+def test_get_lines():
+    """Test the winning runs of larger boards"""
+
+    lines = board_module.get_lines(4, 3)
+
+    assert len(lines) == 24  # 8 horizontal, 8 vertical and 8 diagonal
+    assert [0, 1, 2] in lines
+    assert [0, 5, 10] in lines
+    assert [3, 6, 9] in lines
+    assert [7, 10, 13] in lines
+    assert len(board_module.get_lines(4, 4)) == 10
+
+
+def test_build_tables_4x4():
+    """Test the lookup tables of a 4x4 board"""
+
+    square_bits, piece_counts, adjacent_counts, line_counts, index_weights = (
+        board_module.build_tables(4, 3)
+    )
+
+    # x on the top row and the positive diagonal from the bottom-left corner
+    mask = 0b0001001001001111
+
+    assert square_bits.shape == (2**16, 16)
+    assert piece_counts[mask] == 7
+    assert adjacent_counts[mask].tolist() == [3, 1, 3, 1]
+    assert line_counts[mask] == 4
+    assert index_weights[1] == 3**15
+
+
+def test_get_chunks():
+    """Test that chunks cover every item once"""
+
+    assert list(board_module.get_chunks(10, 4)) == [(0, 4), (4, 8), (8, 10)]
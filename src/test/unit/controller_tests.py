@@ -1,6 +1,10 @@
+import pickle
+
+import pytest
 from unittest import mock
 
 from src.service import controller
+from src.service.board import Board
 
 
 class mock_model:
@@ -8,17 +12,20 @@ class mock_model:
         return "['response']"
 
 
+@mock.patch("src.service.controller.answer_tables.get_table", return_value=None)
 @mock.patch(
-    "src.service.controller.file_service.load_model_from_file",
+    "src.service.controller.model_registry.get_model",
     return_value=mock_model(),
 )
 @mock.patch(
     "src.service.controller.prediction_service.handle_user_input",
     return_value="user_input",
 )
-@mock.patch("src.service.controller.validator.validate_board_state")
+@mock.patch(
+    "src.service.controller.validator.validate_board_state", return_value="board"
+)
 def test_get_prediction(
-    mock_validate_board_state, mock_handle_user_input, mock_load_model_from_file
+    mock_validate_board_state, mock_handle_user_input, mock_get_model, mock_get_table
 ):
     """
     Test for a successful request
@@ -29,23 +36,333 @@ def test_get_prediction(
     response = controller.get_prediction(board_state, model_number)
 
     mock_validate_board_state.assert_called_once_with(board_state)
-    mock_handle_user_input.assert_called_once_with(board_state)
-    mock_load_model_from_file.assert_called_once_with(model_number)
+    mock_handle_user_input.assert_called_once_with("board", model_number)
+    mock_get_model.assert_called_once_with(model_number)
 
     assert response == "response"
 
 
+@mock.patch(
+    "src.service.controller.answer_tables.lookup", return_value="table_response"
+)
+@mock.patch("src.service.controller.answer_tables.get_table", return_value="table")
+@mock.patch("src.service.controller.model_registry.get_model")
+def test_get_prediction_from_table(mock_get_model, mock_get_table, mock_lookup):
+    """
+    Test that a compiled answer table is used instead of the model
+    """
+
+    board_state = "xobboxobx"
+    model_number = "1"
+    response = controller.get_prediction(board_state, model_number)
+
+    mock_get_table.assert_called_once_with(model_number)
+    mock_lookup.assert_called_once_with("table", Board.from_string(board_state))
+    mock_get_model.assert_not_called()
+
+    assert response == "table_response"
+
+
+@mock.patch("src.service.controller.answer_tables.compile_table")
+@mock.patch("src.service.controller.model_registry.evict")
+@mock.patch("src.service.controller.file_service.save_estimator_to_file")
 @mock.patch("src.service.controller.file_service.save_model_to_file")
 @mock.patch("src.service.controller.training_service.train_model", return_value="model")
 @mock.patch("src.service.controller.validator.validate_model_number")
 def test_train_model(
-    mock_validate_model_number, mock_train_model, mock_save_model_to_file
+    mock_validate_model_number,
+    mock_train_model,
+    mock_save_model_to_file,
+    mock_save_estimator,
+    mock_evict,
+    mock_compile_table,
 ):
     """
     Test for a successful request
     """
 
-    controller.train_model(0)
+    response = controller.train_model(0)
     mock_validate_model_number.assert_called_once_with(0)
-    mock_train_model.assert_called_once_with(0)
+    mock_train_model.assert_called_once_with(0, progress=None)
     mock_save_model_to_file.assert_called_once_with("model", 0)
+    mock_save_estimator.assert_called_once_with("model", 0)
+    mock_evict.assert_called_once_with(0)
+    mock_compile_table.assert_called_once_with("model", 0)
+    assert response == "model"
+
+
+@mock.patch("src.service.controller.answer_tables.get_table", return_value=None)
+@mock.patch(
+    "src.service.controller.prediction_service.evaluate_predictions",
+    return_value=["x", "o"],
+)
+@mock.patch(
+    "src.service.controller.prediction_service.handle_user_inputs",
+    return_value="user_inputs",
+)
+@mock.patch("src.service.controller.model_registry.get_model", return_value="model")
+def test_get_predictions(
+    mock_get_model, mock_handle_user_inputs, mock_evaluate_predictions, mock_get_table
+):
+    """
+    Test that valid board states are predicted together and invalid ones are
+    reported in input order
+    """
+
+    board_states = ["xxxoobbbb", "xxx", "ooobxxbxb"]
+    response = controller.get_predictions(board_states, 1)
+
+    mock_handle_user_inputs.assert_called_once_with(
+        [Board.from_string("xxxoobbbb"), Board.from_string("ooobxxbxb")], "1"
+    )
+    mock_evaluate_predictions.assert_called_once_with("model", "user_inputs")
+
+    assert response == [
+        {"board_state": "xxxoobbbb", "prediction": "x"},
+        {"board_state": "xxx", "error": "Validation Error: Incorrect length"},
+        {"board_state": "ooobxxbxb", "prediction": "o"},
+    ]
+
+
+@mock.patch("src.service.controller.answer_tables.compile_table")
+@mock.patch("src.service.controller.model_registry.evict")
+@mock.patch("src.service.controller.file_service.save_estimator_to_file")
+@mock.patch("src.service.controller.file_service.save_model_to_file")
+@mock.patch(
+    "src.service.controller.training_service.train_all_models",
+    return_value=({"1": "model_1", "2": "model_2"}, "report"),
+)
+def test_train_all_models(
+    mock_train_all_models,
+    mock_save_model_to_file,
+    mock_save_estimator,
+    mock_evict,
+    mock_compile_table,
+):
+    """
+    Test that every trained model is saved
+    """
+
+    response = controller.train_all_models()
+
+    mock_save_model_to_file.assert_has_calls(
+        [mock.call("model_1", "1"), mock.call("model_2", "2")]
+    )
+    mock_save_estimator.assert_has_calls(
+        [mock.call("model_1", "1"), mock.call("model_2", "2")]
+    )
+    mock_compile_table.assert_has_calls(
+        [mock.call("model_1", "1"), mock.call("model_2", "2")]
+    )
+    assert response == "report"
+
+
+@mock.patch("src.service.controller.job_service.submit_job", return_value="job")
+@mock.patch("src.service.controller.train_model")
+def test_submit_training_job(mock_train_model, mock_submit_job):
+    """
+    Test that training is submitted as a job keyed on the model number
+    """
+
+    mock_train_model.return_value.best_score_ = 0.9
+    mock_train_model.return_value.best_params_ = {"max_depth": 8}
+
+    response = controller.submit_training_job("1")
+
+    assert response == "job"
+    key, run_training_job = mock_submit_job.call_args[0]
+    assert key == "1"
+
+    progress = mock.Mock()
+    result = run_training_job(progress)
+
+    mock_train_model.assert_called_once_with("1", progress=progress)
+    assert result["best_score"] == 0.9
+    assert result["best_params"] == {"max_depth": 8}
+
+
+@mock.patch("src.service.controller.job_service.submit_job", return_value="job")
+@mock.patch("src.service.controller.train_all_models", return_value="report")
+def test_submit_train_all_models_job(mock_train_all_models, mock_submit_job):
+    """
+    Test that training every model is submitted as a single job
+    """
+
+    response = controller.submit_train_all_models_job()
+
+    assert response == "job"
+    key, run_training_job = mock_submit_job.call_args[0]
+    assert key == "all-models"
+    resources = mock_submit_job.call_args.kwargs["resources"]
+    assert resources == ["1", "2", "3", "4", "5", "6", "7"]
+
+    progress = mock.Mock()
+    result = run_training_job(progress)
+
+    mock_train_all_models.assert_called_once_with(progress=progress)
+    assert result["models"] == "report"
+
+
+def test_submit_training_job_invalid_model():
+    """
+    Test that an invalid model number is rejected before a job is submitted
+    """
+
+    with pytest.raises(ValueError):
+        controller.submit_training_job(0)
+
+
+@mock.patch("src.service.controller.job_service.get_job", return_value=None)
+def test_get_training_job_unknown(mock_get_job):
+    """
+    Test that an unknown job id is rejected
+    """
+
+    with pytest.raises(ValueError):
+        controller.get_training_job("job")
+
+
+@mock.patch("src.service.controller.testing_service.save_evaluation")
+@mock.patch("src.service.controller.testing_service.test_model", return_value="metrics")
+@mock.patch(
+    "src.service.controller.training_service.import_data_as_pandas",
+    return_value=("features", "target"),
+)
+@mock.patch("src.service.controller.model_registry.get_model", return_value="model")
+@mock.patch("src.service.controller.testing_service.load_evaluation", return_value=None)
+@mock.patch(
+    "src.service.controller.testing_service.get_evaluation_version",
+    return_value="v1",
+)
+def test_test_model(
+    mock_get_evaluation_version,
+    mock_load_evaluation,
+    mock_get_model,
+    mock_import_data_as_pandas,
+    mock_test_model,
+    mock_save_evaluation,
+):
+    """
+    Test that a model is evaluated and the evaluation stored
+    """
+
+    response = controller.test_model("1")
+
+    mock_load_evaluation.assert_called_once_with("1", "v1")
+    mock_import_data_as_pandas.assert_called_once_with("1", test=True)
+    mock_test_model.assert_called_once_with("model", "features", "target")
+    mock_save_evaluation.assert_called_once_with("1", "v1", "metrics")
+
+    assert response == "metrics"
+
+
+@mock.patch("src.service.controller.testing_service.test_model")
+@mock.patch("src.service.controller.model_registry.get_model")
+@mock.patch(
+    "src.service.controller.testing_service.load_evaluation", return_value="stored"
+)
+@mock.patch(
+    "src.service.controller.testing_service.get_evaluation_version",
+    return_value="v1",
+)
+def test_test_model_stored(
+    mock_get_evaluation_version, mock_load_evaluation, mock_get_model, mock_test_model
+):
+    """
+    Test that a stored evaluation is returned without loading the model
+    """
+
+    response = controller.test_model("1")
+
+    mock_get_model.assert_not_called()
+    mock_test_model.assert_not_called()
+
+    assert response == "stored"
+
+
+@mock.patch("src.service.controller.file_service.get_model_version", return_value="v2")
+@mock.patch("src.service.controller.answer_tables.compile_table")
+@mock.patch("src.service.controller.model_registry.evict")
+@mock.patch("src.service.controller.file_service.save_model_to_file")
+@mock.patch("src.service.controller.file_service.save_estimator_to_file")
+@mock.patch(
+    "src.service.controller.training_service.retrain_model",
+    return_value=("retrained", {"mode": "grow"}),
+)
+@mock.patch(
+    "src.service.controller.file_service.load_estimator_from_file",
+    return_value="model",
+)
+def test_retrain_model(
+    mock_load_estimator,
+    mock_retrain_model,
+    mock_save_estimator,
+    mock_save_model_to_file,
+    mock_evict,
+    mock_compile_table,
+    mock_get_model_version,
+):
+    """
+    Test that a retrained model is saved as a new version, with its estimator
+    """
+
+    response = controller.retrain_model("4", "ml-ttt-data.csv", trees=3)
+
+    data_delta = mock_retrain_model.call_args[0][2]
+    assert len(data_delta) == 19683
+    mock_retrain_model.assert_called_once_with(
+        "model", "4", data_delta, mode="grow", trees=3
+    )
+    mock_save_estimator.assert_called_once_with("retrained", "4")
+    mock_save_model_to_file.assert_called_once_with("retrained", "4")
+    mock_evict.assert_called_once_with("4")
+    assert response == {"mode": "grow", "version": "v2"}
+
+
+@mock.patch("src.service.controller.answer_tables.compile_table")
+@mock.patch("src.service.controller.model_registry.evict")
+def test_retrain_model_after_train_model(mock_evict, mock_compile_table, tmp_path):
+    """
+    Test that a model can be retrained after it has been trained in full
+    """
+
+    with open("models/model_2.pkl", "rb") as file:
+        model = pickle.load(file)
+
+    with mock.patch(
+        "src.service.file_service.get_pickle_file_name",
+        return_value=f"{tmp_path}/model_2.pkl",
+    ), mock.patch(
+        "src.service.file_service.get_file_name",
+        return_value=f"{tmp_path}/model_2.forest",
+    ), mock.patch(
+        "src.service.controller.training_service.train_model", return_value=model
+    ), mock.patch(
+        "src.service.controller.training_service.retrain_model",
+        side_effect=lambda model, *args, **kwargs: (model, {"mode": "grow"}),
+    ) as mock_retrain_model:
+        controller.train_model("2")
+        response = controller.retrain_model("2", "ml-ttt-data.csv")
+
+    retrained_model = mock_retrain_model.call_args[0][0]
+    assert len(retrained_model.best_estimator_.estimators_) == len(
+        model.best_estimator_.estimators_
+    )
+    assert response["mode"] == "grow"
+
+
+@mock.patch("src.service.controller.file_service.get_model_version")
+def test_get_prediction_etag(mock_get_model_version):
+    """
+    Test that the ETag of a prediction changes when the model is retrained, and
+    that invalid requests are rejected
+    """
+
+    mock_get_model_version.return_value = "v1"
+    etag = controller.get_prediction_etag("xxxoobbbb", "1")
+    mock_get_model_version.return_value = "v2"
+
+    assert controller.get_prediction_etag("xxxoobbbb", "1") != etag
+    mock_get_model_version.assert_called_with("1")
+    with pytest.raises(ValueError):
+        controller.get_prediction_etag("xxx", "1")
@@ -1,7 +1,8 @@
 import pytest
+import numpy as np
 import pandas as pd
 
-from src.service import data_service
+from src.service import board, data_service, generators, symmetry
 
 
 @pytest.fixture
@@ -24,3 +25,196 @@ def test_onehot_encode(mock_dataset):
 
 def test_write_tests():
     assert False
+
+
+def test_calculate_adjacent_symbols():
+    """Test the adjacency features of a single board state"""
+
+    columns = [
+        "top-left-square",
+        "top-middle-square",
+        "top-right-square",
+        "middle-left-square",
+        "middle-middle-square",
+        "middle-right-square",
+        "bottom-left-square",
+        "bottom-middle-square",
+        "bottom-right-square",
+    ]
+    # x o x
+    # x x o
+    # o o x
+    dataset = pd.DataFrame([list("xoxxxooox")], columns=columns)
+
+    response = data_service.calculate_adjacent_symbols(dataset)
+
+    assert list(response.columns[9:]) == [
+        "x_adj_horizontal",
+        "x_adj_vertical",
+        "x_adj_diagonal_pos",
+        "x_adj_diagonal_neg",
+        "o_adj_horizontal",
+        "o_adj_vertical",
+        "o_adj_diagonal_pos",
+        "o_adj_diagonal_neg",
+    ]
+    assert list(response.iloc[0, 9:]) == [1, 1, 1, 2, 1, 0, 1, 1]
+
+
+def test_calculate_adjacent_symbols_dataset(mock_dataset):
+    """Test the adjacency features over the whole dataset"""
+
+    response = data_service.calculate_adjacent_symbols(mock_dataset)
+
+    assert response.shape == (19683, 17)
+    assert (response.dtypes[9:] == "int64").all()
+    # Every pair of x squares along every axis: 6 + 6 + 4 + 4 with an all-x board
+    assert list(response.iloc[0, 9:]) == [6, 6, 4, 4, 0, 0, 0, 0]
+
+
+def test_deduplicate_symmetries(mock_dataset):
+    """Test that one row is kept for each set of symmetric board states"""
+
+    response = data_service.deduplicate_symmetries(mock_dataset)
+
+    assert response.shape == (2862, 9)
+    assert (data_service.get_board_indices(response)[:3] == [0, 1, 2]).all()
+
+
+def test_reweight_symmetries(mock_dataset):
+    """Test that the weights count the rows represented by each remaining row"""
+
+    response, sample_weight = data_service.reweight_symmetries(mock_dataset)
+
+    assert response.shape == (2862, 9)
+    assert sample_weight.sum() == 19683
+    # The empty board is its own only symmetric equivalent
+    assert sample_weight[-1] == 1
+
+
+def test_iter_generated_chunks():
+    """Test that the training and test sets split the sampled board states,
+    independently of the chunk size"""
+
+    def get_indices(test, chunk_size):
+        chunks = data_service.iter_generated_chunks(
+            test=test, sample_rate=0.5, chunk_size=chunk_size
+        )
+        return np.concatenate(
+            [
+                board.BOARD_STATE_COUNT
+                - 1
+                - 2 * board.INDEX_WEIGHTS[x_masks]
+                - board.INDEX_WEIGHTS[o_masks]
+                for x_masks, o_masks, _, _ in chunks
+            ]
+        )
+
+    training_indices = get_indices(False, 1000)
+    test_indices = get_indices(True, 1000)
+
+    assert np.array_equal(training_indices, get_indices(False, 5000))
+    assert len(np.intersect1d(training_indices, test_indices)) == 0
+    assert 0.11 < len(training_indices) / board.BOARD_STATE_COUNT < 0.14
+    assert 0.36 < len(test_indices) / board.BOARD_STATE_COUNT < 0.39
+
+
+def test_iter_generated_chunks_reweight():
+    """Test that the weights of the canonical board states count every board state"""
+
+    total_weight = 0
+    canonical_count = 0
+    for test in [False, True]:
+        for x_masks, _, _, sample_weight in data_service.iter_generated_chunks(
+            test=test, symmetry_option="reweight", sample_rate=1.0
+        ):
+            total_weight += sample_weight.sum()
+            canonical_count += len(x_masks)
+
+    assert total_weight == board.BOARD_STATE_COUNT
+    assert canonical_count == symmetry.CANONICAL_BOARD_STATE_COUNT
+
+
+def test_get_resampled_rows():
+    """Test that every outcome is equally represented"""
+
+    target = np.array(["x", "x", "x", "x", "o", "o", "nobody"])
+
+    upsampled_rows = data_service.get_resampled_rows(target, upsample=True)
+    downsampled_rows = data_service.get_resampled_rows(target, upsample=False)
+
+    assert np.unique(target[upsampled_rows], return_counts=True)[1].tolist() == [
+        4,
+        4,
+        4,
+    ]
+    assert sorted(target[downsampled_rows].tolist()) == ["nobody", "o", "x"]
+
+
+def test_get_balanced_weights():
+    """Test that every outcome has the total weight of its resampled rows"""
+
+    target = np.array(["x", "x", "x", "x", "o", "o", "nobody"])
+
+    upsampled_weights = data_service.get_balanced_weights(target, upsample=True)
+    downsampled_weights = data_service.get_balanced_weights(target, upsample=False)
+    reweighted_weights = data_service.get_balanced_weights(
+        target, upsample=True, sample_weight=np.array([1, 1, 1, 1, 1, 3, 2.0])
+    )
+
+    assert upsampled_weights.tolist() == [1, 1, 1, 1, 2, 2, 4]
+    assert downsampled_weights.tolist() == [0.25, 0.25, 0.25, 0.25, 0.5, 0.5, 1]
+    assert reweighted_weights.tolist() == [1, 1, 1, 1, 1, 3, 4]
+
+
+def test_get_code_matrix(mock_dataset):
+    """Test that the board state columns are coded as the ordinal encoding"""
+
+    codes = data_service.get_code_matrix(mock_dataset)
+
+    assert codes.dtype == np.int8
+    np.testing.assert_array_equal(
+        codes, data_service.ordinal_encode(mock_dataset.copy()).values
+    )
+
+
+def test_get_code_matrix_invalid(mock_dataset):
+    """Test that an unknown symbol is rejected"""
+
+    dataset = mock_dataset.head().copy()
+    dataset.iloc[0, 0] = "y"
+
+    with pytest.raises(ValueError):
+        data_service.get_code_matrix(dataset)
+
+
+@pytest.mark.parametrize("model_number, upsample", [("3", False), ("4", True)])
+def test_encode_features_resampled(mock_dataset, model_number, upsample):
+    """Test that the fused pipeline selects the rows of the DataFrame resampling"""
+
+    if upsample:
+        expected = data_service.upsample_dataset(mock_dataset)
+    else:
+        expected = data_service.downsample_dataset(mock_dataset)
+
+    features, target = data_service.encode_features(mock_dataset, model_number)
+
+    assert features.dtype == np.float32
+    np.testing.assert_array_equal(
+        features, data_service.ordinal_encode(expected.copy()).values
+    )
+    np.testing.assert_array_equal(target, expected.index.values)
+
+
+def test_get_feature_names():
+    """Test that the onehot columns are ordered by square, then by symbol"""
+
+    feature_names = data_service.get_feature_names("1")
+
+    assert feature_names[:3] == [
+        "top-left-square_b",
+        "top-left-square_o",
+        "top-left-square_x",
+    ]
+    assert sorted(feature_names) == sorted(generators.get_onehot_column_names())
+    assert data_service.get_feature_names("5")[-2:] == ["x_count", "o_count"]
@@ -0,0 +1,96 @@
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.service import board, dataset_generator
+
+
+@pytest.fixture
+def csv_dataset():
+    with open("ml-ttt-data.csv") as csv_string:
+        return pd.read_csv(csv_string, index_col=0)
+
+
+def test_get_win_line_masks():
+    """Test the bitmasks of the rows, columns and diagonals of a 3x3 board"""
+
+    win_line_masks = dataset_generator.get_win_line_masks(3, 3)
+
+    assert len(win_line_masks) == 8
+    assert 0b000000111 in win_line_masks
+    assert 0b100010001 in win_line_masks
+    assert 0b001010100 in win_line_masks
+
+
+def test_generate_dataset(csv_dataset):
+    """Test that the generated dataset is identical to the csv file"""
+
+    dataset = dataset_generator.generate_dataset(chunk_size=5000)
+
+    assert np.array_equal(dataset["index"], np.arange(board.BOARD_STATE_COUNT))
+    pd.testing.assert_frame_equal(
+        dataset_generator.get_data_frame(dataset), csv_dataset
+    )
+
+
+def test_generate_dataset_legal():
+    """Test that the legal filter only keeps the piece counts of a game"""
+
+    dataset = dataset_generator.generate_dataset("legal")
+    x_masks, o_masks = board.masks_from_indices(dataset["index"])
+    move_differences = board.PIECE_COUNTS[x_masks] - board.PIECE_COUNTS[o_masks]
+
+    assert len(dataset) == 6046
+    assert set(move_differences.tolist()) == {0, 1}
+
+
+def test_generate_dataset_invalid_filter():
+    """Test that an unknown filter is rejected"""
+
+    with pytest.raises(ValueError):
+        dataset_generator.generate_dataset("invalid")
+
+
+def test_save_and_load_dataset(tmp_path):
+    """Test that a saved dataset is read back, with its chunks"""
+
+    file_name = str(tmp_path / "datasets" / "dataset.npy")
+    dataset = dataset_generator.generate_dataset("legal")
+
+    dataset_generator.save_dataset(dataset, file_name)
+
+    assert np.array_equal(dataset_generator.load_dataset(file_name), dataset)
+    chunks = list(
+        dataset_generator.iter_dataset_chunks(
+            file_name=file_name, chunk_size=1000, selector=lambda indices: indices < 100
+        )
+    )
+    indices = np.concatenate([chunk[0] for chunk in chunks])
+    outcome_codes = np.concatenate([chunk[3] for chunk in chunks])
+    assert np.array_equal(indices, dataset["index"][dataset["index"] < 100])
+    assert np.array_equal(outcome_codes, dataset["outcome"][dataset["index"] < 100])
+
+
+def test_load_dataset_invalid(tmp_path):
+    """Test that a file which is not a dataset is rejected"""
+
+    file_name = str(tmp_path / "dataset.npy")
+    np.save(file_name, np.arange(10))
+
+    with pytest.raises(ValueError) as error:
+        dataset_generator.load_dataset(file_name)
+
+    assert str(error.value) == "Invalid dataset file"
+
+
+def test_get_dataset_from_file(tmp_path):
+    """Test that the dataset is read from TTT_DATASET_FILE when it is set"""
+
+    file_name = str(tmp_path / "dataset.npy")
+    dataset = dataset_generator.generate_dataset("legal")
+    dataset_generator.save_dataset(dataset, file_name)
+
+    with mock.patch("src.service.dataset_generator.config.DATASET_FILE", file_name):
+        assert len(dataset_generator.get_dataset()) == len(dataset)
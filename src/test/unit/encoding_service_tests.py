@@ -0,0 +1,53 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+from src.service import encoding_service, training_service
+from src.service.board import Board
+
+
+@pytest.fixture(scope="module")
+def mock_dataset():
+    with open("ml-ttt-data.csv") as csv_string:
+        dataframe = pd.read_csv(csv_string, index_col=0)
+
+    return dataframe
+
+
+@pytest.mark.parametrize("model_number", ["1", "2", "3", "4", "5", "6", "7"])
+def test_encode_board_states_matches_training(mock_dataset, model_number):
+    """Test that every board state is encoded exactly as in the training pipeline"""
+
+    board_states = ["".join(row) for row in mock_dataset.values]
+
+    expected_features = training_service.engineer_features(
+        mock_dataset.copy(), model_number, resample=False
+    ).values
+    actual_features = encoding_service.encode_board_states(board_states, model_number)
+
+    assert actual_features.shape == expected_features.shape
+    np.testing.assert_array_equal(actual_features, expected_features)
+
+
+def test_encode_board_state_onehot():
+    """Test the onehot layout of a single board state"""
+
+    response = encoding_service.encode_board(Board.from_string("xobboxobx"), "1")
+
+    # Columns are ordered by square, then by symbol (b, o, x)
+    expected_response = np.array(
+        [
+            [0, 0, 1, 0, 1, 0, 1, 0, 0, 1, 0, 0, 0, 1, 0, 0, 0, 1]
+            + [0, 1, 0, 1, 0, 0, 0, 0, 1]
+        ],
+        dtype=float,
+    )
+
+    np.testing.assert_array_equal(response, expected_response)
+
+
+def test_encode_board_state_invalid_model():
+    """Test that an unknown model number raises an exception"""
+
+    with pytest.raises(ValueError):
+        encoding_service.encode_board(Board.from_string("xobboxobx"), "8")
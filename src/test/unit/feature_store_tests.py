@@ -0,0 +1,88 @@
+import os
+from unittest import mock
+
+import numpy as np
+import pytest
+
+from src.service import feature_store
+
+
+@pytest.fixture
+def store_directory(tmp_path):
+    """Places the feature store in a temporary directory"""
+
+    with mock.patch(
+        "src.service.feature_store.file_service.get_feature_directory",
+        side_effect=lambda version: f"{tmp_path}/{version}",
+    ):
+        yield tmp_path
+
+
+def get_arrays():
+    return {
+        "features": np.arange(6, dtype=np.float32).reshape(3, 2),
+        "target": np.array(["x", "o", "nobody"]),
+    }
+
+
+def test_save_and_load_features(store_directory):
+    """Test that stored features are loaded as memory-mapped arrays"""
+
+    assert feature_store.load_features("2") is None
+
+    feature_store.save_features("2", get_arrays())
+    arrays = feature_store.load_features("2")
+
+    assert isinstance(arrays["features"], np.memmap)
+    np.testing.assert_array_equal(arrays["features"], get_arrays()["features"])
+    np.testing.assert_array_equal(arrays["target"], get_arrays()["target"])
+    assert feature_store.load_features("2", test=True) is None
+    assert feature_store.load_features("2", symmetry="deduplicate") is None
+
+
+def test_incomplete_features_ignored(store_directory):
+    """Test that a set of features is not loaded until its target is stored"""
+
+    version = feature_store.get_version()
+    os.makedirs(f"{store_directory}/{version}")
+    np.save(f"{store_directory}/{version}/model_2_train_features.npy", np.zeros(1))
+
+    assert feature_store.get_feature_files("2") is None
+
+
+def test_data_change_invalidates_store(store_directory):
+    """Test that the store is replaced when the dataset changes"""
+
+    feature_store.save_features("2", get_arrays())
+    old_version = feature_store.get_version()
+
+    with mock.patch(
+        "src.service.feature_store.file_service.get_data_hash", return_value="0" * 64
+    ):
+        assert feature_store.load_features("2") is None
+
+        feature_store.save_features("2", get_arrays())
+        assert feature_store.load_features("2") is not None
+
+    assert not os.path.exists(f"{store_directory}/{old_version}")
+
+
+def test_get_version():
+    """Test that the version combines the dataset and pipeline hashes"""
+
+    with mock.patch(
+        "src.service.feature_store.get_pipeline_hash", return_value="b" * 64
+    ), mock.patch(
+        "src.service.feature_store.file_service.get_data_hash", return_value="a" * 64
+    ):
+        assert feature_store.get_version() == f"{'a' * 16}-{'b' * 16}"
+
+
+def test_get_key():
+    """Test the identifiers of sets of features"""
+
+    assert feature_store.get_key("1") == "model_1_train"
+    assert feature_store.get_key("1", test=True) == "model_1_test"
+    assert feature_store.get_key("1", symmetry="reweight") == "model_1_train_reweight"
+    assert feature_store.get_key("4", balancing="weight") == "model_4_train_weighted"
+    assert feature_store.get_key("4", balancing="resample") == "model_4_train"
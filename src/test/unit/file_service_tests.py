@@ -1,6 +1,11 @@
+import copy
+import hashlib
+import pickle
 from unittest import mock
 import os
 
+import pytest
+
 from src.service import file_service
 
 
@@ -51,17 +56,122 @@ def test_get_file_name_1():
     """Test the function with an input of 1"""
 
     model_number = 1
-    expected_file_name = "models/model_1.pkl"
+    expected_file_name = "models/model_1.forest"
     file_name = file_service.get_file_name(model_number)
 
     assert file_name == expected_file_name
 
 
-def test_get_file_name_12345():
-    """Test the function with an input of 12345"""
+@mock.patch("src.service.file_service.config.MODEL_FORMAT", "pickle")
+def test_get_file_name_12345_pickle():
+    """Test the function with an input of 12345, when models are saved using pickle"""
 
     model_number = 12345
     expected_file_name = "models/model_12345.pkl"
     file_name = file_service.get_file_name(model_number)
 
     assert file_name == expected_file_name
+
+
+@mock.patch("src.service.file_service.model_artifact.save_model")
+@mock.patch(
+    "src.service.file_service.get_file_name", return_value="models/model_1.forest"
+)
+def test_save_model_to_file_artifact(mock_get_file_name, mock_save_model):
+    """Test that a model is saved as a model artifact, along with the data hash"""
+
+    file_service.save_model_to_file("model", "1")
+
+    mock_save_model.assert_called_once_with(
+        "model", "1", "models/model_1.forest", file_service.get_data_hash()
+    )
+
+
+@mock.patch("src.service.file_service.model_artifact.load_model", return_value="model")
+@mock.patch(
+    "src.service.file_service.get_file_name", return_value="models/model_1.forest"
+)
+def test_load_model_from_file_artifact(mock_get_file_name, mock_load_model):
+    """Test that a model artifact is loaded without unpickling"""
+
+    assert file_service.load_model_from_file("1") == "model"
+    mock_load_model.assert_called_once_with("models/model_1.forest", "1")
+
+
+def test_get_data_hash():
+    """Test that the data hash is a SHA-256 hash, which is stable while the file
+    is unchanged"""
+
+    data_hash = file_service.get_data_hash()
+
+    assert len(data_hash) == 64
+    assert file_service.get_data_hash() == data_hash
+
+
+@mock.patch(
+    "src.service.file_service.get_file_name",
+    return_value="src/test/resources/model.pkl",
+)
+def test_get_model_version(mock_get_file_name):
+    """Test that the version is stable while the file is unchanged"""
+
+    model_number = 0
+
+    first_version = file_service.get_model_version(model_number)
+    second_version = file_service.get_model_version(model_number)
+
+    assert first_version == second_version
+    assert file_service.get_model_size(model_number) == 35399
+
+
+def test_get_data_hash_of_file(tmp_path):
+    """Test that a dataset file is hashed by its contents"""
+
+    file_name = tmp_path / "dataset.npy"
+    file_name.write_bytes(b"dataset")
+
+    with mock.patch("src.service.file_service.config.DATASET_FILE", str(file_name)):
+        data_hash = file_service.get_data_hash()
+
+    assert data_hash == hashlib.sha256(b"dataset").hexdigest()
+    assert data_hash != file_service.get_data_hash()
+
+
+def test_load_estimator_from_file(tmp_path):
+    """Test that a pickled model is only loaded if it matches the model artifact"""
+
+    with open("models/model_2.pkl", "rb") as file:
+        model = pickle.load(file)
+    other_model = copy.deepcopy(model)
+    other_model.best_estimator_.estimators_ = model.best_estimator_.estimators_[1:]
+
+    with mock.patch(
+        "src.service.file_service.get_pickle_file_name",
+        return_value=f"{tmp_path}/model_2.pkl",
+    ), mock.patch(
+        "src.service.file_service.get_file_name", return_value="models/model_2.forest"
+    ):
+        file_service.save_estimator_to_file(model, "2")
+        loaded_model = file_service.load_estimator_from_file("2")
+        assert len(loaded_model.best_estimator_.estimators_) == len(
+            model.best_estimator_.estimators_
+        )
+
+        file_service.save_estimator_to_file(other_model, "2")
+        with pytest.raises(ValueError):
+            file_service.load_estimator_from_file("2")
+
+
+@pytest.mark.parametrize("model_format, pickle_saved", [("forest", 1), ("pickle", 0)])
+@mock.patch("src.service.file_service.save_estimator_to_file")
+@mock.patch("src.service.file_service.save_model_to_file")
+def test_save_model_files(
+    mock_save_model_to_file, mock_save_estimator, model_format, pickle_saved
+):
+    """Test that the pickle file is only written again if it is not the model file"""
+
+    with mock.patch("src.service.file_service.config.MODEL_FORMAT", model_format):
+        file_service.save_model_files("model", "1")
+
+    mock_save_model_to_file.assert_called_once_with("model", "1")
+    assert mock_save_estimator.call_count == pickle_saved
@@ -0,0 +1,103 @@
+import pickle
+import warnings
+from unittest import mock
+
+import numpy as np
+import pytest
+from sklearn import ensemble, model_selection
+
+from src.service import board, encoding_service, file_service, forest_engine
+
+
+@pytest.mark.parametrize("model_number", ["1", "2", "3", "4", "5", "6", "7"])
+def test_compile_forest_matches_saved_model(model_number):
+    """Test that the compiled forest predicts exactly as the saved model does,
+    for every board state"""
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        with open(file_service.get_pickle_file_name(model_number), "rb") as file:
+            model = pickle.load(file)
+
+    x_masks, o_masks = board.masks_from_indices(np.arange(board.BOARD_STATE_COUNT))
+    user_inputs = encoding_service.encode_masks(x_masks, o_masks, model_number)
+
+    engine = forest_engine.compile_forest(model)
+
+    np.testing.assert_array_equal(
+        engine.predict(user_inputs), model.predict(user_inputs)
+    )
+    np.testing.assert_array_equal(
+        engine.predict_proba(user_inputs),
+        model.best_estimator_.predict_proba(user_inputs),
+    )
+
+
+def test_compile_forest_matches_continuous_features():
+    """Test a forest with continuous features, where rows may fall exactly on a
+    threshold and the class probabilities of some rows are tied"""
+
+    random_generator = np.random.default_rng(0)
+    predictive_features = random_generator.normal(size=(500, 4))
+    target_feature = np.array(["x", "o", "nobody"])[
+        random_generator.integers(0, 3, size=500)
+    ]
+    model = ensemble.RandomForestClassifier(
+        n_estimators=4, max_depth=6, random_state=0
+    ).fit(predictive_features, target_feature)
+
+    engine = forest_engine.compile_forest(model)
+
+    test_features = np.concatenate(
+        [
+            random_generator.normal(size=(1000, 4)),
+            np.tile(engine.threshold[:, np.newaxis], (1, 4)),
+        ]
+    )
+    np.testing.assert_array_equal(
+        engine.predict(test_features), model.predict(test_features)
+    )
+    np.testing.assert_array_equal(
+        engine.predict_proba(test_features), model.predict_proba(test_features)
+    )
+
+
+def test_compile_forest_grid_search():
+    """Test that the best estimator of a grid search is compiled"""
+
+    predictive_features = np.arange(40).reshape(20, 2)
+    target_feature = ["x", "o"] * 10
+    model = model_selection.GridSearchCV(
+        ensemble.RandomForestClassifier(n_estimators=2), {"max_depth": [2]}, cv=2
+    ).fit(predictive_features, target_feature)
+
+    engine = forest_engine.compile_forest(model)
+
+    assert engine.n_trees == 2
+    np.testing.assert_array_equal(
+        engine.predict(predictive_features), model.predict(predictive_features)
+    )
+
+
+def test_compile_forest_invalid_model():
+    """Test that models other than random forests are rejected"""
+
+    with pytest.raises(ValueError):
+        forest_engine.compile_forest(mock.Mock(spec=[]))
+
+
+@mock.patch("src.service.forest_engine.compile_forest", return_value="engine")
+def test_get_engine_cached(mock_compile_forest):
+    """Test that a model is only compiled once"""
+
+    model = mock.Mock()
+
+    assert forest_engine.get_engine(model) == "engine"
+    assert forest_engine.get_engine(model) == "engine"
+    mock_compile_forest.assert_called_once_with(model)
+
+
+def test_get_engine_unsupported_model():
+    """Test that None is returned for a model which cannot be compiled"""
+
+    assert forest_engine.get_engine(mock.Mock(spec=[])) is None
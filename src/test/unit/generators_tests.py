@@ -48,3 +48,14 @@ def test_get_param_grid():
     actual_grid = generators.get_param_grid()
 
     assert expected_grid == actual_grid
+
+
+def test_get_board_state_column_names_4x4():
+    """Test that the squares of other boards are named by row and column"""
+
+    column_names = generators.get_board_state_column_names(4)
+
+    assert len(column_names) == 16
+    assert column_names[0] == "row1-column1-square"
+    assert column_names[6] == "row2-column3-square"
+    assert generators.get_onehot_column_names(4)[-1] == "row4-column4-square_b"
@@ -0,0 +1,193 @@
+import threading
+import time
+
+from src.service import job_service
+
+
+def test_submit_job_success():
+    """Test that a job's result and final stage are recorded"""
+
+    jobs = job_service.JobManager(max_workers=1, max_finished_jobs=10)
+
+    def function(progress):
+        progress("fitting", candidate=1, candidates=2)
+        return {"score": 1.0}
+
+    job_id = jobs.submit("1", function)
+    status = jobs.wait(job_id, timeout=5)
+
+    assert status["status"] == job_service.SUCCEEDED
+    assert status["key"] == "1"
+    assert status["stage"] == "fitting"
+    assert status["details"] == {"candidate": 1, "candidates": 2}
+    assert status["result"] == {"score": 1.0}
+    assert status["elapsed_seconds"] >= 0
+
+
+def test_submit_job_failure():
+    """Test that the error of a failed job is recorded"""
+
+    jobs = job_service.JobManager(max_workers=1, max_finished_jobs=10)
+
+    def function(progress):
+        raise RuntimeError("Training failed")
+
+    status = jobs.wait(jobs.submit("1", function), timeout=5)
+
+    assert status["status"] == job_service.FAILED
+    assert status["error"] == "Training failed"
+
+
+def test_submit_job_deduplicated():
+    """Test that a job is not started for a key which already has an active job"""
+
+    jobs = job_service.JobManager(max_workers=2, max_finished_jobs=10)
+    release = threading.Event()
+    calls = []
+
+    def function(progress):
+        calls.append(1)
+        release.wait(5)
+
+    first_job_id = jobs.submit("1", function)
+    second_job_id = jobs.submit("1", function)
+    other_job_id = jobs.submit("2", function)
+    release.set()
+
+    assert first_job_id == second_job_id
+    assert other_job_id != first_job_id
+
+    jobs.wait(first_job_id, timeout=5)
+    jobs.wait(other_job_id, timeout=5)
+    assert len(calls) == 2
+
+    # Once finished, a new job may be started for the same key
+    third_job_id = jobs.submit("1", function)
+    assert third_job_id != first_job_id
+    assert jobs.wait(third_job_id, timeout=5)["status"] == job_service.SUCCEEDED
+
+
+def test_submit_job_shared_resources():
+    """Test that jobs with different keys but overlapping resources run one after
+    the other"""
+
+    jobs = job_service.JobManager(max_workers=2, max_finished_jobs=10)
+    release = threading.Event()
+    started = threading.Event()
+
+    def first_function(progress):
+        started.set()
+        release.wait(5)
+
+    first_job_id = jobs.submit("all-models", first_function, resources=["1", "2"])
+    started.wait(5)
+    second_job_id = jobs.submit("1", lambda progress: None)
+
+    assert second_job_id != first_job_id
+    time.sleep(0.1)
+    assert jobs.get_job(second_job_id)["status"] == job_service.QUEUED
+
+    release.set()
+    assert jobs.wait(second_job_id, timeout=5)["status"] == job_service.SUCCEEDED
+    assert jobs.get_job(first_job_id)["finished_at"] <= (
+        jobs.get_job(second_job_id)["started_at"]
+    )
+
+
+def test_finished_jobs_removed():
+    """Test that only the most recent finished jobs are kept"""
+
+    jobs = job_service.JobManager(max_workers=1, max_finished_jobs=2)
+
+    job_ids = [jobs.submit(str(key), lambda progress: None) for key in range(3)]
+    for job_id in job_ids:
+        jobs.wait(job_id, timeout=5)
+
+    assert jobs.get_job(job_ids[0]) is None
+    assert jobs.get_job(job_ids[2])["status"] == job_service.SUCCEEDED
+
+
+def test_get_job_unknown():
+    """Test that an unknown job id returns None"""
+
+    jobs = job_service.JobManager(max_workers=1, max_finished_jobs=10)
+
+    assert jobs.get_job("unknown") is None
+
+
+def test_shared_job_status(tmp_path):
+    """Test that a job can be polled through the job manager of another process"""
+
+    jobs = job_service.JobManager(1, 10, directory=str(tmp_path))
+    other_jobs = job_service.JobManager(1, 10, directory=str(tmp_path))
+
+    job_id = jobs.submit("1", lambda progress: {"score": 1.0})
+    jobs.wait(job_id, timeout=5)
+    status = other_jobs.get_job(job_id)
+
+    assert status["status"] == job_service.SUCCEEDED
+    assert status["result"] == {"score": 1.0}
+    assert other_jobs.get_job("../1.lock") is None
+
+
+def test_shared_job_deduplicated(tmp_path):
+    """Test that a key only has one active job across the job managers sharing
+    a directory"""
+
+    jobs = job_service.JobManager(1, 10, directory=str(tmp_path))
+    other_jobs = job_service.JobManager(1, 10, directory=str(tmp_path))
+    release = threading.Event()
+
+    job_id = jobs.submit("1", lambda progress: release.wait(5))
+
+    assert other_jobs.submit("1", lambda progress: None) == job_id
+    assert other_jobs.get_job(job_id)["status"] in [
+        job_service.QUEUED,
+        job_service.RUNNING,
+    ]
+
+    release.set()
+    jobs.wait(job_id, timeout=5)
+
+    # Once finished, the lock is released for the other job manager
+    other_job_id = other_jobs.submit("1", lambda progress: None)
+    assert other_job_id != job_id
+    assert jobs.wait(other_job_id, timeout=5)["status"] == job_service.SUCCEEDED
+
+
+def test_shared_job_resources(tmp_path):
+    """Test that jobs with overlapping resources run one after the other across
+    the job managers sharing a directory"""
+
+    jobs = job_service.JobManager(1, 10, directory=str(tmp_path))
+    other_jobs = job_service.JobManager(1, 10, directory=str(tmp_path))
+    release = threading.Event()
+    started = threading.Event()
+
+    def first_function(progress):
+        started.set()
+        release.wait(5)
+
+    job_id = jobs.submit("all-models", first_function, resources=["1", "2"])
+    started.wait(5)
+    other_job_id = other_jobs.submit("2", lambda progress: None)
+
+    time.sleep(0.1)
+    assert other_jobs.get_job(other_job_id)["status"] == job_service.QUEUED
+
+    release.set()
+    status = other_jobs.wait(other_job_id, timeout=5)
+    assert status["status"] == job_service.SUCCEEDED
+
+
+def test_shared_finished_jobs_removed(tmp_path):
+    """Test that the status files of forgotten jobs are deleted"""
+
+    jobs = job_service.JobManager(1, 1, directory=str(tmp_path))
+
+    job_ids = [jobs.submit(str(key), lambda progress: None) for key in range(2)]
+    for job_id in job_ids:
+        jobs.wait(job_id, timeout=5)
+
+    assert not (tmp_path / f"{job_ids[0]}.json").exists()
+    assert (tmp_path / f"{job_ids[1]}.json").exists()
@@ -0,0 +1,108 @@
+from unittest import mock
+
+from src.service import metrics_service
+
+
+def test_observe():
+    """Test that durations are counted in the bucket of their upper bound"""
+
+    metrics_service.reset()
+    labels = (("route", "/test"), ("model_number", "1"))
+
+    metrics_service.observe("ttt_test_seconds", 0.0001, labels)
+    metrics_service.observe("ttt_test_seconds", 0.0002, labels)
+    metrics_service.observe("ttt_test_seconds", 100.0, labels)
+
+    histogram = metrics_service.get_histogram(
+        "ttt_test_seconds", route="/test", model_number="1"
+    )
+    assert histogram["count"] == 3
+    assert histogram["sum"] == 100.0003
+    assert histogram["buckets"][1] == 1  # 0.0001 <= 0.0001
+    assert histogram["buckets"][2] == 1  # 0.0002 <= 0.00025
+    assert histogram["buckets"][-1] == 1  # +Inf
+
+
+def test_stage_timer():
+    """Test that the stages of a request are labelled with its route and model"""
+
+    metrics_service.reset()
+
+    metrics_service.start_request("/get-prediction/<board_state>/<model_number>")
+    timer = metrics_service.StageTimer("3")
+    timer.stage("validate")
+    timer.stage("answer_table")
+    metrics_service.end_request()
+
+    route = "/get-prediction/<board_state>/<model_number>"
+    for stage in ["validate", "answer_table"]:
+        histogram = metrics_service.get_histogram(
+            metrics_service.STAGE_METRIC, route=route, model_number="3", stage=stage
+        )
+        assert histogram["count"] == 1
+
+    histogram = metrics_service.get_histogram(
+        metrics_service.REQUEST_METRIC, route=route, model_number="3"
+    )
+    assert histogram["count"] == 1
+
+
+def test_request_without_stages():
+    """Test that a request which fails validation is not labelled with its model"""
+
+    metrics_service.reset()
+
+    metrics_service.start_request("/test-model/<model_number>")
+    metrics_service.StageTimer("invalid")
+    metrics_service.end_request()
+
+    assert (
+        metrics_service.get_histogram(
+            metrics_service.REQUEST_METRIC,
+            route="/test-model/<model_number>",
+            model_number=metrics_service.NO_LABEL,
+        )["count"]
+        == 1
+    )
+
+
+@mock.patch("src.service.metrics_service.job_service.get_job_counts")
+@mock.patch("src.service.metrics_service.answer_tables.get_table_count", return_value=2)
+@mock.patch("src.service.metrics_service.model_registry.get_stats")
+def test_render(mock_get_stats, mock_get_table_count, mock_get_job_counts):
+    """Test that the metrics are rendered in the Prometheus text format"""
+
+    metrics_service.reset()
+    mock_get_stats.return_value = {
+        "hits": 9,
+        "misses": 1,
+        "hit_rate": 0.9,
+        "evictions": 0,
+        "load_time_seconds": 0.5,
+        "models_in_memory": 1,
+        "memory_used_bytes": 1024,
+    }
+    mock_get_job_counts.return_value = {"queued": 0, "running": 1}
+    metrics_service.observe(
+        metrics_service.STAGE_METRIC, 0.003, (("route", 'a"b'), ("stage", "predict"))
+    )
+
+    lines = metrics_service.render().splitlines()
+
+    assert "# TYPE ttt_stage_duration_seconds histogram" in lines
+    assert (
+        'ttt_stage_duration_seconds_bucket{route="a\\"b",stage="predict",le="0.0025"} 0'
+        in lines
+    )
+    assert (
+        'ttt_stage_duration_seconds_bucket{route="a\\"b",stage="predict",le="0.005"} 1'
+        in lines
+    )
+    assert (
+        'ttt_stage_duration_seconds_bucket{route="a\\"b",stage="predict",le="+Inf"} 1'
+        in lines
+    )
+    assert 'ttt_stage_duration_seconds_count{route="a\\"b",stage="predict"} 1' in lines
+    assert "ttt_model_cache_hit_ratio 0.9" in lines
+    assert "ttt_answer_tables_in_memory 2" in lines
+    assert 'ttt_training_jobs{status="running"} 1' in lines
@@ -0,0 +1,147 @@
+import json
+import pickle
+import warnings
+
+import numpy as np
+import pytest
+from sklearn import ensemble
+
+from src.service import (
+    board,
+    encoding_service,
+    file_service,
+    forest_engine,
+    model_artifact,
+)
+
+
+@pytest.fixture
+def model():
+    """A small forest trained on the ordinal encoding of random board states"""
+
+    random_generator = np.random.default_rng(0)
+    indices = random_generator.integers(0, board.BOARD_STATE_COUNT, size=300)
+    predictive_features = encoding_service.encode_masks(
+        *board.masks_from_indices(indices), "2"
+    )
+    target_feature = np.array(["x", "o", "nobody", "everyone"])[indices % 4]
+
+    return ensemble.RandomForestClassifier(n_estimators=3, random_state=0).fit(
+        predictive_features, target_feature
+    )
+
+
+def is_memory_mapped(array):
+    """Checks whether an array is a view of a memory-mapped file"""
+
+    while array.base is not None and not isinstance(array, np.memmap):
+        array = array.base
+
+    return isinstance(array, np.memmap)
+
+
+def test_save_and_load_model(model, tmp_path):
+    """Test that a loaded artifact predicts exactly as the original model"""
+
+    file_name = str(tmp_path / "model_2.forest")
+    model_artifact.save_model(model, "2", file_name, data_hash="hash")
+
+    loaded_model = model_artifact.load_model(file_name, "2")
+
+    x_masks, o_masks = board.masks_from_indices(np.arange(board.BOARD_STATE_COUNT))
+    user_inputs = encoding_service.encode_masks(x_masks, o_masks, "2")
+    np.testing.assert_array_equal(
+        loaded_model.predict(user_inputs), model.predict(user_inputs)
+    )
+    assert is_memory_mapped(loaded_model.threshold)
+    assert loaded_model.metadata["model_number"] == "2"
+    assert loaded_model.metadata["feature_layout"] == "ordinal"
+    assert loaded_model.metadata["n_features"] == 9
+    assert loaded_model.metadata["classes"] == ["everyone", "nobody", "o", "x"]
+    assert loaded_model.metadata["data_hash"] == "hash"
+    assert forest_engine.get_engine(loaded_model) is loaded_model
+
+
+def test_saved_model_matches_pickle(tmp_path):
+    """Test that a converted saved model predicts exactly as its pickle"""
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        with open(file_service.get_pickle_file_name("5"), "rb") as file:
+            model = pickle.load(file)
+
+    file_name = str(tmp_path / "model_5.forest")
+    model_artifact.save_model(model, "5", file_name)
+    loaded_model = model_artifact.load_model(file_name, "5")
+
+    x_masks, o_masks = board.masks_from_indices(np.arange(board.BOARD_STATE_COUNT))
+    user_inputs = encoding_service.encode_masks(x_masks, o_masks, "5")
+    np.testing.assert_array_equal(
+        loaded_model.predict(user_inputs), model.predict(user_inputs)
+    )
+    assert loaded_model.metadata["best_params"] == model.best_params_
+    assert loaded_model.metadata["best_score"] == model.best_score_
+
+
+def test_load_model_memory_mapped(model, tmp_path):
+    """Test that every array of a loaded artifact is backed by the file's memory map"""
+
+    file_name = str(tmp_path / "model_2.forest")
+    model_artifact.save_model(model, "2", file_name)
+
+    loaded_model = model_artifact.load_model(file_name, "2")
+
+    for name in model_artifact.ARRAYS:
+        assert is_memory_mapped(getattr(loaded_model, name)), name
+
+
+def test_load_model_wrong_model_number(model, tmp_path):
+    """Test that an artifact is not loaded for a model with another feature layout"""
+
+    file_name = str(tmp_path / "model_2.forest")
+    model_artifact.save_model(model, "2", file_name)
+
+    with pytest.raises(ValueError):
+        model_artifact.load_model(file_name, "1")
+
+
+def test_load_model_pickle(tmp_path):
+    """Test that a pickle is rejected rather than unpickled"""
+
+    file_name = str(tmp_path / "model.forest")
+    with open(file_name, "wb") as file:
+        pickle.dump({"model": 1}, file)
+
+    with pytest.raises(ValueError):
+        model_artifact.load_model(file_name)
+
+
+def test_load_model_index_out_of_range(model, tmp_path):
+    """Test that a file whose tree arrays point outside the forest is rejected"""
+
+    file_name = str(tmp_path / "model_2.forest")
+    model_artifact.save_model(model, "2", file_name)
+
+    with open(file_name, "r+b") as file:
+        contents = file.read()
+        header_length = int.from_bytes(contents[8:12], "little")
+        header = json.loads(contents[12 : 12 + header_length])
+        left = next(array for array in header["arrays"] if array["name"] == "left")
+        file.seek(model_artifact._align(12 + header_length) + left["offset"])
+        file.write(np.array([10**6], dtype="<i4").tobytes())
+
+    with pytest.raises(ValueError):
+        model_artifact.load_model(file_name)
+
+
+def test_load_model_truncated(model, tmp_path):
+    """Test that a truncated file is rejected"""
+
+    file_name = str(tmp_path / "model_2.forest")
+    model_artifact.save_model(model, "2", file_name)
+
+    with open(file_name, "r+b") as file:
+        file.truncate(len(file.read()) - 100)
+
+    with pytest.raises(ValueError):
+        model_artifact.load_model(file_name)
@@ -0,0 +1,98 @@
+from unittest import mock
+
+from src.service import model_registry
+
+
+@mock.patch("src.service.model_registry.file_service.get_model_size", return_value=10)
+@mock.patch(
+    "src.service.model_registry.file_service.load_model_from_file",
+    side_effect=lambda model_number: f"model_{model_number}",
+)
+@mock.patch(
+    "src.service.model_registry.file_service.get_model_version", return_value="v1"
+)
+def test_get_model_cached(mock_get_version, mock_load_model, mock_get_size):
+    """Test that a model is only loaded from file once"""
+
+    registry = model_registry.ModelRegistry(max_models=7, memory_budget=1000)
+
+    first_response = registry.get_model("1")
+    second_response = registry.get_model("1")
+
+    assert first_response == "model_1"
+    assert second_response == "model_1"
+    mock_load_model.assert_called_once_with("1")
+
+    stats = registry.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["models_in_memory"] == 1
+    assert stats["memory_used_bytes"] == 10
+
+
+@mock.patch("src.service.model_registry.file_service.get_model_size", return_value=10)
+@mock.patch(
+    "src.service.model_registry.file_service.load_model_from_file",
+    side_effect=["old_model", "new_model"],
+)
+@mock.patch(
+    "src.service.model_registry.file_service.get_model_version",
+    side_effect=["v1", "v2"],
+)
+def test_get_model_new_version(mock_get_version, mock_load_model, mock_get_size):
+    """Test that a model is re-loaded when its file changes"""
+
+    registry = model_registry.ModelRegistry(max_models=7, memory_budget=1000)
+
+    assert registry.get_model("1") == "old_model"
+    assert registry.get_model("1") == "new_model"
+    assert registry.get_stats()["models_in_memory"] == 1
+
+
+@mock.patch("src.service.model_registry.file_service.get_model_size", return_value=10)
+@mock.patch(
+    "src.service.model_registry.file_service.load_model_from_file",
+    side_effect=lambda model_number: f"model_{model_number}",
+)
+@mock.patch(
+    "src.service.model_registry.file_service.get_model_version", return_value="v1"
+)
+def test_get_model_evicts_least_recently_used(
+    mock_get_version, mock_load_model, mock_get_size
+):
+    """Test that the least recently used model is evicted when the cache is full"""
+
+    registry = model_registry.ModelRegistry(max_models=2, memory_budget=1000)
+
+    registry.get_model("1")
+    registry.get_model("2")
+    registry.get_model("1")
+    registry.get_model("3")
+    registry.get_model("1")
+
+    assert mock_load_model.call_count == 3
+    assert registry.get_stats()["evictions"] == 1
+    assert registry.get_stats()["models_in_memory"] == 2
+
+
+@mock.patch("src.service.model_registry.file_service.get_model_size", return_value=10)
+@mock.patch(
+    "src.service.model_registry.file_service.load_model_from_file",
+    side_effect=lambda model_number: f"model_{model_number}",
+)
+@mock.patch(
+    "src.service.model_registry.file_service.get_model_version", return_value="v1"
+)
+def test_get_model_memory_budget(mock_get_version, mock_load_model, mock_get_size):
+    """Test that models are evicted when the memory budget is exceeded"""
+
+    registry = model_registry.ModelRegistry(max_models=7, memory_budget=25)
+
+    registry.get_model("1")
+    registry.get_model("2")
+    registry.get_model("3")
+
+    stats = registry.get_stats()
+    assert stats["models_in_memory"] == 2
+    assert stats["memory_used_bytes"] == 20
+    assert stats["evictions"] == 1
@@ -1,295 +1,59 @@
 import pytest
-import pandas as pd
+import numpy as np
+from unittest import mock
 
 from src.service import prediction_service
+from src.service.board import Board
 
 
 def test_handle_user_input_x():
     """Test with all "x" values"""
 
-    board_state = "xxxxxxxxx"
-
-    response = prediction_service.handle_user_input(board_state)
-
-    column_names = [
-        "top-left-square_x",
-        "top-middle-square_x",
-        "top-right-square_x",
-        "middle-left-square_x",
-        "middle-middle-square_x",
-        "middle-right-square_x",
-        "bottom-left-square_x",
-        "bottom-middle-square_x",
-        "bottom-right-square_x",
-        "top-left-square_o",
-        "top-middle-square_o",
-        "top-right-square_o",
-        "middle-left-square_o",
-        "middle-middle-square_o",
-        "middle-right-square_o",
-        "bottom-left-square_o",
-        "bottom-middle-square_o",
-        "bottom-right-square_o",
-        "top-left-square_b",
-        "top-middle-square_b",
-        "top-right-square_b",
-        "middle-left-square_b",
-        "middle-middle-square_b",
-        "middle-right-square_b",
-        "bottom-left-square_b",
-        "bottom-middle-square_b",
-        "bottom-right-square_b",
-    ]
-    expected_response = pd.DataFrame(
-        [
-            1.0,
-            1.0,
-            1.0,
-            1.0,
-            1.0,
-            1.0,
-            1.0,
-            1.0,
-            1.0,
-            0.0,
-            0.0,
-            0.0,
-            0.0,
-            0.0,
-            0.0,
-            0.0,
-            0.0,
-            0.0,
-            0.0,
-            0.0,
-            0.0,
-            0.0,
-            0.0,
-            0.0,
-            0.0,
-            0.0,
-            0.0,
-        ],
-        index=column_names,
-    ).transpose()
-
-    pd.testing.assert_frame_equal(response, expected_response)
+    board_state = Board.from_string("xxxxxxxxx")
+
+    response = prediction_service.handle_user_input(board_state, "1")
+
+    # Onehot columns are ordered by square, then by symbol (b, o, x)
+    expected_response = np.array([[0.0, 0.0, 1.0] * 9])
+
+    np.testing.assert_array_equal(response, expected_response)
 
 
 def test_handle_user_input_o():
     """Test with all "o" values"""
 
-    board_state = "ooooooooo"
-
-    response = prediction_service.handle_user_input(board_state)
-
-    column_names = [
-        "top-left-square_x",
-        "top-middle-square_x",
-        "top-right-square_x",
-        "middle-left-square_x",
-        "middle-middle-square_x",
-        "middle-right-square_x",
-        "bottom-left-square_x",
-        "bottom-middle-square_x",
-        "bottom-right-square_x",
-        "top-left-square_o",
-        "top-middle-square_o",
-        "top-right-square_o",
-        "middle-left-square_o",
-        "middle-middle-square_o",
-        "middle-right-square_o",
-        "bottom-left-square_o",
-        "bottom-middle-square_o",
-        "bottom-right-square_o",
-        "top-left-square_b",
-        "top-middle-square_b",
-        "top-right-square_b",
-        "middle-left-square_b",
-        "middle-middle-square_b",
-        "middle-right-square_b",
-        "bottom-left-square_b",
-        "bottom-middle-square_b",
-        "bottom-right-square_b",
-    ]
-    expected_response = pd.DataFrame(
-        [
-            0.0,
-            0.0,
-            0.0,
-            0.0,
-            0.0,
-            0.0,
-            0.0,
-            0.0,
-            0.0,
-            1.0,
-            1.0,
-            1.0,
-            1.0,
-            1.0,
-            1.0,
-            1.0,
-            1.0,
-            1.0,
-            0.0,
-            0.0,
-            0.0,
-            0.0,
-            0.0,
-            0.0,
-            0.0,
-            0.0,
-            0.0,
-        ],
-        index=column_names,
-    ).transpose()
-
-    pd.testing.assert_frame_equal(response, expected_response)
+    board_state = Board.from_string("ooooooooo")
+
+    response = prediction_service.handle_user_input(board_state, "1")
+
+    expected_response = np.array([[0.0, 1.0, 0.0] * 9])
+
+    np.testing.assert_array_equal(response, expected_response)
 
 
 def test_handle_user_input_b():
     """Test with all "b" values"""
 
-    board_state = "bbbbbbbbb"
-
-    response = prediction_service.handle_user_input(board_state)
-
-    column_names = [
-        "top-left-square_x",
-        "top-middle-square_x",
-        "top-right-square_x",
-        "middle-left-square_x",
-        "middle-middle-square_x",
-        "middle-right-square_x",
-        "bottom-left-square_x",
-        "bottom-middle-square_x",
-        "bottom-right-square_x",
-        "top-left-square_o",
-        "top-middle-square_o",
-        "top-right-square_o",
-        "middle-left-square_o",
-        "middle-middle-square_o",
-        "middle-right-square_o",
-        "bottom-left-square_o",
-        "bottom-middle-square_o",
-        "bottom-right-square_o",
-        "top-left-square_b",
-        "top-middle-square_b",
-        "top-right-square_b",
-        "middle-left-square_b",
-        "middle-middle-square_b",
-        "middle-right-square_b",
-        "bottom-left-square_b",
-        "bottom-middle-square_b",
-        "bottom-right-square_b",
-    ]
-    expected_response = pd.DataFrame(
-        [
-            0.0,
-            0.0,
-            0.0,
-            0.0,
-            0.0,
-            0.0,
-            0.0,
-            0.0,
-            0.0,
-            0.0,
-            0.0,
-            0.0,
-            0.0,
-            0.0,
-            0.0,
-            0.0,
-            0.0,
-            0.0,
-            1.0,
-            1.0,
-            1.0,
-            1.0,
-            1.0,
-            1.0,
-            1.0,
-            1.0,
-            1.0,
-        ],
-        index=column_names,
-    ).transpose()
-
-    pd.testing.assert_frame_equal(response, expected_response)
+    board_state = Board.from_string("bbbbbbbbb")
+
+    response = prediction_service.handle_user_input(board_state, "1")
+
+    expected_response = np.array([[1.0, 0.0, 0.0] * 9])
+
+    np.testing.assert_array_equal(response, expected_response)
 
 
 def test_handle_user_input_mixed():
     """Test with all mixed values"""
 
-    board_state = "xobboxobx"
-
-    response = prediction_service.handle_user_input(board_state)
-
-    column_names = [
-        "top-left-square_x",
-        "top-middle-square_x",
-        "top-right-square_x",
-        "middle-left-square_x",
-        "middle-middle-square_x",
-        "middle-right-square_x",
-        "bottom-left-square_x",
-        "bottom-middle-square_x",
-        "bottom-right-square_x",
-        "top-left-square_o",
-        "top-middle-square_o",
-        "top-right-square_o",
-        "middle-left-square_o",
-        "middle-middle-square_o",
-        "middle-right-square_o",
-        "bottom-left-square_o",
-        "bottom-middle-square_o",
-        "bottom-right-square_o",
-        "top-left-square_b",
-        "top-middle-square_b",
-        "top-right-square_b",
-        "middle-left-square_b",
-        "middle-middle-square_b",
-        "middle-right-square_b",
-        "bottom-left-square_b",
-        "bottom-middle-square_b",
-        "bottom-right-square_b",
-    ]
-    expected_response = pd.DataFrame(
-        [
-            1.0,
-            0.0,
-            0.0,
-            0.0,
-            0.0,
-            1.0,
-            0.0,
-            0.0,
-            1.0,
-            0.0,
-            1.0,
-            0.0,
-            0.0,
-            1.0,
-            0.0,
-            1.0,
-            0.0,
-            0.0,
-            0.0,
-            0.0,
-            1.0,
-            1.0,
-            0.0,
-            0.0,
-            0.0,
-            1.0,
-            0.0,
-        ],
-        index=column_names,
-    ).transpose()
-
-    pd.testing.assert_frame_equal(response, expected_response)
+    board_state = Board.from_string("xobboxobx")
+
+    response = prediction_service.handle_user_input(board_state, "1")
+
+    b, o, x = [1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]
+    expected_response = np.array([x + o + b + b + o + x + o + b + x])
+
+    np.testing.assert_array_equal(response, expected_response)
 
 
 def test_handle_user_input_invalid():
@@ -302,3 +66,63 @@ def test_handle_user_input_invalid():
     with pytest.raises(Exception) as re:
         prediction_service.handle_user_input(board_state)
         assert exception_message == str(re.value)
+
+
+@pytest.mark.parametrize("model_number", ["1", "2", "3", "4", "5", "6", "7"])
+def test_handle_user_inputs_matches_single_input(model_number):
+    """Test that a batch is encoded in the same way as individual board states"""
+
+    board_states = [
+        Board.from_string(board_state)
+        for board_state in ["xxxxxxxxx", "ooooooooo", "bbbbbbbbb", "xobboxobx"]
+    ]
+
+    response = prediction_service.handle_user_inputs(board_states, model_number)
+
+    for row, board_state in enumerate(board_states):
+        expected_response = prediction_service.handle_user_input(
+            board_state, model_number
+        )
+        np.testing.assert_array_equal(response[row], expected_response[0])
+
+
+@mock.patch("src.service.prediction_service.forest_engine.get_engine")
+def test_evaluate_predictions_small_batch(mock_get_engine):
+    """Test that small batches are evaluated with the compiled forest"""
+
+    model = mock.Mock()
+    mock_get_engine.return_value.predict.return_value = np.array(["x", "o"])
+
+    response = prediction_service.evaluate_predictions(model, np.zeros((2, 9)))
+
+    assert response == ["x", "o"]
+    mock_get_engine.assert_called_once_with(model)
+    model.predict.assert_not_called()
+
+
+@mock.patch("src.service.prediction_service.config.FOREST_ENGINE_MAX_BATCH", 1)
+@mock.patch("src.service.prediction_service.forest_engine.get_engine")
+def test_evaluate_predictions_large_batch(mock_get_engine):
+    """Test that large batches are evaluated with the model's predict method"""
+
+    model = mock.Mock()
+    model.predict.return_value = np.array(["x", "o"])
+
+    response = prediction_service.evaluate_predictions(model, np.zeros((2, 9)))
+
+    assert response == ["x", "o"]
+    mock_get_engine.assert_not_called()
+
+
+@mock.patch(
+    "src.service.prediction_service.forest_engine.get_engine", return_value=None
+)
+def test_evaluate_prediction_unsupported_model(mock_get_engine):
+    """Test that models which cannot be compiled use their predict method"""
+
+    model = mock.Mock()
+    model.predict.return_value = np.array(["nobody"])
+
+    response = prediction_service.evaluate_prediction(model, np.zeros((1, 9)))
+
+    assert response == "nobody"
@@ -0,0 +1,53 @@
+import os
+import pstats
+from unittest import mock
+
+from src.service import profiler_service
+
+
+@mock.patch("src.service.profiler_service.config.PROFILE_SAMPLE_RATE", 0.0)
+@mock.patch("src.service.profiler_service.config.PROFILE_HEADER", 1)
+def test_should_profile_header():
+    """Test that a request is profiled when it asks to be"""
+
+    assert profiler_service.should_profile("1")
+    assert not profiler_service.should_profile(None)
+
+
+@mock.patch("src.service.profiler_service.config.PROFILE_SAMPLE_RATE", 0.0)
+@mock.patch("src.service.profiler_service.config.PROFILE_HEADER", 0)
+def test_should_profile_disabled():
+    """Test that the header is ignored unless enabled"""
+
+    assert not profiler_service.should_profile("1")
+
+
+@mock.patch("src.service.profiler_service.random.random", side_effect=[0.1, 0.9])
+@mock.patch("src.service.profiler_service.config.PROFILE_SAMPLE_RATE", 0.5)
+def test_should_profile_sampled(mock_random):
+    """Test that the configured fraction of requests is profiled"""
+
+    assert profiler_service.should_profile()
+    assert not profiler_service.should_profile()
+
+
+@mock.patch("src.service.profiler_service.config.PROFILE_MAX_FILES", 2)
+@mock.patch("src.service.profiler_service.file_service.get_profile_directory")
+def test_save_profile(mock_get_profile_directory, tmp_path):
+    """Test that profiles are tagged with their request, and only the most recent
+    are kept"""
+
+    mock_get_profile_directory.return_value = str(tmp_path)
+
+    file_names = []
+    for _ in range(3):
+        profiler = profiler_service.start_profile()
+        sum(range(100))
+        file_names.append(
+            profiler_service.save_profile(profiler, "get_prediction", "7", 0.0125)
+        )
+
+    assert profiler_service.get_profiles() == file_names[1:]
+    assert not os.path.exists(file_names[0])
+    assert file_names[2].endswith("-get_prediction-model_7-12.500ms.prof")
+    assert pstats.Stats(file_names[2]).total_calls > 0
@@ -0,0 +1,71 @@
+from unittest import mock
+
+from src.service import response_cache, symmetry
+from src.service.board import Board
+
+
+def test_get_etag():
+    """Test that the ETag changes with the model version and the board state"""
+
+    board = Board.from_string("xxxoobbbb")
+    etag = response_cache.get_etag("1", "v1", board)
+
+    assert etag == response_cache.get_etag("1", "v1", Board.from_string("xxxoobbbb"))
+    assert etag != response_cache.get_etag("1", "v2", board)
+    assert etag != response_cache.get_etag("2", "v1", board)
+    assert etag != response_cache.get_etag("1", "v1", Board.from_string("xxxoobbbo"))
+
+    with mock.patch("src.service.response_cache.config.CANONICAL_ANSWER_TABLES", 1):
+        assert etag != response_cache.get_etag("1", "v1", board)
+
+
+def test_get_etag_symmetric():
+    """Test that symmetric board states only share an ETag with canonical answer
+    tables"""
+
+    board = Board.from_string("xxobbobbb")
+    symmetric_boards = [
+        symmetry.transform(board, symmetry_id)
+        for symmetry_id in range(symmetry.SYMMETRY_COUNT)
+    ]
+
+    etags = {response_cache.get_etag("1", "v1", board) for board in symmetric_boards}
+    assert len(etags) == symmetry.SYMMETRY_COUNT
+
+    with mock.patch("src.service.response_cache.config.CANONICAL_ANSWER_TABLES", 1):
+        etags = {
+            response_cache.get_etag("1", "v1", board) for board in symmetric_boards
+        }
+    assert len(etags) == 1
+
+
+def test_response_cache():
+    """Test that the least recently used responses are evicted"""
+
+    cache = response_cache.ResponseCache(2)
+    cache.put("a", b"1")
+    cache.put("b", b"2")
+    assert cache.get("a") == b"1"
+    cache.put("c", b"3")
+
+    assert cache.get("b") is None
+    assert cache.get("c") == b"3"
+    cache.record_not_modified()
+    assert cache.get_stats() == {
+        "hits": 2,
+        "misses": 1,
+        "not_modified": 1,
+        "entries": 2,
+    }
+
+    cache.clear()
+    assert cache.get_stats()["entries"] == 0
+
+
+def test_response_cache_disabled():
+    """Test that nothing is cached without any entries"""
+
+    cache = response_cache.ResponseCache(0)
+    cache.put("a", b"1")
+
+    assert cache.get("a") is None
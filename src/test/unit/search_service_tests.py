@@ -0,0 +1,134 @@
+import os
+from unittest import mock
+
+import numpy as np
+import pytest
+
+from src.service import search_service
+
+PARAM_GRID = {"n_estimators": [2, 6], "max_depth": [2, 4], "criterion": ["gini"]}
+
+
+@pytest.fixture
+def search_directory(tmp_path):
+    """Places the search cache in a temporary directory"""
+
+    with mock.patch(
+        "src.service.search_service.file_service.get_search_directory",
+        side_effect=lambda version: f"{tmp_path}/{version}",
+    ), mock.patch(
+        "src.service.search_service.file_service.get_search_cache_file_name",
+        side_effect=lambda version, key: f"{tmp_path}/{version}/{key}_scores.json",
+    ):
+        yield tmp_path
+
+
+def get_data():
+    """Generates board states won by x whenever x holds the first square"""
+
+    random_generator = np.random.default_rng(0)
+    predictive_features = random_generator.integers(-1, 2, size=(300, 9))
+    target_feature = np.where(predictive_features[:, 0] == 1, "x", "o")
+
+    return predictive_features.astype(np.float32), target_feature
+
+
+def test_get_schedule():
+    """Test that the candidates are reduced to one, within the resources"""
+
+    assert search_service.get_schedule(4, 4920, 40) == [1640, 4920]
+    assert search_service.get_schedule(27, 900, 10) == [33, 100, 300, 900]
+    assert search_service.get_schedule(27, 900, 300) == [300, 900]
+    assert search_service.get_schedule(1, 900, 10) == [900]
+
+
+def test_halving_search(search_directory):
+    """Test that the best candidate is refitted on all of the rows"""
+
+    predictive_features, target_feature = get_data()
+
+    model = search_service.halving_search(
+        predictive_features, target_feature, PARAM_GRID, cache=("a", "model_2_train")
+    )
+
+    assert model.best_estimator_.n_features_in_ == 9
+    assert model.best_params_ in [
+        result["params"] for result in model.results_ if result["iteration"] == 1
+    ]
+    assert model.best_score_ > 0.9
+    assert (model.predict(predictive_features) == target_feature).mean() > 0.9
+    assert os.path.exists(f"{search_directory}/a/model_2_train_scores.json")
+
+
+def test_repeated_search_is_cached(search_directory):
+    """Test that a repeated search fits no candidates, and a widened search only
+    fits the new ones"""
+
+    predictive_features, target_feature = get_data()
+    search_service.halving_search(
+        predictive_features, target_feature, PARAM_GRID, cache=("a", "key")
+    )
+
+    with mock.patch(
+        "src.service.search_service.score_candidate",
+        wraps=search_service.score_candidate,
+    ) as mock_score_candidate:
+        model = search_service.halving_search(
+            predictive_features, target_feature, PARAM_GRID, cache=("a", "key")
+        )
+        assert mock_score_candidate.call_count == 0
+        assert all(result["cached"] for result in model.results_)
+
+        search_service.halving_search(
+            predictive_features,
+            target_feature,
+            dict(PARAM_GRID, criterion=["gini", "entropy"]),
+            cache=("a", "key"),
+        )
+        assert mock_score_candidate.call_count > 0
+
+
+def test_data_change_invalidates_cache(search_directory):
+    """Test that the scores of a previous version are removed"""
+
+    predictive_features, target_feature = get_data()
+    search_service.halving_search(
+        predictive_features, target_feature, PARAM_GRID, cache=("a", "key")
+    )
+    search_service.halving_search(
+        predictive_features, target_feature, PARAM_GRID, cache=("b", "key")
+    )
+
+    assert os.listdir(search_directory) == ["b"]
+
+
+def test_time_budget():
+    """Test that only one candidate is scored once the budget is spent"""
+
+    predictive_features, target_feature = get_data()
+    progress = mock.Mock()
+
+    model = search_service.halving_search(
+        predictive_features,
+        target_feature,
+        PARAM_GRID,
+        resource="n_estimators",
+        time_budget=0,
+        progress=progress,
+    )
+
+    assert len(model.results_) == 1
+    assert progress.call_count == 1
+    assert model.best_params_["n_estimators"] == 6
+    assert model.best_estimator_.n_estimators == 6
+
+
+def test_invalid_resource():
+    """Test that an unknown search resource is rejected"""
+
+    predictive_features, target_feature = get_data()
+
+    with pytest.raises(ValueError):
+        search_service.halving_search(
+            predictive_features, target_feature, PARAM_GRID, resource="max_depth"
+        )
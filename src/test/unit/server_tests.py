@@ -0,0 +1,179 @@
+import signal
+from unittest import mock
+
+from src.service import server
+
+
+@mock.patch(
+    "src.service.server.file_service.get_model_version",
+    side_effect=["v1", FileNotFoundError],
+)
+def test_get_model_versions(mock_get_model_version):
+    """Test that a model without a file has no version"""
+
+    assert server.get_model_versions(["1", "2"]) == {"1": "v1", "2": None}
+
+
+@mock.patch("src.service.server.warmup_service.start_warm_up")
+@mock.patch("src.service.server.waitress.serve")
+def test_run_single_process(mock_serve, mock_start_warm_up):
+    """Test that a single worker serves from this process while warming up"""
+
+    server.run(workers=1, threads=4, host="127.0.0.1", port=8080)
+
+    mock_start_warm_up.assert_called_once()
+    mock_serve.assert_called_once_with(
+        server.app, host="127.0.0.1", port=8080, threads=4
+    )
+
+
+@mock.patch("src.service.server.Supervisor")
+@mock.patch("src.service.server.warmup_service.warm_up")
+@mock.patch("src.service.server.socket.create_server")
+def test_run_multi_process(mock_create_server, mock_warm_up, mock_supervisor):
+    """Test that the models are warmed up before the workers are started"""
+
+    server.run(workers=3, threads=2, host="127.0.0.1", port=8080)
+
+    mock_warm_up.assert_called_once()
+    mock_supervisor.assert_called_once_with(mock_create_server.return_value, 3, 2)
+    mock_supervisor.return_value.run.assert_called_once()
+
+
+@mock.patch("src.service.server.os.kill")
+@mock.patch("src.service.server.os.fork", side_effect=[101, 102, 103, 104])
+def test_restart_workers(mock_fork, mock_kill):
+    """Test that new workers are started before the previous ones are stopped"""
+
+    supervisor = server.Supervisor(mock.Mock(), 2, 1)
+    supervisor._spawn_worker()
+    supervisor._spawn_worker()
+
+    supervisor.restart_workers()
+
+    assert supervisor._pids == {103, 104}
+    assert supervisor._retiring_pids == {101, 102}
+    assert sorted(mock_kill.call_args_list) == [
+        mock.call(101, signal.SIGTERM),
+        mock.call(102, signal.SIGTERM),
+    ]
+
+
+@mock.patch("src.service.server.os.fork", side_effect=[101, 102, 103])
+@mock.patch("src.service.server.os.waitpid", side_effect=[(101, 0), (102, 0), (0, 0)])
+def test_reap_workers(mock_waitpid, mock_fork):
+    """Test that a worker which exits is replaced, unless it was asked to stop"""
+
+    supervisor = server.Supervisor(mock.Mock(), 1, 1)
+    supervisor._spawn_worker()
+    supervisor._spawn_worker()
+    supervisor._pids.remove(102)
+    supervisor._retiring_pids.add(102)
+
+    supervisor.reap_workers()
+
+    assert supervisor._pids == {103}
+    assert supervisor._retiring_pids == set()
+
+
+@mock.patch("src.service.server.Supervisor.restart_workers")
+@mock.patch("src.service.server.warmup_service.warm_up")
+@mock.patch("src.service.server.model_registry.evict")
+@mock.patch(
+    "src.service.server.get_model_versions",
+    side_effect=[{"1": "v1", "2": "v1"}, {"1": "v1", "2": "v2"}],
+)
+def test_check_models(
+    mock_get_model_versions, mock_evict, mock_warm_up, mock_restart_workers
+):
+    """Test that the workers are only restarted when a model file changes"""
+
+    supervisor = server.Supervisor(
+        mock.Mock(), 1, 1, model_numbers=["1", "2"], reload_delay=0
+    )
+    supervisor._model_versions = {"1": "v1", "2": "v1"}
+
+    supervisor.check_models()
+    mock_restart_workers.assert_not_called()
+
+    supervisor.check_models()
+    mock_evict.assert_called_once_with("2")
+    mock_warm_up.assert_called_once_with(["1", "2"])
+    mock_restart_workers.assert_called_once()
+    assert supervisor._model_versions == {"1": "v1", "2": "v2"}
+
+
+@mock.patch("src.service.server.time.monotonic")
+@mock.patch("src.service.server.Supervisor.restart_workers")
+@mock.patch("src.service.server.warmup_service.warm_up", return_value=True)
+@mock.patch("src.service.server.model_registry.evict")
+@mock.patch("src.service.server.get_model_versions")
+def test_check_models_delay(
+    mock_get_model_versions,
+    mock_evict,
+    mock_warm_up,
+    mock_restart_workers,
+    mock_monotonic,
+):
+    """Test that models saved one after another cause a single restart, once
+    their files have stopped changing"""
+
+    supervisor = server.Supervisor(
+        mock.Mock(), 1, 1, model_numbers=["1", "2"], reload_delay=10
+    )
+    supervisor._model_versions = {"1": "v1", "2": "v1"}
+
+    for now, versions in [
+        (0, {"1": "v2", "2": "v1"}),
+        (5, {"1": "v2", "2": "v2"}),
+        (10, {"1": "v2", "2": "v2"}),
+    ]:
+        mock_monotonic.return_value = now
+        mock_get_model_versions.return_value = versions
+        supervisor.check_models()
+    mock_restart_workers.assert_not_called()
+
+    mock_monotonic.return_value = 15
+    supervisor.check_models()
+    mock_warm_up.assert_called_once_with(["1", "2"])
+    mock_restart_workers.assert_called_once()
+    assert supervisor._model_versions == {"1": "v2", "2": "v2"}
+
+
+@mock.patch("src.service.server.Supervisor.restart_workers")
+@mock.patch("src.service.server.warmup_service.set_status")
+@mock.patch("src.service.server.warmup_service.get_status", return_value="status")
+@mock.patch("src.service.server.warmup_service.warm_up", return_value=False)
+@mock.patch("src.service.server.model_registry.evict")
+@mock.patch("src.service.server.get_model_versions")
+def test_check_models_warm_up_failed(
+    mock_get_model_versions,
+    mock_evict,
+    mock_warm_up,
+    mock_get_status,
+    mock_set_status,
+    mock_restart_workers,
+):
+    """Test that the workers keep serving if the new models fail to warm up, and
+    that the models are only reloaded again once their files change"""
+
+    supervisor = server.Supervisor(
+        mock.Mock(), 1, 1, model_numbers=["1"], reload_delay=0
+    )
+    supervisor._model_versions = {"1": "v1"}
+
+    mock_get_model_versions.return_value = {"1": "v2"}
+    supervisor.check_models()
+    supervisor.check_models()
+
+    mock_warm_up.assert_called_once_with(["1"])
+    mock_set_status.assert_called_once_with("status")
+    mock_restart_workers.assert_not_called()
+    assert supervisor._model_versions == {"1": "v1"}
+
+    mock_warm_up.return_value = True
+    mock_get_model_versions.return_value = {"1": "v3"}
+    supervisor.check_models()
+
+    mock_restart_workers.assert_called_once()
+    assert supervisor._model_versions == {"1": "v3"}
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+
+from src.service import symmetry
+from src.service.board import Board
+
+
+def test_canonicalize():
+    """Test that all symmetric equivalents share the same canonical form"""
+
+    board = Board.from_string("xobbbbbbb")
+
+    canonical_board, symmetry_id = symmetry.canonicalize(board)
+
+    for transformation_id in range(symmetry.SYMMETRY_COUNT):
+        equivalent_board = symmetry.transform(board, transformation_id)
+        assert symmetry.canonicalize(equivalent_board)[0] == canonical_board
+
+    assert symmetry.transform(board, symmetry_id) == canonical_board
+    assert canonical_board.index == min(
+        symmetry.transform(board, i).index for i in range(symmetry.SYMMETRY_COUNT)
+    )
+
+
+def test_transform_rotation():
+    """Test a clockwise rotation by 90 degrees"""
+
+    # x o b      b b x
+    # b b b  =>  b b o
+    # b b b      b b b
+    board = Board.from_string("xobbbbbbb")
+
+    assert str(symmetry.transform(board, 1)) == "bbxbbobbb"
+
+
+def test_canonical_board_state_count():
+    """Test the number of distinct board states up to symmetry"""
+
+    assert symmetry.CANONICAL_BOARD_STATE_COUNT == 2862
+    assert symmetry.ORBIT_NUMBERS.max() == 2861
+
+
+def test_symmetric_board_states_share_outcome():
+    """Test that the dataset labels are the same for all symmetric equivalents"""
+
+    with open("ml-ttt-data.csv") as csv_string:
+        dataset = pd.read_csv(csv_string, index_col=0)
+
+    outcomes = dataset.index.values
+
+    assert (outcomes[symmetry.CANONICAL_INDICES] == outcomes).all()
+
+
+def test_get_permutations():
+    """Test that the symmetries of a larger board form a group of eight
+    distinct permutations"""
+
+    permutations = symmetry.get_permutations(4)
+    permutation_set = {tuple(permutation) for permutation in permutations}
+
+    assert len(permutation_set) == 8
+    assert permutations[1][:4] == [12, 8, 4, 0]  # Left column becomes the top row
+    for first in permutations:
+        for second in permutations:
+            assert tuple(np.array(first)[second]) in permutation_set
+
+
+def test_get_symmetric_indices():
+    """Test the symmetric equivalents of a batch of board states"""
+
+    board = Board.from_string("xobbbbbbb")
+
+    symmetric_indices = symmetry.get_symmetric_indices(
+        np.array([board.x_mask]), np.array([board.o_mask])
+    )
+
+    assert symmetric_indices.shape == (symmetry.SYMMETRY_COUNT, 1)
+    assert symmetric_indices[1, 0] == Board.from_string("bbxbbobbb").index
+    assert symmetric_indices.min() == symmetry.CANONICAL_INDICES[board.index]
@@ -0,0 +1,62 @@
+from unittest import mock
+
+import numpy as np
+from sklearn import metrics
+
+from src.service import testing_service
+
+
+class mock_model:
+    def __init__(self, predictions):
+        self.predictions = np.array(predictions, dtype=object)
+
+    def predict(self, x_test):
+        return self.predictions
+
+
+@mock.patch(
+    "src.service.testing_service.prediction_service.get_predictor",
+    side_effect=lambda model, rows: model,
+)
+def test_test_model(mock_get_predictor):
+    """Test that the metrics match those of scikit-learn, including for a class
+    which is never predicted"""
+
+    y_test = np.array(["x", "o", "x", "nobody", "o", "x"])
+    y_predicted = ["x", "x", "x", "o", "o", "o"]
+
+    evaluation = testing_service.test_model(
+        mock_model(y_predicted), np.zeros((6, 9)), y_test
+    )
+
+    assert evaluation["classes"] == ["nobody", "o", "x"]
+    assert (
+        evaluation["confusion_matrix"]
+        == metrics.confusion_matrix(y_test, y_predicted).tolist()
+    )
+    for name, score in [
+        ("precision", metrics.precision_score),
+        ("recall", metrics.recall_score),
+        ("f1_score", metrics.f1_score),
+    ]:
+        expected = score(y_test, y_predicted, average=None, zero_division=0)
+        assert list(evaluation[name].values()) == expected.tolist()
+
+    assert evaluation["support"] == {"nobody": 1, "o": 2, "x": 3}
+    assert evaluation["accuracy"] == metrics.accuracy_score(y_test, y_predicted)
+    assert evaluation["rows"] == 6
+    assert evaluation["rows_per_second"] > 0
+
+
+@mock.patch("src.service.testing_service.file_service.get_evaluation_file_name")
+def test_save_and_load_evaluation(mock_get_evaluation_file_name, tmp_path):
+    """Test that a stored evaluation is only returned for its own version"""
+
+    mock_get_evaluation_file_name.return_value = str(tmp_path / "evaluation.json")
+
+    assert testing_service.load_evaluation("1", "v1") is None
+
+    testing_service.save_evaluation("1", "v1", {"accuracy": 0.9})
+
+    assert testing_service.load_evaluation("1", "v1") == {"accuracy": 0.9}
+    assert testing_service.load_evaluation("1", "v2") is None
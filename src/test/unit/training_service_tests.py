@@ -1,6 +1,11 @@
+import pickle
 from unittest import mock
 
-from src.service import training_service
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.service import board, training_service
 
 
 @mock.patch(
@@ -36,3 +41,239 @@ def test_import_data_as_pandas():
     assert response.x_train.shape[0] + response.x_test.shape[0] == 19683
     assert response.y_train.shape[0] + response.y_test.shape[0] == 19683
     assert response.x_train.shape[1] == 10
+
+
+def test_import_data_as_pandas_reweight():
+    """Test that reweighted symmetric rows account for the whole training set"""
+
+    predictive_features, target_feature, sample_weight = (
+        training_service.import_data_as_pandas("7", symmetry="reweight")
+    )
+
+    assert predictive_features.shape[0] == target_feature.shape[0]
+    assert predictive_features.shape[0] == sample_weight.shape[0]
+    assert sample_weight.sum() == 4920
+
+
+@mock.patch(
+    "src.service.training_service.generators.get_param_grid",
+    return_value={"n_estimators": [2], "max_depth": [4]},
+)
+def test_train_all_models(mock_param_grid):
+    """Test that each requested model is trained and timed"""
+
+    models, report = training_service.train_all_models(["2", "6"], processes=1)
+
+    assert set(models) == {"2", "6"}
+    assert models["2"].best_estimator_.n_features_in_ == 9
+    assert models["6"].best_estimator_.n_features_in_ == 8
+    assert report["2"]["rows"] == 4920
+    assert report["6"]["fit_seconds"] > 0
+    assert "best score" in training_service.format_training_report(report)
+
+
+@mock.patch("src.service.training_service.feature_store.save_features")
+@mock.patch(
+    "src.service.training_service.feature_store.load_features", return_value=None
+)
+@mock.patch(
+    "src.service.training_service.generators.get_param_grid",
+    return_value={"n_estimators": [2], "max_depth": [2, 4]},
+)
+def test_train_model_progress(mock_param_grid, mock_load_features, mock_save_features):
+    """Test that each stage of training is reported"""
+
+    progress = mock.Mock()
+
+    model = training_service.train_model("2", progress=progress)
+
+    assert progress.call_args_list == [
+        mock.call("loading"),
+        mock.call("encoding"),
+        mock.call("fitting", candidate=1, candidates=2),
+        mock.call("fitting", candidate=2, candidates=2),
+    ]
+    # The progress callback must not be saved with the model
+    assert pickle.loads(pickle.dumps(model)).best_score_ == model.best_score_
+
+
+@mock.patch("src.service.training_service.feature_store.save_features")
+@mock.patch("src.service.training_service.feature_store.load_features")
+@mock.patch("src.service.training_service.encode_data_set")
+def test_import_data_from_feature_store(
+    mock_encode_data_set, mock_load_features, mock_save_features
+):
+    """Test that stored features are used instead of re-encoding the dataset"""
+
+    mock_load_features.return_value = {"features": "features", "target": "target"}
+
+    response = training_service.import_data_as_pandas("2", test=True)
+
+    assert response == ("features", "target")
+    mock_load_features.assert_called_once_with("2", test=True, symmetry=None)
+    mock_encode_data_set.assert_not_called()
+    mock_save_features.assert_not_called()
+
+
+@mock.patch("src.service.training_service.feature_store.save_features")
+@mock.patch(
+    "src.service.training_service.feature_store.load_features", return_value=None
+)
+def test_import_data_saves_to_feature_store(mock_load_features, mock_save_features):
+    """Test that encoded features are saved to the feature store"""
+
+    predictive_features, target_feature = training_service.import_data_as_pandas(
+        "2", test=True
+    )
+
+    arrays = mock_save_features.call_args[0][1]
+    assert predictive_features.dtype == np.float32
+    assert predictive_features.shape == (14763, 9)
+    np.testing.assert_array_equal(arrays["target"], target_feature)
+
+
+def test_encode_generated_set():
+    """Test that the generated dataset is encoded with the features of the csv
+    file's pipeline, and labelled with the winners of the csv file"""
+
+    with open("ml-ttt-data.csv") as csv_string:
+        outcomes = pd.read_csv(csv_string, index_col=0).index.values
+
+    arrays = training_service.encode_generated_set("2", test=True)
+
+    # Recover each board state's index from its ordinal encoding
+    digits = np.where(
+        arrays["features"] == 1, 0, np.where(arrays["features"] == -1, 1, 2)
+    )
+    indices = digits @ board.PLACE_VALUES
+
+    assert arrays["features"].shape[1] == 9
+    assert (outcomes[indices] == arrays["target"]).all()
+
+
+def test_encode_generated_set_resampled():
+    """Test that the training set of model 4 is upsampled"""
+
+    arrays = training_service.encode_generated_set("4")
+
+    outcome_counts = np.unique(arrays["target"], return_counts=True)[1]
+    assert (outcome_counts == outcome_counts[0]).all()
+    assert len(arrays["features"]) == len(arrays["target"])
+
+
+def test_encode_data_set_weighted():
+    """Test that a training set balanced by weight keeps each row once"""
+
+    resampled = training_service.encode_data_set("4")
+    weighted = training_service.encode_data_set("4", balancing="weight")
+
+    outcomes, outcome_codes = np.unique(weighted["target"], return_inverse=True)
+    outcome_weights = np.bincount(outcome_codes, weights=weighted["sample_weight"])
+
+    assert len(weighted["features"]) == 4920
+    assert len(resampled["features"]) > 4920
+    assert "sample_weight" not in resampled
+    np.testing.assert_allclose(
+        outcome_weights, np.unique(resampled["target"], return_counts=True)[1]
+    )
+    assert outcomes.tolist() == sorted(set(resampled["target"]))
+
+
+def test_get_balancing():
+    """Test that only the balanced models have a balancing option"""
+
+    assert training_service.get_balancing("4") == "resample"
+    assert training_service.get_balancing("4", "weight") == "weight"
+    assert training_service.get_balancing("2", "weight") is None
+
+    with pytest.raises(ValueError):
+        training_service.get_balancing("4", "duplicate")
+
+
+@mock.patch(
+    "src.service.training_service.generators.get_param_grid",
+    return_value={"n_estimators": [2], "max_depth": [4]},
+)
+def test_train_all_models_weighted(mock_param_grid):
+    """Test that a model balanced by weight is fitted to its weighted rows"""
+
+    models, report = training_service.train_all_models(
+        ["4"], processes=1, balancing={"4": "weight"}
+    )
+
+    assert report["4"]["rows"] == 4920
+    assert report["4"]["balancing"] == "weight"
+    assert models["4"].best_estimator_.n_features_in_ == 9
+
+
+@mock.patch("src.service.training_service.search_service.halving_search")
+@mock.patch(
+    "src.service.training_service.generators.get_param_grid",
+    return_value={"n_estimators": [2], "max_depth": [2, 4]},
+)
+def test_train_model_halving(mock_param_grid, mock_halving_search):
+    """Test that a halving search caches its scores under the training set's key"""
+
+    training_service.train_model("4", search="halving", balancing="weight")
+
+    kwargs = mock_halving_search.call_args[1]
+    assert mock_halving_search.call_args[0][2] == mock_param_grid.return_value
+    assert kwargs["cache"][1] == "model_4_train_weighted"
+    assert kwargs["sample_weight"] is not None
+
+
+def test_fit_model_invalid_search():
+    """Test that an unknown search method is rejected"""
+
+    with pytest.raises(ValueError):
+        training_service.fit_model(np.zeros((2, 1)), ["x", "o"], search="random")
+
+
+def get_thresholds(trees):
+    """Returns the split thresholds of each tree, to compare forests by value"""
+
+    return [tree.tree_.threshold.tolist() for tree in trees]
+
+
+@pytest.mark.parametrize("mode, trees", [("grow", 15), ("refresh", 10)])
+def test_retrain_model(mode, trees):
+    """Test that a retrained forest keeps its old trees, and the model is not modified"""
+
+    with open("models/model_2.pkl", "rb") as file:
+        model = pickle.load(file)
+    old_trees = get_thresholds(model.best_estimator_.estimators_)
+    training_set, test_set = training_service.load_data_split()
+
+    retrained_model, report = training_service.retrain_model(
+        model, "2", test_set.head(100), mode=mode
+    )
+
+    new_trees = get_thresholds(retrained_model.best_estimator_.estimators_)
+    assert get_thresholds(model.best_estimator_.estimators_) == old_trees
+    assert len(retrained_model.best_estimator_.estimators_) == trees
+    assert retrained_model.best_params_["n_estimators"] == trees
+    assert report["rows"] == 5020
+    assert report["new_rows"] == 100
+    if mode == "grow":
+        assert new_trees[:10] == old_trees
+    else:
+        assert new_trees[:8] == old_trees[2:]
+
+
+def test_retrain_model_invalid():
+    """Test that an invalid mode, or a delta missing a class, is rejected"""
+
+    with open("models/model_2.pkl", "rb") as file:
+        model = pickle.load(file)
+    training_set, _ = training_service.load_data_split()
+
+    with pytest.raises(ValueError):
+        training_service.retrain_model(model, "2", training_set, mode="replace")
+
+    # Only rows won by x, which removes classes from the training set
+    with mock.patch(
+        "src.service.training_service.import_data_as_pandas",
+        return_value=(np.zeros((1, 9), dtype=np.float32), np.array(["x"])),
+    ):
+        with pytest.raises(ValueError):
+            training_service.retrain_model(model, "2", training_set.loc[["x"]])
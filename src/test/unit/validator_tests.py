@@ -125,3 +125,31 @@ def test_validate_model_number_invalid():
     with pytest.raises(Exception) as re:
         validator.validate_model_number(input)
         assert exception_message == str(re.value)
+
+
+def test_validate_board_states():
+    """
+    Test that each board state in a batch is checked individually
+    """
+
+    board_states = ["xobxobxob", "xxxxxxxx", "xxxxxxxxy", 123456789]
+
+    boards, errors = validator.validate_board_states(board_states)
+
+    assert [str(board) for board in boards[:1]] == ["xobxobxob"]
+    assert boards[1:] == [None, None, None]
+    assert errors == [
+        None,
+        "Validation Error: Incorrect length",
+        "Validation Error: Invalid character",
+        "Validation Error: Invalid input",
+    ]
+
+
+def test_validate_board_states_not_a_list():
+    """
+    Test with a batch which is not a list
+    """
+
+    with pytest.raises(ValueError):
+        validator.validate_board_states("xobxobxob")
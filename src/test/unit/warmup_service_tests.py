@@ -0,0 +1,96 @@
+from unittest import mock
+
+import numpy as np
+
+from src.service import warmup_service
+
+
+@mock.patch("src.service.warmup_service.file_service.get_model_size", return_value=10)
+@mock.patch("src.service.warmup_service.answer_tables.lookup")
+@mock.patch(
+    "src.service.warmup_service.answer_tables.get_table",
+    return_value=np.zeros(19683, dtype=np.uint8),
+)
+@mock.patch("src.service.warmup_service.prediction_service.evaluate_prediction")
+@mock.patch("src.service.warmup_service.model_registry.get_model")
+def test_warm_up_success(
+    mock_get_model, mock_evaluate_prediction, mock_get_table, mock_lookup, mock_size
+):
+    """Test that the instance is ready once every model is warmed up"""
+
+    response = warmup_service.warm_up(["1", "7"])
+
+    assert response is True
+    assert warmup_service.is_ready()
+    assert mock_get_model.call_args_list == [mock.call("1"), mock.call("7")]
+    assert mock_evaluate_prediction.call_count == 2
+
+    status = warmup_service.get_status()
+    assert status["status"] == warmup_service.READY
+    assert status["models"]["7"]["file_size_bytes"] == 10
+    assert status["models"]["7"]["answer_table_bytes"] == 19683
+    assert status["models"]["7"]["load_seconds"] >= 0
+
+
+@mock.patch("src.service.warmup_service.file_service.get_model_size", return_value=10)
+@mock.patch("src.service.warmup_service.answer_tables.compile_table")
+@mock.patch(
+    "src.service.warmup_service.answer_tables.get_table",
+    side_effect=[None, np.zeros(19683, dtype=np.uint8)],
+)
+@mock.patch("src.service.warmup_service.prediction_service.evaluate_prediction")
+@mock.patch("src.service.warmup_service.model_registry.get_model", return_value="model")
+def test_warm_up_compiles_missing_table(
+    mock_get_model,
+    mock_evaluate_prediction,
+    mock_get_table,
+    mock_compile_table,
+    mock_size,
+):
+    """Test that a missing answer table is compiled during the warm-up"""
+
+    assert warmup_service.warm_up(["2"])
+    mock_compile_table.assert_called_once_with("model", "2")
+
+
+@mock.patch(
+    "src.service.warmup_service.model_registry.get_model",
+    side_effect=FileNotFoundError("No model file"),
+)
+def test_warm_up_failure(mock_get_model):
+    """Test that the instance is not ready when a model cannot be loaded"""
+
+    response = warmup_service.warm_up(["1"])
+
+    assert response is False
+    assert not warmup_service.is_ready()
+
+    status = warmup_service.get_status()
+    assert status["status"] == warmup_service.FAILED
+    assert status["models"]["1"] == {"error": "No model file"}
+
+
+@mock.patch(
+    "src.service.warmup_service.model_registry.get_model",
+    side_effect=FileNotFoundError("No model file"),
+)
+def test_set_status(mock_get_model):
+    """Test that the status of a previous warm-up can be restored"""
+
+    previous_status = dict(
+        warmup_service.get_status(),
+        status=warmup_service.READY,
+        models={"1": {"load_seconds": 1.0}},
+    )
+    warmup_service.warm_up(["1"])
+    warmup_service.set_status(previous_status)
+
+    assert warmup_service.is_ready()
+    assert warmup_service.get_status()["models"] == {"1": {"load_seconds": 1.0}}
+
+
+def test_warm_up_saved_models():
+    """Test warming up the saved models"""
+
+    assert warmup_service.warm_up(["3"])
+    assert warmup_service.get_status()["models"]["3"]["memory_bytes"] > 0